@@ -0,0 +1,170 @@
+"""Offline microbenchmarks for the request hot paths
+
+Run from the repository root:
+
+    python -m benchmarks.hotPaths                      # run and compare to baseline
+    python -m benchmarks.hotPaths --update-baseline    # store new baseline
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import statistics
+from pathlib import Path
+from datetime import datetime
+from bson import ObjectId
+from src.utils.hashService import HashService
+from src.utils.tokenService import TokenService, TokenVerifier
+from src.services.orgService import OrgService
+from src.utils.jsonResponse import BsonJSONResponse
+
+benchDir = Path(__file__).resolve().parent
+defaultBaseline = benchDir / "baseline.json"
+defaultOutput = benchDir / "results.json"
+
+def measure(func, minTime: float, repeats: int) -> dict:
+    """Time func, scaling iterations so each repeat runs at least minTime"""
+    iterations = 1
+    while True:
+        startedAt = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - startedAt
+        if elapsed >= minTime or iterations >= 1_000_000:
+            break
+        iterations *= 2 if elapsed == 0 else max(2, int(minTime / elapsed) + 1)
+    
+    samples = [elapsed / iterations]
+    for _ in range(repeats - 1):
+        startedAt = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        samples.append((time.perf_counter() - startedAt) / iterations)
+    
+    return {
+        "iterations": iterations,
+        "medianNs": statistics.median(samples) * 1e9,
+        "minNs": min(samples) * 1e9
+    }
+
+class InMemoryMasterRepo:
+    """Just enough of MasterRepo for getOrganization"""
+    
+    def __init__(self, document: dict):
+        self.document = document
+    
+    async def findByName(self, organizationName: str):
+        return dict(self.document)
+    
+    async def findPublicByName(self, organizationName: str):
+        return {field: value for field, value in self.document.items() if field != "password"}
+
+def buildCases(bcryptCosts: list) -> dict:
+    """Name -> zero-argument callable"""
+    cases = {}
+    
+    for cost in bcryptCosts:
+        hashed = HashService.hashPassword("benchmark-password", cost)
+        cases[f"hashPassword[cost={cost}]"] = lambda cost=cost: HashService.hashPassword("benchmark-password", cost)
+        cases[f"verifyPassword[cost={cost}]"] = lambda hashed=hashed: HashService.verifyPassword("benchmark-password", hashed)
+    
+    tokenService = TokenService()
+    token = tokenService.createToken(str(ObjectId()), "Benchmark Org")
+    header = f"Bearer {token}"
+    verifier = TokenVerifier(1000, 300)
+    verifier.verify(token)
+    cases["TokenService.createToken"] = lambda: tokenService.createToken("656f0c1d2e3f4a5b6c7d8e9f", "Benchmark Org")
+    cases["TokenService.verifyToken"] = lambda: tokenService.verifyToken(token)
+    cases["TokenService.extractToken"] = lambda: tokenService.extractToken(header)
+    cases["TokenVerifier.verify[cached]"] = lambda: verifier.verify(token)
+    
+    orgService = OrgService()
+    longName = " ".join(["Global Logistics and Supply Chain Holdings"] * 20)
+    unicodeName = "Société Générale Ünïcödé Straße 東京 Holdings Ltd"
+    cases["generateCollectionName[short]"] = lambda: orgService.generateCollectionName("Tech Corp")
+    cases["generateCollectionName[long]"] = lambda: orgService.generateCollectionName(longName)
+    cases["generateCollectionName[unicode]"] = lambda: orgService.generateCollectionName(unicodeName)
+    
+    now = datetime.utcnow()
+    orgService.masterRepo = InMemoryMasterRepo({
+        "_id": ObjectId(),
+        "organizationName": "Tech Corp",
+        "dynamicCollectionName": "orgTechcorp",
+        "email": "admin@techcorp.com",
+        "password": HashService.hashPassword("benchmark-password", 4),
+        "createdAt": now,
+        "updatedAt": now
+    })
+    loop = asyncio.new_event_loop()
+    
+    def getOrganizationResponse():
+        result = loop.run_until_complete(orgService.getOrganization("Tech Corp"))
+        BsonJSONResponse(result).body
+    
+    cases["getOrganization[serialize]"] = getOrganizationResponse
+    return cases
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Cases whose median regressed more than threshold against baseline"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        ratio = result["medianNs"] / previous["medianNs"]
+        if ratio > 1 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for hashing, tokens and serialization")
+    parser.add_argument("--output", default=str(defaultOutput), help="where to write results JSON")
+    parser.add_argument("--baseline", default=str(defaultBaseline), help="baseline JSON to compare against")
+    parser.add_argument("--update-baseline", dest="updateBaseline", action="store_true", help="write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown ratio before flagging")
+    parser.add_argument("--costs", default="4,8,10,12", help="bcrypt costs to measure")
+    parser.add_argument("--min-time", dest="minTime", type=float, default=0.2, help="seconds per repeat")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--filter", default="", help="only run cases containing this text")
+    args = parser.parse_args(argv)
+    
+    costs = [int(cost) for cost in args.costs.split(",") if cost]
+    results = {}
+    for name, func in buildCases(costs).items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = measure(func, args.minTime, args.repeats)
+        print(f"{name:40s} {results[name]['medianNs'] / 1000:12.2f} us/op")
+    
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "createdAt": datetime.utcnow().isoformat()
+        },
+        "results": results
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    
+    baselinePath = Path(args.baseline)
+    if args.updateBaseline:
+        baselinePath.write_text(json.dumps(report, indent=2))
+        print(f"✓ Baseline written to {baselinePath}")
+        return 0
+    
+    if not baselinePath.exists():
+        print("⚠ No baseline found, run with --update-baseline to create one")
+        return 0
+    
+    baseline = json.loads(baselinePath.read_text()).get("results", {})
+    regressions = compare(results, baseline, args.threshold)
+    for name, ratio in regressions:
+        print(f"✗ Regression: {name} is {ratio:.2f}x baseline")
+    if not regressions:
+        print("✓ No regressions against baseline")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
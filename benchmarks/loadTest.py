@@ -0,0 +1,251 @@
+"""End-to-end load harness for src.main:app against an in-memory MongoDB
+
+Run from the repository root (needs benchmarks/requirements.txt):
+
+    python -m benchmarks.loadTest --synthesize 50 --mix benchmarks/loadMix.jsonl
+    python -m benchmarks.loadTest --mix benchmarks/loadMix.jsonl --concurrency 20
+
+Each JSONL line is either a synthetic step for a tenant session
+    {"tenant": "t1", "op": "create" | "login" | "get" | "update" | "delete"}
+or a recorded request replayed as-is
+    {"method": "GET", "path": "/org/get", "params": {...}, "json": {...}, "headers": {...}}
+Steps of one tenant run in order; tenants run concurrently.
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+from collections import defaultdict
+
+try:
+    import httpx
+    from mongomock_motor import AsyncMongoMockClient
+except ImportError as e:
+    raise SystemExit(f"Load test dependencies missing ({e.name}); pip install -r benchmarks/requirements.txt")
+
+from src.main import app
+from src.db import connection
+from src.db.indexes import ensureIndexes
+from src.services.migrationService import migrationService
+
+benchDir = Path(__file__).resolve().parent
+defaultMix = benchDir / "loadMix.jsonl"
+
+def synthesize(tenants: int, getsPerTenant: int) -> list:
+    """Build a mix covering create, login, get, rename and delete"""
+    steps = []
+    for index in range(tenants):
+        tenant = f"t{index}"
+        steps.append({"tenant": tenant, "op": "create"})
+        steps.append({"tenant": tenant, "op": "login"})
+        steps.extend({"tenant": tenant, "op": "get"} for _ in range(getsPerTenant))
+        steps.append({"tenant": tenant, "op": "update"})
+        # Tokens carry the organization name, so log in again after a rename
+        steps.append({"tenant": tenant, "op": "login"})
+        steps.append({"tenant": tenant, "op": "get"})
+        steps.append({"tenant": tenant, "op": "delete"})
+    return steps
+
+def loadMix(path: Path) -> list:
+    """Read JSONL steps, skipping blank lines"""
+    with open(path) as mixFile:
+        return [json.loads(line) for line in mixFile if line.strip()]
+
+def percentile(sortedValues: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sortedValues:
+        return 0.0
+    rank = max(0, min(len(sortedValues) - 1, int(round(fraction * len(sortedValues))) - 1))
+    return sortedValues[rank]
+
+class TenantSession:
+    """Tracks name, email and token of one synthetic tenant"""
+    
+    def __init__(self, tenant: str):
+        self.organizationName = f"Load Tenant {tenant}"
+        self.email = f"admin-{tenant}@loadtest.example.com"
+        self.password = f"password-{tenant}"
+        self.token = None
+        self.renamed = False
+    
+    def buildRequest(self, op: str) -> dict:
+        """Translate a synthetic step into an HTTP request"""
+        if op == "create":
+            return {"method": "POST", "path": "/org/create", "json": {
+                "organizationName": self.organizationName, "email": self.email, "password": self.password}}
+        if op == "login":
+            return {"method": "POST", "path": "/admin/login", "json": {
+                "email": self.email, "password": self.password}}
+        if op == "get":
+            return {"method": "GET", "path": "/org/get", "params": {"organizationName": self.organizationName}}
+        if op == "update":
+            return {"method": "PUT", "path": "/org/update", "headers": self.authHeaders(), "json": {
+                "organizationName": self.organizationName,
+                "newOrganizationName": f"{self.organizationName} Renamed",
+                "email": self.email,
+                "password": self.password}}
+        if op == "delete":
+            return {"method": "DELETE", "path": "/org/delete", "headers": self.authHeaders(),
+                    "params": {"organizationName": self.organizationName}}
+        raise ValueError(f"Unknown op: {op}")
+    
+    def authHeaders(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+    
+    def record(self, op: str, response):
+        """Carry state forward from a response"""
+        if op == "login" and response.status_code == 200:
+            self.token = response.json().get("token")
+        if op == "update" and response.status_code == 200:
+            self.organizationName = response.json().get("organizationName", self.organizationName)
+
+class LoadRunner:
+    """Replays a mix and collects per-endpoint latencies"""
+    
+    def __init__(self, client, waitForMigrations: bool):
+        self.client = client
+        self.waitForMigrations = waitForMigrations
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+    
+    async def send(self, label: str, request: dict):
+        startedAt = time.perf_counter()
+        response = await self.client.request(
+            request["method"],
+            request["path"],
+            params=request.get("params"),
+            json=request.get("json"),
+            headers=request.get("headers")
+        )
+        self.latencies[label].append(time.perf_counter() - startedAt)
+        if response.status_code >= 400:
+            self.errors[label] += 1
+        return response
+    
+    async def runSession(self, steps: list):
+        session = TenantSession(steps[0]["tenant"]) if "tenant" in steps[0] else None
+        for step in steps:
+            if session is None or "method" in step:
+                await self.send(f"{step['method']} {step['path']}", step)
+                continue
+            op = step["op"]
+            response = await self.send(op, session.buildRequest(op))
+            session.record(op, response)
+            if op == "update" and self.waitForMigrations and response.status_code == 200:
+                await self.awaitMigration(session, response.json().get("migrationId"))
+    
+    async def awaitMigration(self, session: TenantSession, migrationId: str):
+        """Poll a rename until it finishes so later steps see the new name"""
+        if not migrationId:
+            return
+        while True:
+            response = await self.send("migrationStatus", {
+                "method": "GET", "path": f"/org/migrations/{migrationId}", "headers": session.authHeaders()})
+            state = response.json().get("migration", {}).get("state") if response.status_code == 200 else "failed"
+            if state in ("completed", "failed"):
+                return
+            await asyncio.sleep(0.01)
+    
+    async def run(self, steps: list, concurrency: int) -> float:
+        """Run sessions with bounded concurrency, returning wall time"""
+        sessions = defaultdict(list)
+        for index, step in enumerate(steps):
+            sessions[step.get("tenant", f"recorded-{index}")].append(step)
+        
+        queue = asyncio.Queue()
+        for sessionSteps in sessions.values():
+            queue.put_nowait(sessionSteps)
+        
+        async def worker():
+            while not queue.empty():
+                await self.runSession(queue.get_nowait())
+        
+        startedAt = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        return time.perf_counter() - startedAt
+    
+    def report(self, wallTime: float) -> dict:
+        """p50/p95/p99 latency and throughput per endpoint"""
+        endpoints = {}
+        total = 0
+        for label, values in sorted(self.latencies.items()):
+            ordered = sorted(values)
+            total += len(ordered)
+            endpoints[label] = {
+                "requests": len(ordered),
+                "errors": self.errors[label],
+                "p50Ms": round(percentile(ordered, 0.50) * 1000, 2),
+                "p95Ms": round(percentile(ordered, 0.95) * 1000, 2),
+                "p99Ms": round(percentile(ordered, 0.99) * 1000, 2),
+                "throughput": round(len(ordered) / wallTime, 1) if wallTime else 0.0
+            }
+        return {
+            "wallSeconds": round(wallTime, 3),
+            "requests": total,
+            "throughput": round(total / wallTime, 1) if wallTime else 0.0,
+            "endpoints": endpoints
+        }
+
+async def startApp():
+    """Point the app at an in-memory database, mirroring startup"""
+    connection.client = AsyncMongoMockClient()
+    connection.database = connection.client[connection.databaseName]
+    await ensureIndexes(connection.database)
+    await migrationService.start()
+
+async def stopApp():
+    await migrationService.stop()
+    connection.client = None
+    connection.database = None
+
+async def runLoad(steps: list, concurrency: int, waitForMigrations: bool) -> dict:
+    await startApp()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            runner = LoadRunner(client, waitForMigrations)
+            wallTime = await runner.run(steps, concurrency)
+            return runner.report(wallTime)
+    finally:
+        await stopApp()
+
+def printReport(report: dict):
+    print(f"{'endpoint':28s} {'reqs':>6s} {'errs':>5s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'req/s':>8s}")
+    for label, stats in report["endpoints"].items():
+        print(f"{label:28s} {stats['requests']:6d} {stats['errors']:5d} {stats['p50Ms']:9.2f} "
+              f"{stats['p95Ms']:9.2f} {stats['p99Ms']:9.2f} {stats['throughput']:8.1f}")
+    print(f"Total {report['requests']} requests in {report['wallSeconds']} s ({report['throughput']} req/s)")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a request mix against the app in-process")
+    parser.add_argument("--mix", default=str(defaultMix), help="JSONL request mix")
+    parser.add_argument("--synthesize", type=int, default=0, help="write a synthetic mix for N tenants to --mix and exit")
+    parser.add_argument("--gets", type=int, default=5, help="gets per tenant in a synthetic mix")
+    parser.add_argument("--concurrency", type=int, default=10, help="tenant sessions in flight")
+    parser.add_argument("--no-wait-migrations", dest="waitForMigrations", action="store_false",
+                        help="don't poll rename migrations before the next step")
+    parser.add_argument("--output", default="", help="write the report JSON here")
+    args = parser.parse_args(argv)
+    
+    mixPath = Path(args.mix)
+    if args.synthesize:
+        steps = synthesize(args.synthesize, args.gets)
+        mixPath.write_text("".join(json.dumps(step) + "\n" for step in steps))
+        print(f"✓ Wrote {len(steps)} steps to {mixPath}")
+        return 0
+    
+    steps = loadMix(mixPath)
+    if not steps:
+        print(f"⚠ {mixPath} is empty, use --synthesize to create a mix")
+        return 1
+    
+    report = asyncio.run(runLoad(steps, args.concurrency, args.waitForMigrations))
+    printReport(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
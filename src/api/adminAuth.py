@@ -0,0 +1,18 @@
+import os
+import hmac
+from typing import Optional
+from fastapi import Header, HTTPException
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Shared key for operator-only endpoints; unset disables them
+adminApiKey = os.getenv("ADMIN_API_KEY", "")
+
+async def verifyAdminKey(xAdminKey: Optional[str] = Header(None, alias="X-Admin-Key")):
+    """Verify the operator API key for admin-only routes"""
+    if not adminApiKey:
+        raise HTTPException(status_code=403, detail="Admin API is disabled, set ADMIN_API_KEY")
+    if not xAdminKey or not hmac.compare_digest(xAdminKey, adminApiKey):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+    return True
@@ -1,4 +1,7 @@
-from fastapi import APIRouter, HTTPException
+import os
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import PlainTextResponse
+from src.api.adminAuth import verifyAdminKey
 from src.controllers.adminController import AdminController, LoginRequest
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -11,3 +14,34 @@ async def login(request: LoginRequest):
     if not result.get("success"):
         raise HTTPException(status_code=401, detail=result.get("error"))
     return result
+
+@router.get("/stats", dependencies=[Depends(verifyAdminKey)])
+async def stats():
+    """Runtime stats for capacity sizing"""
+    return await adminController.getStats()
+
+@router.get("/slow-ops", dependencies=[Depends(verifyAdminKey)])
+async def slowOps(limit: int = 50):
+    """Recent MongoDB commands over the slow threshold"""
+    return await adminController.getSlowOps(limit)
+
+@router.get("/profile", dependencies=[Depends(verifyAdminKey)])
+async def profile(seconds: float = 10):
+    """Sample this worker's stacks for a while, in collapsed flamegraph format"""
+    result = await adminController.getProfile(seconds)
+    if not result.get("success"):
+        raise HTTPException(status_code=400, detail=result.get("error"))
+    return PlainTextResponse(
+        result["collapsed"],
+        headers={"X-Profile-Samples": str(result["samples"]), "X-Profile-Worker": str(os.getpid())}
+    )
+
+@router.get("/profile/requests", dependencies=[Depends(verifyAdminKey)])
+async def requestProfiles(limit: int = 20):
+    """Recent per-request profiles of this worker"""
+    return await adminController.getRequestProfiles(limit)
+
+@router.get("/profile/loop", dependencies=[Depends(verifyAdminKey)])
+async def loopBlocks(limit: int = 50):
+    """Event loop lag and recent stalls of this worker"""
+    return await adminController.getLoopBlocks(limit)
@@ -1,12 +1,20 @@
-from fastapi import APIRouter, Header, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import Optional
 from src.controllers.orgController import (
     OrgController,
     CreateOrgRequest,
+    BulkCreateOrgRequest,
     UpdateOrgRequest,
-    DeleteOrgRequest
+    DeleteOrgRequest,
+    RestoreOrgRequest,
+    RebalanceOrgRequest,
+    ConvertStorageRequest
 )
 from src.controllers.adminController import AdminController
+from src.api.adminAuth import verifyAdminKey
+from src.utils.httpCache import makeEtag, httpDate, isNotModified, orgGetCacheControl
+from src.utils.jsonResponse import BsonJSONResponse
 
 router = APIRouter(prefix="/org", tags=["Organization"])
 orgController = OrgController()
@@ -31,13 +39,52 @@ async def createOrg(request: CreateOrgRequest):
         raise HTTPException(status_code=400, detail=result.get("error"))
     return result
 
+@router.post("/bulk-create", dependencies=[Depends(verifyAdminKey)])
+async def bulkCreateOrg(request: BulkCreateOrgRequest):
+    """Create many organizations, one result per item"""
+    result = await orgController.bulkCreateOrg(request)
+    if not result.get("success"):
+        raise HTTPException(status_code=400, detail=result.get("error"))
+    return result
+
 @router.get("/get")
-async def getOrg(organizationName: str):
-    """Get organization details"""
+async def getOrg(
+    organizationName: str,
+    ifNoneMatch: Optional[str] = Header(None, alias="If-None-Match"),
+    ifModifiedSince: Optional[str] = Header(None, alias="If-Modified-Since")
+):
+    """Get organization details, answering conditional requests with 304"""
     result = await orgController.getOrg(organizationName)
     if not result.get("success"):
         raise HTTPException(status_code=404, detail=result.get("error"))
-    return result
+    
+    # Documents keep their ObjectId/datetime values and go straight to orjson
+    org = result["organization"]
+    lastModified = org.get("updatedAt") or org.get("createdAt")
+    if lastModified is None:
+        return BsonJSONResponse(result)
+    
+    etag = makeEtag(org["_id"], lastModified)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": httpDate(lastModified),
+        "Cache-Control": orgGetCacheControl
+    }
+    if isNotModified(ifNoneMatch, ifModifiedSince, etag, lastModified):
+        return Response(status_code=304, headers=headers)
+    
+    return BsonJSONResponse(result, headers=headers)
+
+@router.get("/list", dependencies=[Depends(verifyAdminKey)])
+async def listOrgs(sort: str = "id", after: Optional[str] = None, limit: int = 100, format: str = "json"):
+    """List organizations with keyset pagination (admin key required)"""
+    stream = format == "ndjson"
+    result = await orgController.listOrgs(sort, after, limit if not stream else 0, stream)
+    if not result.get("success"):
+        raise HTTPException(status_code=400, detail=result.get("error"))
+    if stream:
+        return StreamingResponse(result["stream"], media_type="application/x-ndjson")
+    return BsonJSONResponse(result)
 
 @router.put("/update")
 async def updateOrg(request: UpdateOrgRequest, authorization: Optional[str] = Header(None)):
@@ -68,3 +115,97 @@ async def deleteOrg(organizationName: str, authorization: Optional[str] = Header
     if not result.get("success"):
         raise HTTPException(status_code=400, detail=result.get("error"))
     return result
+
+@router.post("/documents")
+async def insertDocuments(request: Request, authorization: Optional[str] = Header(None)):
+    """Insert a document, a JSON array or NDJSON lines into the caller's collection (protected route)"""
+    # Verify authentication; the collection comes from the token
+    auth = await verifyAuth(authorization)
+    
+    body = await request.body()
+    result = await orgController.insertDocuments(
+        auth["organizationName"],
+        body,
+        request.headers.get("content-type", "application/json")
+    )
+    if not result.get("success"):
+        raise HTTPException(status_code=400, detail=result.get("error"))
+    return BsonJSONResponse(result)
+
+@router.get("/export")
+async def exportDocuments(
+    format: str = "ndjson",
+    filter: Optional[str] = None,
+    projection: Optional[str] = None,
+    gzip: bool = False,
+    authorization: Optional[str] = Header(None)
+):
+    """Stream the caller's collection as NDJSON or concatenated BSON (protected route)"""
+    # Verify authentication; the collection comes from the token
+    auth = await verifyAuth(authorization)
+    
+    result = await orgController.exportDocuments(auth["organizationName"], format, filter, projection, gzip)
+    if not result.get("success"):
+        raise HTTPException(status_code=400, detail=result.get("error"))
+    
+    mediaType = "application/x-ndjson" if format == "ndjson" else "application/bson"
+    headers = {"Content-Disposition": f'attachment; filename="export.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(result["stream"], media_type=mediaType, headers=headers)
+
+@router.post("/restore", dependencies=[Depends(verifyAdminKey)])
+async def restoreOrg(request: RestoreOrgRequest):
+    """Undo a delete within its grace period (admin key required)"""
+    result = await orgController.restoreOrg(request)
+    if not result.get("success"):
+        raise HTTPException(status_code=400, detail=result.get("error"))
+    return result
+
+@router.get("/pending-drops", dependencies=[Depends(verifyAdminKey)])
+async def getPendingDrops(limit: int = 100):
+    """Collections waiting for the reaper (admin key required)"""
+    result = await orgController.getPendingDrops(limit)
+    if not result.get("success"):
+        raise HTTPException(status_code=400, detail=result.get("error"))
+    return result
+
+@router.post("/rebalance", dependencies=[Depends(verifyAdminKey)])
+async def rebalanceOrg(request: RebalanceOrgRequest):
+    """Move an organization's collection to another shard (admin key required)"""
+    result = await orgController.rebalanceOrg(request)
+    if not result.get("success"):
+        raise HTTPException(status_code=400, detail=result.get("error"))
+    return result
+
+@router.post("/storage", dependencies=[Depends(verifyAdminKey)])
+async def convertStorage(request: ConvertStorageRequest):
+    """Move an organization between collection and shared storage (admin key required)"""
+    result = await orgController.convertStorage(request)
+    if not result.get("success"):
+        raise HTTPException(status_code=400, detail=result.get("error"))
+    return result
+
+@router.get("/shards", dependencies=[Depends(verifyAdminKey)])
+async def getShards():
+    """Configured shards with tenant counts (admin key required)"""
+    result = await orgController.getShards()
+    if not result.get("success"):
+        raise HTTPException(status_code=400, detail=result.get("error"))
+    return result
+
+@router.get("/migrations/{migrationId}")
+async def getMigration(migrationId: str, authorization: Optional[str] = Header(None)):
+    """Get rename migration progress (protected route)"""
+    # Verify authentication
+    auth = await verifyAuth(authorization)
+    
+    result = await orgController.getMigration(migrationId)
+    if not result.get("success"):
+        raise HTTPException(status_code=404, detail=result.get("error"))
+    
+    # Check if user owns the migrating organization
+    migration = result["migration"]
+    if auth["organizationName"] not in (migration["organizationName"], migration["newOrganizationName"]):
+        raise HTTPException(status_code=403, detail="Not authorized to view this migration")
+    return result
@@ -1,5 +1,10 @@
 from pydantic import BaseModel, EmailStr
 from src.services.adminService import AdminService
+from src.utils.errors import unavailableErrors
+from src.utils.tokenService import tokenVerifier
+from src.utils.metricsService import metricsRegistry
+from src.db.commandMonitor import commandMonitor
+from src.utils.profiler import stackSampler, loopMonitor
 
 class LoginRequest(BaseModel):
     email: EmailStr
@@ -19,6 +24,8 @@ class AdminController:
                 request.password
             )
             return result
+        except unavailableErrors:
+            raise
         except Exception as e:
             return {
                 "success": False,
@@ -28,13 +35,57 @@ class AdminController:
     async def verifyToken(self, authHeader: str):
         """Verify JWT token from header"""
         try:
-            from src.utils.tokenService import TokenService
-            tokenService = TokenService()
-            token = tokenService.extractToken(authHeader)
+            token = tokenVerifier.tokenService.extractToken(authHeader)
             result = await self.adminService.verifyAdmin(token)
             return result
+        except unavailableErrors:
+            raise
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e)
             }
+    
+    async def getStats(self):
+        """Collect runtime stats for capacity sizing"""
+        return {
+            "success": True,
+            **metricsRegistry.collectStats()
+        }
+    
+    async def getSlowOps(self, limit: int):
+        """List recent slow MongoDB commands"""
+        return {
+            "success": True,
+            "slowOps": commandMonitor.getSlowOps(limit)
+        }
+    
+    async def getProfile(self, seconds: float):
+        """Sample this worker for a while"""
+        try:
+            collapsed, samples = await stackSampler.profile(seconds)
+            return {
+                "success": True,
+                "collapsed": collapsed,
+                "samples": samples
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    async def getRequestProfiles(self, limit: int):
+        """List recent per-request profiles"""
+        return {
+            "success": True,
+            "profiles": stackSampler.getRequests(limit)
+        }
+    
+    async def getLoopBlocks(self, limit: int):
+        """List recent event loop stalls"""
+        return {
+            "success": True,
+            **loopMonitor.getStats(),
+            "blockedCallbacks": loopMonitor.getBlocks(limit)
+        }
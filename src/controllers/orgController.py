@@ -1,10 +1,16 @@
-from pydantic import BaseModel, EmailStr
+import orjson
+from bson import json_util
+from typing import List, Optional
+from pydantic import BaseModel, EmailStr, TypeAdapter, ValidationError
 from src.services.orgService import OrgService
+from src.services.ingestService import ingestService
+from src.utils.errors import unavailableErrors
 
 class CreateOrgRequest(BaseModel):
     organizationName: str
     email: EmailStr
     password: str
+    storage: Optional[str] = None
 
 class GetOrgRequest(BaseModel):
     organizationName: str
@@ -18,6 +24,39 @@ class UpdateOrgRequest(BaseModel):
 class DeleteOrgRequest(BaseModel):
     organizationName: str
 
+class RestoreOrgRequest(BaseModel):
+    organizationName: str
+
+class ConvertStorageRequest(BaseModel):
+    organizationName: str
+    storage: str
+
+class RebalanceOrgRequest(BaseModel):
+    organizationName: str
+    targetShard: str
+
+class BulkOrgItem(BaseModel):
+    organizationName: str
+    email: str
+    password: str
+
+class BulkCreateOrgRequest(BaseModel):
+    organizations: List[BulkOrgItem]
+
+emailAdapter = TypeAdapter(EmailStr)
+
+ndjsonTypes = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+
+def parseDocuments(body: bytes, contentType: str) -> list:
+    """Documents from a JSON object, a JSON array or an NDJSON body"""
+    try:
+        if contentType.split(";")[0].strip().lower() in ndjsonTypes:
+            return [orjson.loads(line) for line in body.splitlines() if line.strip()]
+        data = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise Exception(f"Invalid JSON: {str(e)}")
+    return data if isinstance(data, list) else [data]
+
 class OrgController:
     """Controller for organization endpoints"""
     
@@ -30,9 +69,33 @@ class OrgController:
             result = await self.orgService.createOrganization(
                 request.organizationName,
                 request.email,
-                request.password
+                request.password,
+                request.storage
             )
             return result
+        except unavailableErrors:
+            raise
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    async def bulkCreateOrg(self, request: BulkCreateOrgRequest):
+        """Handle bulk create request, validating emails per item"""
+        try:
+            items = []
+            for org in request.organizations:
+                item = org.model_dump()
+                try:
+                    item["email"] = emailAdapter.validate_python(org.email)
+                except ValidationError:
+                    item["error"] = "Invalid email address"
+                items.append(item)
+            result = await self.orgService.bulkCreateOrganizations(items)
+            return result
+        except unavailableErrors:
+            raise
         except Exception as e:
             return {
                 "success": False,
@@ -44,6 +107,27 @@ class OrgController:
         try:
             result = await self.orgService.getOrganization(organizationName)
             return result
+        except unavailableErrors:
+            raise
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    async def listOrgs(self, sort: str, after: str, limit: int, stream: bool):
+        """Handle list organizations request"""
+        try:
+            if stream:
+                lines = await self.orgService.streamOrganizations(sort, after, limit)
+                return {
+                    "success": True,
+                    "stream": lines
+                }
+            result = await self.orgService.listOrganizations(sort, after, limit)
+            return result
+        except unavailableErrors:
+            raise
         except Exception as e:
             return {
                 "success": False,
@@ -60,6 +144,8 @@ class OrgController:
                 request.password
             )
             return result
+        except unavailableErrors:
+            raise
         except Exception as e:
             return {
                 "success": False,
@@ -71,6 +157,130 @@ class OrgController:
         try:
             result = await self.orgService.deleteOrganization(organizationName)
             return result
+        except unavailableErrors:
+            raise
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    async def rebalanceOrg(self, request: RebalanceOrgRequest):
+        """Handle rebalance organization request"""
+        try:
+            result = await self.orgService.rebalanceOrganization(
+                request.organizationName,
+                request.targetShard
+            )
+            return result
+        except unavailableErrors:
+            raise
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    async def convertStorage(self, request: ConvertStorageRequest):
+        """Handle storage conversion request"""
+        try:
+            result = await self.orgService.convertStorage(
+                request.organizationName,
+                request.storage
+            )
+            return result
+        except unavailableErrors:
+            raise
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    async def getShards(self):
+        """Handle shard listing request"""
+        try:
+            result = await self.orgService.getShards()
+            return result
+        except unavailableErrors:
+            raise
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    async def insertDocuments(self, organizationName: str, body: bytes, contentType: str):
+        """Handle tenant document ingest request"""
+        try:
+            documents = parseDocuments(body, contentType)
+            result = await ingestService.insertDocuments(organizationName, documents)
+            return result
+        except unavailableErrors:
+            raise
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    async def exportDocuments(self, organizationName: str, format: str, filter: str,
+                              projection: str, gzip: bool):
+        """Handle tenant collection export request"""
+        try:
+            try:
+                query = json_util.loads(filter) if filter else None
+                fields = json_util.loads(projection) if projection else None
+            except ValueError as e:
+                raise Exception(f"Invalid filter or projection: {str(e)}")
+            if not isinstance(query or {}, dict) or not isinstance(fields or {}, dict):
+                raise Exception("filter and projection must be JSON objects")
+            stream = await self.orgService.exportDocuments(organizationName, format, query, fields, gzip)
+            return {
+                "success": True,
+                "stream": stream
+            }
+        except unavailableErrors:
+            raise
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    async def restoreOrg(self, request: RestoreOrgRequest):
+        """Handle restore organization request"""
+        try:
+            result = await self.orgService.restoreOrganization(request.organizationName)
+            return result
+        except unavailableErrors:
+            raise
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    async def getPendingDrops(self, limit: int):
+        """Handle pending drops request"""
+        try:
+            result = await self.orgService.getPendingDrops(limit)
+            return result
+        except unavailableErrors:
+            raise
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    async def getMigration(self, migrationId: str):
+        """Handle migration status request"""
+        try:
+            result = await self.orgService.getMigration(migrationId)
+            return result
+        except unavailableErrors:
+            raise
         except Exception as e:
             return {
                 "success": False,
@@ -0,0 +1,144 @@
+import os
+import math
+import time
+import threading
+from pymongo import monitoring
+from dotenv import load_dotenv
+from src.utils.errors import ServiceUnavailableError
+from src.utils.metricsService import metricsRegistry
+
+load_dotenv()
+
+# Breaker settings
+breakerFailureThreshold = int(os.getenv("DB_BREAKER_FAILURES", "5"))
+breakerResetSeconds = float(os.getenv("DB_BREAKER_RESET_SECONDS", "10"))
+
+class CircuitBreaker(monitoring.TopologyListener, monitoring.CommandListener):
+    """Fails database work fast while MongoDB is unreachable"""
+    
+    # pymongo's topology monitor keeps probing in the background: the breaker
+    # trips when the last writable server disappears and closes once one is back
+    
+    def __init__(self, failureThreshold: int, resetSeconds: float):
+        # Events arrive on pymongo's threads
+        self.lock = threading.Lock()
+        self.failureThreshold = failureThreshold
+        self.resetSeconds = resetSeconds
+        self.state = "closed"
+        self.failures = 0
+        self.openedAt = 0.0
+        # When the single half-open trial call was let through
+        self.trialStartedAt = 0.0
+        self.serverAvailable = None
+        self.trips = 0
+        self.rejected = 0
+        self.lastError = None
+    
+    def check(self):
+        """Raise 503 instead of letting a request wait out server selection"""
+        with self.lock:
+            if self.state == "closed":
+                return
+            now = time.monotonic()
+            if self.state == "half-open":
+                # One trial at a time; another goes through if the last one never reported back
+                if now - self.trialStartedAt < self.resetSeconds:
+                    self.rejected += 1
+                    raise ServiceUnavailableError("Database unavailable, please retry shortly")
+                self.trialStartedAt = now
+                return
+            remaining = self.resetSeconds - (now - self.openedAt)
+            if remaining <= 0 and self.serverAvailable is False:
+                # The monitor still sees no server; stay open for another period
+                self.openedAt = time.monotonic()
+                remaining = self.resetSeconds
+            if remaining > 0:
+                self.rejected += 1
+                raise ServiceUnavailableError("Database unavailable, please retry shortly", max(1, math.ceil(remaining)))
+            # Let one call through; its success closes the breaker, its failure reopens it
+            self.state = "half-open"
+            self.trialStartedAt = now
+    
+    def recordSuccess(self):
+        """Close the breaker after a successful call"""
+        with self.lock:
+            self.failures = 0
+            if self.state != "closed":
+                self.state = "closed"
+                print("✓ MongoDB reachable again, circuit breaker closed")
+    
+    def recordFailure(self, error=None):
+        """Count a failure, opening the breaker past the threshold"""
+        with self.lock:
+            self.failures += 1
+            self.lastError = str(error) if error is not None else self.lastError
+            if self.state == "half-open" or self.failures >= self.failureThreshold:
+                self.open()
+    
+    def trip(self, error=None):
+        """Open the breaker immediately"""
+        with self.lock:
+            self.lastError = str(error) if error is not None else self.lastError
+            self.open()
+    
+    def open(self):
+        """Enter the open state; caller holds the lock"""
+        if self.state != "open":
+            self.trips += 1
+            print(f"✗ MongoDB unavailable, circuit breaker open: {self.lastError}")
+        self.state = "open"
+        self.openedAt = time.monotonic()
+    
+    def opened(self, event):
+        pass
+    
+    def description_changed(self, event):
+        available = event.new_description.has_writable_server()
+        wasAvailable = event.previous_description.has_writable_server()
+        with self.lock:
+            self.serverAvailable = available
+        if available:
+            self.recordSuccess()
+            return
+        # A failed heartbeat on a client that never connected also counts
+        errors = [server.error for server in event.new_description.server_descriptions().values() if server.error]
+        if wasAvailable or errors:
+            self.trip(errors[0] if errors else "no writable MongoDB server")
+    
+    def closed(self, event):
+        pass
+    
+    def started(self, event):
+        pass
+    
+    def succeeded(self, event):
+        if self.state != "closed":
+            self.recordSuccess()
+    
+    def failed(self, event):
+        # Client-side exceptions carry errtype; server errors such as duplicate keys do not
+        if "errtype" in event.failure:
+            self.recordFailure(event.failure.get("errmsg"))
+    
+    def isOpen(self) -> bool:
+        """Whether requests are currently being rejected"""
+        with self.lock:
+            return self.state == "open"
+    
+    def getStats(self) -> dict:
+        """Return breaker state"""
+        with self.lock:
+            return {
+                "state": self.state,
+                "open": self.state == "open",
+                "failures": self.failures,
+                "failureThreshold": self.failureThreshold,
+                "serverAvailable": self.serverAvailable,
+                "trips": self.trips,
+                "rejected": self.rejected,
+                "lastError": self.lastError
+            }
+
+# Global breaker for the master database client
+dbBreaker = CircuitBreaker(breakerFailureThreshold, breakerResetSeconds)
+metricsRegistry.registerStats("mongoBreaker", dbBreaker.getStats)
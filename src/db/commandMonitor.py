@@ -0,0 +1,117 @@
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from pymongo import monitoring
+from dotenv import load_dotenv
+from src.db.indexes import sharedCollectionName
+from src.utils.metricsService import Histogram, metricsRegistry
+
+load_dotenv()
+
+# Command monitoring settings
+slowCommandMs = float(os.getenv("MONGO_SLOW_COMMAND_MS", "100"))
+slowLogSize = int(os.getenv("MONGO_SLOW_LOG_SIZE", "200"))
+metricsByCollection = os.getenv("MONGO_METRICS_BY_COLLECTION", "true").lower() == "true"
+
+# Commands worth timing; handshakes and heartbeats are skipped
+monitoredCommands = {
+    "find", "getMore", "insert", "update", "delete", "findAndModify",
+    "aggregate", "count", "distinct", "drop", "listCollections",
+    "createIndexes", "listIndexes", "dropIndexes", "renameCollection"
+}
+
+# Collections labelled by name even when per-collection metrics are off: the master schema and the shared tenant collection
+masterCollections = {"organizations", "migrations", "tombstones", "cacheGenerations", sharedCollectionName}
+
+class CommandMonitor(monitoring.CommandListener):
+    """Per-command latency histograms and a slow-operation log"""
+    
+    def __init__(self):
+        # Events arrive on pymongo's threads
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.histogram = Histogram(
+            "mongo_command_duration_seconds",
+            "MongoDB command latency by command and collection",
+            ("command", "collection")
+        )
+        self.slowLog = deque(maxlen=slowLogSize)
+        self.slowCount = 0
+        self.failedCount = 0
+    
+    @staticmethod
+    def collectionFor(commandName: str, command: dict) -> str:
+        """Collection a command targets, or '-' for database-level commands"""
+        # getMore carries the cursor id; its collection is a separate field
+        target = command.get("collection" if commandName == "getMore" else commandName)
+        if not isinstance(target, str):
+            return "-"
+        if commandName == "renameCollection":
+            # Admin command carries "db.collection"
+            return target.split(".", 1)[-1]
+        return target
+    
+    def started(self, event):
+        if event.command_name not in monitoredCommands:
+            return
+        collection = self.collectionFor(event.command_name, event.command)
+        with self.lock:
+            self.pending[(event.request_id, event.connection_id)] = (collection, event.database_name)
+    
+    def succeeded(self, event):
+        self.finish(event, failed=False)
+    
+    def failed(self, event):
+        self.finish(event, failed=True)
+    
+    def finish(self, event, failed: bool):
+        """Record a completed command"""
+        with self.lock:
+            context = self.pending.pop((event.request_id, event.connection_id), None)
+        if context is None:
+            return
+        
+        collection, databaseName = context
+        seconds = event.duration_micros / 1_000_000
+        label = collection
+        if not metricsByCollection and collection not in masterCollections and collection != "-":
+            label = "tenant"
+        
+        with self.lock:
+            self.histogram.observe((event.command_name, label), seconds)
+            if failed:
+                self.failedCount += 1
+        
+        if seconds * 1000 >= slowCommandMs:
+            entry = {
+                "at": datetime.utcnow().isoformat(),
+                "command": event.command_name,
+                "database": databaseName,
+                "collection": collection,
+                "durationMs": round(seconds * 1000, 2),
+                "failed": failed
+            }
+            with self.lock:
+                self.slowLog.append(entry)
+                self.slowCount += 1
+            print(f"⚠ Slow MongoDB {event.command_name} on {databaseName}.{collection}: {entry['durationMs']} ms")
+    
+    def getSlowOps(self, limit: int = 50) -> list:
+        """Most recent slow commands, newest first"""
+        with self.lock:
+            entries = list(self.slowLog)
+        return entries[::-1][:limit]
+    
+    def getStats(self) -> dict:
+        """Return slow and failed command counters"""
+        return {
+            "slowCommands": self.slowCount,
+            "failedCommands": self.failedCount,
+            "slowThresholdMs": slowCommandMs
+        }
+
+# Global monitor instance
+commandMonitor = CommandMonitor()
+metricsRegistry.addHistogram(commandMonitor.histogram)
+metricsRegistry.registerStats("mongoCommands", commandMonitor.getStats)
@@ -1,6 +1,14 @@
 import os
+import time
+import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
+from src.db.indexes import ensureIndexes, tenantIndexSpecs
+from src.db.poolMonitor import poolMonitor
+from src.db.commandMonitor import commandMonitor
+from src.db.circuitBreaker import dbBreaker
+from src.utils.errors import ServiceUnavailableError
+from src.utils.metricsService import metricsRegistry
 
 load_dotenv()
 
@@ -8,31 +16,137 @@ load_dotenv()
 mongoUrl = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 databaseName = os.getenv("DATABASE_NAME", "organizationMaster")
 
-# Global client instance
+# Connection pool settings
+maxPoolSize = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+minPoolSize = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+maxIdleTimeMs = os.getenv("MONGO_MAX_IDLE_TIME_MS")
+waitQueueTimeoutMs = os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS")
+serverSelectionTimeoutMs = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+compressors = os.getenv("MONGO_COMPRESSORS", "")
+readPreference = os.getenv("MONGO_READ_PREFERENCE", "primary")
+warmupConnections = int(os.getenv("MONGO_WARMUP_CONNECTIONS", str(minPoolSize)))
+
+# Global client instance, owned by the process that created it
 client = None
 database = None
+clientPid = None
+
+# Whether the master indexes were reconciled on the current client
+indexesReady = False
+indexTask = None
+nextIndexAttempt = 0.0
+
+def clientOptions() -> dict:
+    """Build Motor client options from the environment"""
+    options = {
+        "serverSelectionTimeoutMS": serverSelectionTimeoutMs,
+        "maxPoolSize": maxPoolSize,
+        "minPoolSize": minPoolSize,
+        "readPreference": readPreference,
+        "event_listeners": [poolMonitor, commandMonitor]
+    }
+    if maxIdleTimeMs:
+        options["maxIdleTimeMS"] = int(maxIdleTimeMs)
+    if waitQueueTimeoutMs:
+        options["waitQueueTimeoutMS"] = int(waitQueueTimeoutMs)
+    if compressors:
+        # Compressors whose libraries are missing are skipped by pymongo
+        options["compressors"] = compressors
+    return options
+
+async def warmPool(count: int):
+    """Open connections up front so early requests skip connection setup"""
+    if count <= 0:
+        return
+    await asyncio.gather(*[client.admin.command('ping') for _ in range(count)])
+    print(f"✓ Warmed MongoDB pool with {count} connections")
+
+def createClient():
+    """Create the master client; connects lazily on first command"""
+    global client, database, clientPid
+    options = clientOptions()
+    # Only the master client feeds the breaker; shard clients have their own servers
+    options["event_listeners"] = options["event_listeners"] + [dbBreaker]
+    client = AsyncIOMotorClient(mongoUrl, **options)
+    database = client[databaseName]
+    clientPid = os.getpid()
 
 async def connectDb():
     """Connect to MongoDB database"""
-    global client, database
     try:
-        client = AsyncIOMotorClient(mongoUrl, serverSelectionTimeoutMS=5000)
-        database = client[databaseName]
+        if database is None:
+            createClient()
         # Test connection
         await client.admin.command('ping')
         print(f"✓ Connected to MongoDB: {databaseName}")
-        return database
+        await warmPool(min(warmupConnections, maxPoolSize))
     except Exception as e:
+        dbBreaker.trip(e)
         print(f"✗ Failed to connect to MongoDB: {str(e)}")
         raise
+    # A unique index that can't be built fails startup without opening the breaker
+    await buildIndexes()
+    return database
+
+async def buildIndexes():
+    """Reconcile master and shared-collection indexes on the current client"""
+    global indexesReady
+    await ensureIndexes(database)
+    await ensureIndexes(database, tenantIndexSpecs)
+    indexesReady = True
+
+async def buildIndexesLazily():
+    """Build indexes once a lazily created client reaches MongoDB"""
+    try:
+        await buildIndexes()
+    except Exception as e:
+        print(f"⚠ Could not build indexes after reconnecting: {str(e)}")
+
+def scheduleIndexes():
+    """Start building indexes in the background unless a build is running or failed recently"""
+    global indexTask, nextIndexAttempt
+    if indexesReady or (indexTask is not None and not indexTask.done()) or time.monotonic() < nextIndexAttempt:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    nextIndexAttempt = time.monotonic() + dbBreaker.resetSeconds
+    indexTask = loop.create_task(buildIndexesLazily())
 
 async def closeDb():
     """Close MongoDB connection"""
-    global client
+    global client, database, indexesReady
     if client:
         client.close()
+        client = None
+        database = None
+        indexesReady = False
         print("✓ MongoDB connection closed")
 
 def getDb():
-    """Get database instance"""
+    """Get database instance, rejecting fast while the breaker is open"""
+    if clientPid is not None and clientPid != os.getpid():
+        # Motor clients are not fork-safe; each worker connects in its lifespan
+        raise Exception("MongoDB client was created in another process, call connectDb() in this worker")
+    dbBreaker.check()
+    if database is None:
+        # Startup could not connect; the client reconnects on its own once created
+        try:
+            createClient()
+        except Exception as e:
+            dbBreaker.recordFailure(e)
+            raise ServiceUnavailableError("Database unavailable, please retry shortly")
+    if not indexesReady:
+        # Startup never got this far; its first command doubles as the connection check
+        scheduleIndexes()
     return database
+
+def getPoolStats() -> dict:
+    """Get connection pool usage"""
+    stats = poolMonitor.getStats()
+    stats["maxPoolSize"] = maxPoolSize
+    stats["minPoolSize"] = minPoolSize
+    return stats
+
+metricsRegistry.registerStats("mongoPool", getPoolStats)
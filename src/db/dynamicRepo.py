@@ -1,46 +1,259 @@
-from src.db.connection import getDb
+import os
+import time
+import asyncio
+from dotenv import load_dotenv
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from pymongo.errors import BulkWriteError, OperationFailure
+from src.db.shardRouter import shardRouter, defaultShard
+from src.utils.metricsService import timed
+
+load_dotenv()
+
+# Collection migration settings
+copyMode = os.getenv("COPY_MODE", "auto")
+copyBatchSize = int(os.getenv("COPY_BATCH_SIZE", "1000"))
+copyMaxInFlight = int(os.getenv("COPY_MAX_IN_FLIGHT", "4"))
+
+# MongoDB error codes
+namespaceNotFound = 26
+duplicateKey = 11000
 
 class DynamicRepo:
     """Repository for dynamic organization collections"""
     
-    async def createCollection(self, collectionName: str):
+    @timed("DynamicRepo.createCollection")
+    async def createCollection(self, collectionName: str, shard: str = None):
         """Create a new dynamic collection"""
-        db = getDb()
+        db = shardRouter.getDb(shard)
         # MongoDB creates collections automatically on first insert
         # We'll just verify it exists by creating an empty structure
         collection = db[collectionName]
         return collection
     
-    async def getCollection(self, collectionName: str):
+    @timed("DynamicRepo.getCollection")
+    async def getCollection(self, collectionName: str, shard: str = None):
         """Get reference to dynamic collection"""
-        db = getDb()
+        db = shardRouter.getDb(shard)
         return db[collectionName]
     
-    async def copyData(self, sourceCollection: str, targetCollection: str):
-        """Copy all data from source to target collection"""
-        db = getDb()
-        source = db[sourceCollection]
-        target = db[targetCollection]
+    def exportCursor(self, collectionName: str, query: dict = None, projection: dict = None,
+                     batchSize: int = 1000, shard: str = None, stages: list = None, raw: bool = True):
+        """Cursor of undecoded documents for streaming a collection out"""
+        db = shardRouter.getDb(shard)
+        collection = db[collectionName]
+        if raw:
+            collection = collection.with_options(codec_options=CodecOptions(document_class=RawBSONDocument))
+        if not stages:
+            return collection.find(query or {}, projection or None, batch_size=batchSize)
+        # Stages reshape stored documents, so the projection has to come after them
+        pipeline = [{"$match": query or {}}, *stages]
+        if projection:
+            pipeline.append({"$project": projection})
+        return collection.aggregate(pipeline, batchSize=batchSize)
+    
+    @timed("DynamicRepo.copyData")
+    async def copyData(self, sourceCollection: str, targetCollection: str, mode: str = None,
+                       sourceShard: str = None, targetShard: str = None):
+        """Copy all data from source to target collection, keeping _id values"""
+        mode = mode or copyMode
+        startedAt = time.perf_counter()
+        sameShard = (sourceShard or defaultShard) == (targetShard or defaultShard)
         
-        # Get all documents from source
-        documents = await source.find().to_list(length=None)
+        result = None
+        if mode in ("auto", "server") and sameShard:
+            try:
+                result = await self.mergeCopy(sourceCollection, targetCollection, sourceShard)
+            except OperationFailure as e:
+                if mode == "server":
+                    raise
+                print(f"⚠ Server-side copy unavailable, streaming instead: {str(e)}")
+        if result is None:
+            result = await self.streamCopy(
+                sourceCollection,
+                targetCollection,
+                sourceShard=sourceShard,
+                targetShard=targetShard
+            )
         
-        if documents:
-            # Remove _id to let MongoDB generate new ones
-            for doc in documents:
-                doc.pop("_id", None)
-            await target.insert_many(documents)
+        return self.copyReport(result, startedAt)
+    
+    @timed("DynamicRepo.moveCollection")
+    async def moveCollection(self, sourceCollection: str, targetCollection: str, shard: str = None):
+        """Move a collection within a shard, renaming on the server when possible"""
+        startedAt = time.perf_counter()
         
-        return len(documents)
+        documents = await self.renameCollection(sourceCollection, targetCollection, shard)
+        if documents is not None:
+            return self.copyReport({"method": "rename", "documents": documents}, startedAt)
+        
+        report = await self.copyData(sourceCollection, targetCollection, sourceShard=shard, targetShard=shard)
+        await self.dropCollection(sourceCollection, shard)
+        return report
+    
+    @timed("DynamicRepo.renameCollection")
+    async def renameCollection(self, sourceCollection: str, targetCollection: str, shard: str = None):
+        """Rename on the server, returning the documents moved or None if unavailable"""
+        if copyMode == "stream":
+            return None
+        db = shardRouter.getDb(shard)
+        try:
+            documents = await db[sourceCollection].estimated_document_count()
+            await db[sourceCollection].rename(targetCollection)
+            return documents
+        except OperationFailure as e:
+            if e.code == namespaceNotFound:
+                return 0
+            print(f"⚠ Rename unavailable, copying instead: {str(e)}")
+            return None
+    
+    @timed("DynamicRepo.renameOnServer")
+    async def renameOnServer(self, sourceCollection: str, targetCollection: str, shard: str = None) -> bool:
+        """Rename regardless of COPY_MODE, returning False if the source doesn't exist; other failures raise"""
+        if not await self.collectionExists(sourceCollection, shard):
+            return False
+        db = shardRouter.getDb(shard)
+        try:
+            await db[sourceCollection].rename(targetCollection)
+            return True
+        except OperationFailure as e:
+            if e.code == namespaceNotFound:
+                return False
+            raise
+    
+    @timed("DynamicRepo.mergeCopy")
+    async def mergeCopy(self, sourceCollection: str, targetCollection: str, shard: str = None):
+        """Copy with a $merge aggregation so no data passes through the app"""
+        db = shardRouter.getDb(shard)
+        pipeline = [{
+            "$merge": {
+                "into": targetCollection,
+                "whenMatched": "keepExisting",
+                "whenNotMatched": "insert"
+            }
+        }]
+        await db[sourceCollection].aggregate(pipeline).to_list(length=None)
+        documents = await db[targetCollection].count_documents({})
+        return {"method": "merge", "documents": documents}
+    
+    @timed("DynamicRepo.streamCopy")
+    async def streamCopy(self, sourceCollection: str, targetCollection: str,
+                         batchSize: int = None, maxInFlight: int = None,
+                         startAfter=None, onCheckpoint=None,
+                         sourceShard: str = None, targetShard: str = None,
+                         sourceQuery: dict = None, transform=None):
+        """Stream the source cursor into the target in bounded batches, across shards if needed"""
+        batchSize = batchSize or copyBatchSize
+        maxInFlight = maxInFlight or copyMaxInFlight
+        source = shardRouter.getDb(sourceShard)[sourceCollection]
+        target = shardRouter.getDb(targetShard)[targetCollection]
+        
+        # (task, lastId) in cursor order; batches are awaited in order so the
+        # checkpoint is always an _id below which everything has been written
+        pending = []
+        copied = 0
+        batch = []
+        
+        async def drain(limit: int):
+            nonlocal copied
+            while len(pending) > limit:
+                task, lastId = pending.pop(0)
+                copied += await task
+                if onCheckpoint is not None:
+                    await onCheckpoint(lastId, copied)
+        
+        def submit(documents: list, lastId):
+            task = asyncio.ensure_future(self.insertBatch(target, documents))
+            pending.append((task, lastId))
+        
+        # sourceQuery narrows a shared collection to one tenant; transform retags documents
+        query = dict(sourceQuery or {})
+        if startAfter is not None:
+            query["_id"] = {"$gt": startAfter}
+        try:
+            cursor = source.find(query, sort=[("_id", 1)], batch_size=batchSize)
+            lastId = None
+            async for doc in cursor:
+                # Checkpoint on the source _id; transforms may rewrite it
+                lastId = doc["_id"]
+                batch.append(transform(doc) if transform is not None else doc)
+                if len(batch) >= batchSize:
+                    await drain(maxInFlight - 1)
+                    submit(batch, lastId)
+                    batch = []
+            if batch:
+                submit(batch, lastId)
+            await drain(0)
+        except BaseException:
+            for task, _ in pending:
+                task.cancel()
+            raise
+        
+        return {"method": "stream", "documents": copied}
+    
+    @timed("DynamicRepo.insertBatch")
+    async def insertBatch(self, target, documents: list) -> int:
+        """Insert a batch, skipping documents that were already copied"""
+        try:
+            result = await target.insert_many(documents, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != duplicateKey for error in errors):
+                raise
+            # A duplicate is only a resumed copy if the target already holds the same document
+            duplicates = [documents[error["index"]] for error in errors]
+            existing = {
+                repr(document["_id"]): document
+                async for document in target.find({"_id": {"$in": [document["_id"] for document in duplicates]}})
+            }
+            for document in duplicates:
+                if existing.get(repr(document["_id"])) != document:
+                    raise Exception(f"Document {document['_id']} already exists in {target.name} with different content")
+            return e.details.get("nInserted", 0)
+    
+    @timed("DynamicRepo.insertDocuments")
+    async def insertDocuments(self, collectionName: str, documents: list, shard: str = None):
+        """Insert documents unordered, returning ids and per-index errors"""
+        db = shardRouter.getDb(shard)
+        errors = {}
+        try:
+            await db[collectionName].insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                errors[error["index"]] = error
+        
+        # insert_many assigns _id client-side before sending
+        ids = [None if index in errors else document["_id"] for index, document in enumerate(documents)]
+        return ids, errors
+    
+    @staticmethod
+    def copyReport(result: dict, startedAt: float) -> dict:
+        """Attach timing and throughput to a copy result"""
+        seconds = time.perf_counter() - startedAt
+        result["seconds"] = round(seconds, 3)
+        result["docsPerSecond"] = round(result["documents"] / seconds, 1) if seconds > 0 else 0.0
+        print(f"✓ Copied {result['documents']} documents via {result['method']} "
+              f"({result['docsPerSecond']} docs/s)")
+        return result
+    
+    @timed("DynamicRepo.deleteTenantDocuments")
+    async def deleteTenantDocuments(self, collectionName: str, tenantId, shard: str = None):
+        """Remove one tenant's documents from a shared collection"""
+        db = shardRouter.getDb(shard)
+        result = await db[collectionName].delete_many({"tenantId": tenantId})
+        return result.deleted_count
     
-    async def dropCollection(self, collectionName: str):
+    @timed("DynamicRepo.dropCollection")
+    async def dropCollection(self, collectionName: str, shard: str = None):
         """Delete a dynamic collection"""
-        db = getDb()
+        db = shardRouter.getDb(shard)
         await db[collectionName].drop()
         return True
     
-    async def collectionExists(self, collectionName: str):
+    @timed("DynamicRepo.collectionExists")
+    async def collectionExists(self, collectionName: str, shard: str = None):
         """Check if collection exists"""
-        db = getDb()
-        collections = await db.list_collection_names()
+        db = shardRouter.getDb(shard)
+        collections = await db.list_collection_names(filter={"name": collectionName})
         return collectionName in collections
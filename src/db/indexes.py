@@ -0,0 +1,128 @@
+import os
+import sys
+import asyncio
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Collection holding every tenant in shared storage mode, and extra fields to index per tenant
+sharedCollectionName = os.getenv("SHARED_COLLECTION_NAME", "tenantDocuments")
+sharedIndexFields = [field.strip() for field in os.getenv("SHARED_INDEX_FIELDS", "").split(",") if field.strip()]
+
+# Declarative index specs per collection
+indexSpecs = {
+    "organizations": [
+        {"name": "organizationNameUnique", "keys": [("organizationName", ASCENDING)], "unique": True},
+        {"name": "emailUnique", "keys": [("email", ASCENDING)], "unique": True},
+        # Names differing only in case or spacing map to the same collection
+        {"name": "dynamicCollectionNameUnique", "keys": [("dynamicCollectionName", ASCENDING)], "unique": True},
+        {"name": "updatedAtIndex", "keys": [("updatedAt", ASCENDING)]}
+    ],
+    "migrations": [
+        {"name": "stateIndex", "keys": [("state", ASCENDING)]}
+    ],
+    "tombstones": [
+        {"name": "statePurgeIndex", "keys": [("state", ASCENDING), ("purgeAfter", ASCENDING)]}
+    ]
+}
+
+# Built on the master database and on every tenant shard
+tenantIndexSpecs = {
+    sharedCollectionName: [
+        {"name": "tenantIdIndex", "keys": [("tenantId", ASCENDING), ("_id", ASCENDING)]},
+        *[
+            {"name": f"tenantId_{field}", "keys": [("tenantId", ASCENDING), (field, ASCENDING)]}
+            for field in sharedIndexFields
+        ]
+    ]
+}
+
+def sameIndex(existing: dict, spec: dict) -> bool:
+    """Check whether an existing index matches its spec"""
+    return (
+        list(existing.get("key", [])) == list(spec["keys"])
+        and bool(existing.get("unique", False)) == bool(spec.get("unique", False))
+    )
+
+async def findDuplicates(collection, spec: dict, limit: int = 20) -> list:
+    """Groups of documents sharing the key of a unique index, largest first"""
+    pipeline = [
+        {"$group": {
+            "_id": {field: f"${field}" for field, _ in spec["keys"]},
+            "count": {"$sum": 1},
+            "documents": {"$push": {"_id": "$_id", "organizationName": "$organizationName"}}
+        }},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$sort": {"count": -1}},
+        {"$limit": limit}
+    ]
+    return await collection.aggregate(pipeline, allowDiskUse=True).to_list(length=None)
+
+def printDuplicates(collectionName: str, spec: dict, groups: list):
+    """Log each group of documents blocking a unique index"""
+    for group in groups:
+        documents = ", ".join(f"{document['_id']} ({document.get('organizationName')})" for document in group["documents"])
+        print(f"  {collectionName}.{spec['name']} {group['_id']}: {documents}")
+
+async def ensureIndexes(db, specs: dict = None):
+    """Create missing indexes and rebuild ones whose definition changed; raise if a unique one can't be built"""
+    specs = specs or indexSpecs
+    failed = []
+    for collectionName, collectionSpecs in specs.items():
+        collection = db[collectionName]
+        existing = await collection.index_information()
+        for spec in collectionSpecs:
+            name = spec["name"]
+            current = existing.get(name)
+            if current is not None and sameIndex(current, spec):
+                continue
+            try:
+                if current is not None:
+                    await collection.drop_index(name)
+                await collection.create_index(
+                    spec["keys"],
+                    name=name,
+                    unique=spec.get("unique", False)
+                )
+                print(f"✓ Index {collectionName}.{name} ready")
+            except OperationFailure as e:
+                # Usually existing duplicates blocking a unique index
+                print(f"✗ Could not build index {collectionName}.{name}: {str(e)}")
+                if spec.get("unique"):
+                    failed.append(f"{collectionName}.{name}")
+                    try:
+                        printDuplicates(collectionName, spec, await findDuplicates(collection, spec))
+                    except OperationFailure as reportError:
+                        print(f"  Could not list duplicates: {str(reportError)}")
+    if failed:
+        # Duplicate checks rely on these; the app stays not ready until they exist
+        raise Exception(f"Required unique indexes missing: {', '.join(failed)}")
+
+async def reportDuplicates(db) -> int:
+    """Print every group of documents blocking a unique index; return how many groups there are"""
+    total = 0
+    for collectionName, collectionSpecs in indexSpecs.items():
+        for spec in collectionSpecs:
+            if not spec.get("unique"):
+                continue
+            groups = await findDuplicates(db[collectionName], spec, limit=1000)
+            printDuplicates(collectionName, spec, groups)
+            total += len(groups)
+    return total
+
+async def main() -> int:
+    """Report duplicates in the configured master database"""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from src.db.connection import mongoUrl, databaseName, serverSelectionTimeoutMs
+    client = AsyncIOMotorClient(mongoUrl, serverSelectionTimeoutMS=serverSelectionTimeoutMs)
+    try:
+        total = await reportDuplicates(client[databaseName])
+    finally:
+        client.close()
+    print(f"{total} duplicate group(s) block unique indexes" if total else "No duplicates block unique indexes")
+    return 1 if total else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
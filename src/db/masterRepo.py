@@ -1,5 +1,24 @@
 from datetime import datetime
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from pymongo.errors import BulkWriteError
 from src.db.connection import getDb
+from src.db.orgCache import orgCache
+from src.db.orgFilter import orgFilter
+from src.db.shardRouter import defaultShard
+from src.utils.metricsService import timed
+
+# Fields safe to return to clients; never includes the password hash
+publicFields = {
+    "organizationName": 1,
+    "dynamicCollectionName": 1,
+    "email": 1,
+    "createdAt": 1,
+    "updatedAt": 1
+}
+
+# Deleted organizations keep their record, holding the name and email, until reaped
+live = {"deletedAt": None}
 
 class MasterRepo:
     """Repository for master database operations"""
@@ -7,41 +26,182 @@ class MasterRepo:
     def __init__(self):
         self.collectionName = "organizations"
     
-    async def findByName(self, organizationName: str):
-        """Find organization by name"""
+    @timed("MasterRepo.findByName")
+    async def findByName(self, organizationName: str, fresh: bool = False):
+        """Find organization by name, without the password hash; fresh skips the cache"""
+        if not fresh:
+            cached = orgCache.get(organizationName)
+            if cached is not None:
+                return cached
+        generation = orgCache.generation
         db = getDb()
         collection = db[self.collectionName]
-        return await collection.find_one({"organizationName": organizationName})
+        org = await collection.find_one({"organizationName": organizationName, **live}, {"password": 0})
+        orgCache.put(org, generation)
+        return org
     
+    @timed("MasterRepo.findPublicByName")
+    async def findPublicByName(self, organizationName: str):
+        """Find organization by name, reading only public fields"""
+        if not orgFilter.mightExist("name", organizationName, lookup=True):
+            return None
+        org = orgCache.get(organizationName)
+        if org is None:
+            # Read what the cache keeps, so polled lookups fill it
+            generation = orgCache.generation
+            db = getDb()
+            collection = db[self.collectionName]
+            org = await collection.find_one({"organizationName": organizationName, **live}, {"password": 0})
+            if org is None:
+                return None
+            orgCache.put(org, generation)
+        return {field: org[field] for field in ["_id", *publicFields] if field in org}
+    
+    @timed("MasterRepo.findByEmail")
     async def findByEmail(self, email: str):
-        """Find organization by admin email"""
+        """Find organization by admin email, password hash included; never cached"""
+        # Unknown emails are the bulk of failed logins
+        if not orgFilter.mightExist("email", email, lookup=True):
+            return None
+        db = getDb()
+        collection = db[self.collectionName]
+        return await collection.find_one({"email": email, **live})
+    
+    def listOrgs(self, sortField: str = "_id", after=None, limit: int = 0, batchSize: int = 500, raw: bool = False):
+        """Cursor over public organization fields, keyset-paginated on sortField"""
         db = getDb()
         collection = db[self.collectionName]
-        return await collection.find_one({"email": email})
+        if raw:
+            # Undecoded documents for callers that only serialize them
+            collection = collection.with_options(codec_options=CodecOptions(document_class=RawBSONDocument))
+        query = {sortField: {"$gt": after}, **live} if after is not None else dict(live)
+        return collection.find(
+            query,
+            publicFields,
+            sort=[(sortField, 1)],
+            limit=limit,
+            batch_size=batchSize
+        )
     
+    @timed("MasterRepo.countByShard")
+    async def countByShard(self):
+        """Tenant count per shard; records without a shard live on the default one"""
+        db = getDb()
+        collection = db[self.collectionName]
+        cursor = collection.aggregate([
+            {"$group": {"_id": {"$ifNull": ["$shard", defaultShard]}, "tenants": {"$sum": 1}}}
+        ])
+        return {row["_id"]: row["tenants"] async for row in cursor}
+    
+    @timed("MasterRepo.createOrg")
     async def createOrg(self, orgData: dict):
         """Create new organization in master database"""
         db = getDb()
         collection = db[self.collectionName]
         orgData["createdAt"] = datetime.utcnow()
         orgData["updatedAt"] = datetime.utcnow()
+        # Added before the write so no lookup can be ruled out while it exists
+        orgFilter.addDocument(orgData)
         result = await collection.insert_one(orgData)
+        orgCache.invalidate(orgData.get("organizationName"))
         return str(result.inserted_id)
     
-    async def updateOrg(self, oldName: str, newData: dict):
-        """Update organization metadata"""
+    @timed("MasterRepo.findExisting")
+    async def findExisting(self, organizationNames: list, emails: list, collectionNames: list = None):
+        """Find organizations holding any of the names, emails or collection names in one query, deleted ones included"""
+        # A key another worker wrote since the last sync can be missed here, and the unique
+        # indexes still reject it at insert time
+        organizationNames = [name for name in organizationNames if orgFilter.mightExist("name", name)]
+        emails = [email for email in emails if orgFilter.mightExist("email", email)]
+        collectionNames = [name for name in collectionNames or [] if orgFilter.mightExist("collection", name)]
+        if not organizationNames and not emails and not collectionNames:
+            return []
+        db = getDb()
+        collection = db[self.collectionName]
+        cursor = collection.find(
+            {"$or": [
+                {"organizationName": {"$in": organizationNames}},
+                {"email": {"$in": emails}},
+                {"dynamicCollectionName": {"$in": collectionNames}}
+            ]},
+            {"organizationName": 1, "email": 1, "dynamicCollectionName": 1, "_id": 0}
+        )
+        return await cursor.to_list(length=None)
+    
+    @timed("MasterRepo.createOrgs")
+    async def createOrgs(self, orgDataList: list):
+        """Insert many organizations unordered, returning ids and per-index errors"""
+        db = getDb()
+        collection = db[self.collectionName]
+        now = datetime.utcnow()
+        for orgData in orgDataList:
+            orgData["createdAt"] = now
+            orgData["updatedAt"] = now
+            orgFilter.addDocument(orgData)
+        
+        errors = {}
+        try:
+            await collection.insert_many(orgDataList, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                errors[error["index"]] = error
+        
+        for orgData in orgDataList:
+            orgCache.invalidate(orgData.get("organizationName"))
+        
+        # insert_many assigns _id client-side before sending
+        ids = [None if index in errors else str(orgData["_id"]) for index, orgData in enumerate(orgDataList)]
+        return ids, errors
+    
+    @timed("MasterRepo.updateOrg")
+    async def updateOrg(self, oldName: str, newData: dict, expected: dict = None):
+        """Update organization metadata, optionally only while fields still hold expected values"""
         db = getDb()
         collection = db[self.collectionName]
         newData["updatedAt"] = datetime.utcnow()
+        orgFilter.addDocument(newData)
         result = await collection.update_one(
-            {"organizationName": oldName},
+            {"organizationName": oldName, **(expected or {})},
             {"$set": newData}
         )
+        orgCache.invalidate(oldName)
+        orgCache.invalidate(newData.get("organizationName"))
+        await orgCache.publish([oldName, newData.get("organizationName")])
+        return result.modified_count > 0
+    
+    @timed("MasterRepo.markDeleted")
+    async def markDeleted(self, organizationName: str, purgeAfter: datetime):
+        """Hide an organization until it is reaped or restored"""
+        db = getDb()
+        collection = db[self.collectionName]
+        now = datetime.utcnow()
+        result = await collection.update_one(
+            {"organizationName": organizationName, **live},
+            {"$set": {"deletedAt": now, "purgeAfter": purgeAfter, "updatedAt": now}}
+        )
+        orgCache.invalidate(organizationName)
+        await orgCache.publish([organizationName])
+        return result.modified_count > 0
+    
+    @timed("MasterRepo.restoreOrg")
+    async def restoreOrg(self, organizationName: str):
+        """Undo markDeleted"""
+        db = getDb()
+        collection = db[self.collectionName]
+        result = await collection.update_one(
+            {"organizationName": organizationName, "deletedAt": {"$ne": None}},
+            {"$set": {"deletedAt": None, "purgeAfter": None, "updatedAt": datetime.utcnow()}}
+        )
+        orgCache.invalidate(organizationName)
+        await orgCache.publish([organizationName])
         return result.modified_count > 0
     
-    async def deleteOrg(self, organizationName: str):
-        """Delete organization from master database"""
+    @timed("MasterRepo.deleteOrg")
+    async def deleteOrg(self, organizationName: str, expected: dict = None):
+        """Delete organization from master database, optionally only while fields hold expected values"""
         db = getDb()
         collection = db[self.collectionName]
-        result = await collection.delete_one({"organizationName": organizationName})
+        result = await collection.delete_one({"organizationName": organizationName, **(expected or {})})
+        orgCache.invalidate(organizationName)
+        await orgCache.publish([organizationName])
         return result.deleted_count > 0
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ReturnDocument
+from bson.errors import InvalidId
+from src.db.connection import getDb
+
+class MigrationRepo:
+    """Repository for tenant migration jobs"""
+    
+    activeStates = ["queued", "copying", "swapping"]
+    
+    def __init__(self):
+        self.collectionName = "migrations"
+    
+    async def createJob(self, jobData: dict):
+        """Persist a new migration job"""
+        db = getDb()
+        collection = db[self.collectionName]
+        now = datetime.utcnow()
+        jobData.update({
+            "state": "queued",
+            "documentsCopied": 0,
+            "lastCopiedId": None,
+            "workerId": None,
+            "leaseUntil": None,
+            "error": None,
+            "createdAt": now,
+            "updatedAt": now,
+            "startedAt": None,
+            "finishedAt": None
+        })
+        result = await collection.insert_one(jobData)
+        return str(result.inserted_id)
+    
+    async def findById(self, jobId: str):
+        """Find a migration job by id"""
+        try:
+            objectId = ObjectId(jobId)
+        except (InvalidId, TypeError):
+            return None
+        db = getDb()
+        collection = db[self.collectionName]
+        return await collection.find_one({"_id": objectId})
+    
+    async def claimDue(self, workerId: str, leaseSeconds: float):
+        """Take the oldest unfinished job that has no owner or whose worker died"""
+        db = getDb()
+        collection = db[self.collectionName]
+        now = datetime.utcnow()
+        return await collection.find_one_and_update(
+            {
+                "state": {"$in": self.activeStates},
+                "$or": [
+                    {"workerId": None},
+                    {"leaseUntil": {"$lt": now}}
+                ]
+            },
+            {"$set": {"workerId": workerId, "leaseUntil": now + timedelta(seconds=leaseSeconds)}},
+            sort=[("createdAt", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+    
+    async def findActiveFor(self, organizationNames: list, collectionNames: list):
+        """Find an unfinished job touching any of the given names"""
+        db = getDb()
+        collection = db[self.collectionName]
+        return await collection.find_one({
+            "state": {"$in": self.activeStates},
+            "$or": [
+                {"organizationName": {"$in": organizationNames}},
+                {"newOrganizationName": {"$in": organizationNames}},
+                {"sourceCollection": {"$in": collectionNames}},
+                {"targetCollection": {"$in": collectionNames}}
+            ]
+        })
+    
+    async def findActiveTenants(self, tenantIds: list) -> set:
+        """Tenant ids among the given ones with an unfinished job"""
+        db = getDb()
+        collection = db[self.collectionName]
+        cursor = collection.find(
+            {"state": {"$in": self.activeStates}, "tenantId": {"$in": tenantIds}},
+            {"tenantId": 1, "_id": 0}
+        )
+        return {job["tenantId"] async for job in cursor}
+    
+    async def claimJob(self, jobId, workerId: str, leaseSeconds: float):
+        """Take ownership of a job unless another live worker holds it"""
+        db = getDb()
+        collection = db[self.collectionName]
+        now = datetime.utcnow()
+        result = await collection.update_one(
+            {
+                "_id": jobId,
+                "$or": [
+                    {"workerId": None},
+                    {"workerId": workerId},
+                    {"leaseUntil": {"$lt": now}}
+                ]
+            },
+            {"$set": {"workerId": workerId, "leaseUntil": now + timedelta(seconds=leaseSeconds)}}
+        )
+        return result.modified_count > 0
+    
+    async def updateJob(self, jobId, changes: dict, leaseSeconds: float = None):
+        """Update job progress, renewing the lease when given"""
+        db = getDb()
+        collection = db[self.collectionName]
+        now = datetime.utcnow()
+        changes["updatedAt"] = now
+        if leaseSeconds is not None:
+            changes["leaseUntil"] = now + timedelta(seconds=leaseSeconds)
+        await collection.update_one({"_id": jobId}, {"$set": changes})
@@ -0,0 +1,190 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from pymongo import ReturnDocument
+from dotenv import load_dotenv
+from src.db.connection import getDb
+from src.utils.metricsService import metricsRegistry
+
+load_dotenv()
+
+# Organization cache settings
+orgCacheEnabled = os.getenv("ORG_CACHE_ENABLED", "true").lower() == "true"
+orgCacheSize = int(os.getenv("ORG_CACHE_SIZE", "1000"))
+orgCacheTtl = float(os.getenv("ORG_CACHE_TTL", "30"))
+orgCacheSyncSeconds = float(os.getenv("ORG_CACHE_SYNC_SECONDS", "1"))
+orgCacheMaxStaleSeconds = float(os.getenv("ORG_CACHE_MAX_STALE_SECONDS", "5"))
+
+# Master collection holding the shared invalidation counter and the names each write touched
+generationsCollection = "cacheGenerations"
+# Invalidation entries kept for workers that fall behind; further behind, they clear everything
+invalidationLogSize = int(os.getenv("ORG_CACHE_INVALIDATION_LOG", "1000"))
+
+class OrgCache:
+    """TTL + LRU cache of organization documents keyed by name, without password hashes"""
+    
+    # Only name lookups are cached. Login reads by email, but it needs the password hash,
+    # which is never cached, so an email key would only hold dead entries.
+    # Every master write bumps a counter in MongoDB and logs the names it touched under the
+    # new value. Each worker polls the counter and drops just those names; if it missed
+    # entries (fell behind the log, or read the counter before the entry landed) it clears
+    # everything instead. Entries are not served while the counter can't be read
+    
+    def __init__(self, enabled: bool, maxSize: int, ttl: float):
+        self.enabled = enabled and maxSize > 0
+        self.maxSize = maxSize
+        self.ttl = ttl
+        # organizationName -> (document, expiresAt)
+        self.entries = OrderedDict()
+        # Bumped on every invalidation so in-flight reads don't store stale data
+        self.generation = 0
+        # Last value of the shared counter seen by this worker
+        self.sharedGeneration = None
+        self.lastSync = None
+        self.syncTask = None
+        self.syncFailing = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.remoteInvalidations = 0
+        self.remoteClears = 0
+    
+    def current(self) -> bool:
+        """Whether the shared counter was read recently enough to serve entries"""
+        return self.lastSync is not None and time.monotonic() - self.lastSync <= orgCacheMaxStaleSeconds
+    
+    def get(self, organizationName: str):
+        """Return a copy of the cached document or None"""
+        if not self.enabled:
+            return None
+        if not self.current():
+            self.misses += 1
+            return None
+        entry = self.entries.get(organizationName)
+        if entry is None:
+            self.misses += 1
+            return None
+        document, expiresAt = entry
+        if time.monotonic() >= expiresAt:
+            del self.entries[organizationName]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(organizationName)
+        self.hits += 1
+        return dict(document)
+    
+    def put(self, document: dict, generation: int):
+        """Store a document under its name"""
+        if not self.enabled or document is None or generation != self.generation:
+            return
+        stored = dict(document)
+        stored.pop("password", None)
+        self.entries[stored["organizationName"]] = (stored, time.monotonic() + self.ttl)
+        self.entries.move_to_end(stored["organizationName"])
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, organizationName: str):
+        """Forget the document cached under a name"""
+        self.generation += 1
+        if self.entries.pop(organizationName, None) is not None:
+            self.invalidations += 1
+    
+    def clear(self):
+        """Forget everything"""
+        self.generation += 1
+        self.entries.clear()
+    
+    async def publish(self, organizationNames: list):
+        """Tell every worker to drop these organizations after a master write"""
+        if not self.enabled:
+            return
+        collection = getDb()[generationsCollection]
+        state = await collection.find_one_and_update(
+            {"_id": "organizations"},
+            {"$inc": {"generation": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        generation = state["generation"]
+        names = sorted({name for name in organizationNames if name is not None})
+        await collection.insert_one({"_id": generation, "names": names})
+        if generation % 100 == 0:
+            # Numeric ids only; the counter document's string id never matches
+            await collection.delete_many({"_id": {"$lte": generation - invalidationLogSize}})
+    
+    async def sync(self):
+        """Drop names other workers wrote since the last poll"""
+        polledAt = time.monotonic()
+        collection = getDb()[generationsCollection]
+        state = await collection.find_one({"_id": "organizations"})
+        generation = state["generation"] if state else 0
+        if generation != self.sharedGeneration:
+            names = None
+            if self.sharedGeneration is not None and generation > self.sharedGeneration:
+                cursor = collection.find({"_id": {"$gt": self.sharedGeneration, "$lte": generation}})
+                logged = await cursor.to_list(length=None)
+                if len(logged) == generation - self.sharedGeneration:
+                    names = {name for entry in logged for name in entry["names"]}
+            if names is None:
+                if self.sharedGeneration is not None:
+                    self.remoteClears += 1
+                self.clear()
+            else:
+                for name in names:
+                    self.invalidate(name)
+                self.remoteInvalidations += len(names)
+            self.sharedGeneration = generation
+        self.lastSync = polledAt
+    
+    async def runSync(self):
+        """Poll the shared counter"""
+        while True:
+            try:
+                await self.sync()
+                self.syncFailing = False
+            except Exception as e:
+                if not self.syncFailing:
+                    print(f"✗ Organization cache sync failed: {str(e)}")
+                self.syncFailing = True
+            await asyncio.sleep(orgCacheSyncSeconds)
+    
+    async def start(self):
+        """Start following other workers' writes"""
+        if self.enabled and self.syncTask is None:
+            self.syncTask = asyncio.create_task(self.runSync())
+    
+    async def stop(self):
+        """Stop syncing and stop serving entries"""
+        if self.syncTask:
+            self.syncTask.cancel()
+            try:
+                await self.syncTask
+            except asyncio.CancelledError:
+                pass
+            self.syncTask = None
+        self.lastSync = None
+        self.sharedGeneration = None
+        self.clear()
+    
+    def getStats(self) -> dict:
+        """Return cache size and hit counters"""
+        return {
+            "enabled": self.enabled,
+            "size": len(self.entries),
+            "maxSize": self.maxSize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "remoteInvalidations": self.remoteInvalidations,
+            "remoteClears": self.remoteClears,
+            "current": self.current()
+        }
+
+# Global cache instance
+orgCache = OrgCache(orgCacheEnabled, orgCacheSize, orgCacheTtl)
+metricsRegistry.registerStats("orgCache", orgCache.getStats)
@@ -0,0 +1,217 @@
+import os
+import time
+import asyncio
+from datetime import datetime, timedelta
+from pymongo.errors import OperationFailure
+from dotenv import load_dotenv
+from src.db.connection import getDb
+from src.utils.bloomFilter import BloomFilter
+from src.utils.metricsService import metricsRegistry
+
+load_dotenv()
+
+# Existence prefilter settings
+orgFilterEnabled = os.getenv("ORG_PREFILTER_ENABLED", "true").lower() == "true"
+orgFilterFalsePositiveRate = float(os.getenv("ORG_PREFILTER_FALSE_POSITIVE_RATE", "0.01"))
+orgFilterMinCapacity = int(os.getenv("ORG_PREFILTER_MIN_CAPACITY", "10000"))
+orgFilterSyncMode = os.getenv("ORG_PREFILTER_SYNC", "auto")
+orgFilterSyncSeconds = float(os.getenv("ORG_PREFILTER_SYNC_SECONDS", "1"))
+orgFilterSyncOverlapSeconds = float(os.getenv("ORG_PREFILTER_SYNC_OVERLAP_SECONDS", "5"))
+orgFilterMaxStaleSeconds = float(os.getenv("ORG_PREFILTER_MAX_STALE_SECONDS", "10"))
+orgFilterRebuildSeconds = float(os.getenv("ORG_PREFILTER_REBUILD_SECONDS", "21600"))
+orgFilterScanBatch = int(os.getenv("ORG_PREFILTER_SCAN_BATCH", "5000"))
+
+# MongoDB error code for $changeStream on a standalone server
+changeStreamsUnsupported = 40573
+
+class OrgFilter:
+    """Bloom filter over every organization name, email and collection name, deleted ones included"""
+    
+    # Writes in this worker are added before they reach MongoDB. Writes from other workers
+    # arrive through a change stream, or by polling updatedAt on servers without one, and
+    # a negative is only trusted while that feed is current. Availability checks use it in
+    # either mode, since the unique indexes back them up. Record lookups (logins, /org/get)
+    # use it only while the change stream is live: another worker's write can then be missed
+    # for at most the stream's delivery lag, never for a clock-skewed poll window
+    
+    def __init__(self, enabled: bool, syncMode: str):
+        self.enabled = enabled
+        # "auto" watches a change stream and falls back to polling on standalone servers
+        self.useChangeStream = syncMode in ("auto", "changeStream")
+        self.collectionName = "organizations"
+        self.filter = None
+        # Filter being rebuilt; local writes go to both until it replaces the current one
+        self.building = None
+        self.watermark = None
+        self.lastSync = 0.0
+        self.builtAt = 0.0
+        self.syncTask = None
+        self.syncFailing = False
+        # True while watchChanges is following a live change stream
+        self.streaming = False
+        self.skipped = 0
+        self.passed = 0
+        self.builds = 0
+    
+    @staticmethod
+    def key(field: str, value: str) -> str:
+        """Filter key for a name or email"""
+        return f"{field}:{value}"
+    
+    def add(self, field: str, value: str):
+        """Record a name or email about to be written"""
+        if not self.enabled or value is None:
+            return
+        key = self.key(field, value)
+        for bloom in (self.filter, self.building):
+            if bloom is not None:
+                bloom.add(key)
+    
+    def addDocument(self, document: dict):
+        """Record every unique key of an organization document"""
+        self.add("name", document.get("organizationName"))
+        self.add("email", document.get("email"))
+        self.add("collection", document.get("dynamicCollectionName"))
+    
+    def trusted(self) -> bool:
+        """Whether negatives can be believed right now"""
+        return self.filter is not None and time.monotonic() - self.lastSync <= orgFilterMaxStaleSeconds
+    
+    def streamCurrent(self) -> bool:
+        """Whether a live change stream has reported within the last couple of waits"""
+        return self.streaming and time.monotonic() - self.lastSync <= 2 * orgFilterSyncSeconds
+    
+    def mightExist(self, field: str, value: str, lookup: bool = False) -> bool:
+        """False only when no organization can hold this value; lookups also need a live change stream"""
+        if not self.enabled or not self.trusted() or (lookup and not self.streamCurrent()):
+            return True
+        if self.key(field, value) in self.filter:
+            self.passed += 1
+            return True
+        self.skipped += 1
+        return False
+    
+    async def start(self):
+        """Build the filter and keep it in sync in the background"""
+        if self.enabled and self.syncTask is None:
+            self.syncTask = asyncio.create_task(self.runSync())
+    
+    async def stop(self):
+        """Stop syncing and stop trusting negatives"""
+        if self.syncTask:
+            self.syncTask.cancel()
+            try:
+                await self.syncTask
+            except asyncio.CancelledError:
+                pass
+            self.syncTask = None
+        self.filter = None
+        self.streaming = False
+    
+    async def build(self):
+        """Stream a projected scan of every organization into a new filter"""
+        collection = getDb()[self.collectionName]
+        startedAt = datetime.utcnow()
+        count = await collection.estimated_document_count()
+        self.building = BloomFilter(max(orgFilterMinCapacity, count * 6), orgFilterFalsePositiveRate)
+        try:
+            cursor = collection.find(
+                {},
+                {"organizationName": 1, "email": 1, "dynamicCollectionName": 1, "_id": 0},
+                batch_size=orgFilterScanBatch
+            )
+            async for document in cursor:
+                self.addDocument(document)
+            self.filter = self.building
+        finally:
+            self.building = None
+        # Writes stamped just before the scan started are caught by the next sync
+        self.watermark = startedAt
+        self.lastSync = time.monotonic()
+        self.builtAt = self.lastSync
+        self.builds += 1
+        print(f"✓ Built organization prefilter with {self.filter.count} keys")
+    
+    def rebuildDue(self) -> bool:
+        """Whether the filter should be rebuilt to resize it or shed deleted keys"""
+        return (self.filter is None or self.filter.isFull()
+                or time.monotonic() - self.builtAt >= orgFilterRebuildSeconds)
+    
+    async def watchChanges(self):
+        """Build the filter, then follow the change stream until a rebuild is due"""
+        collection = getDb()[self.collectionName]
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+        async with collection.watch(pipeline, max_await_time_ms=int(orgFilterSyncSeconds * 1000)) as stream:
+            # The stream is open before the scan starts, so nothing written during it is missed
+            await self.build()
+            self.streaming = True
+            try:
+                while not self.rebuildDue():
+                    change = await stream.try_next()
+                    if change is not None:
+                        self.addDocument(change.get("fullDocument") or change.get("updateDescription", {}).get("updatedFields", {}))
+                    self.lastSync = time.monotonic()
+            finally:
+                self.streaming = False
+    
+    async def sync(self):
+        """Add names and emails written by other workers since the last poll"""
+        collection = getDb()[self.collectionName]
+        # updatedAt is stamped before the write commits, so re-read a short overlap
+        since = self.watermark - timedelta(seconds=orgFilterSyncOverlapSeconds)
+        polledAt = time.monotonic()
+        cursor = collection.find(
+            {"updatedAt": {"$gte": since}},
+            {"organizationName": 1, "email": 1, "dynamicCollectionName": 1, "updatedAt": 1, "_id": 0}
+        )
+        async for document in cursor:
+            self.addDocument(document)
+            if document.get("updatedAt") and document["updatedAt"] > self.watermark:
+                self.watermark = document["updatedAt"]
+        self.lastSync = polledAt
+    
+    async def runSync(self):
+        """Build, then follow other workers' writes; rebuild when full or due, to shed deleted keys"""
+        while True:
+            try:
+                if self.useChangeStream:
+                    try:
+                        await self.watchChanges()
+                        continue
+                    except OperationFailure as e:
+                        if e.code != changeStreamsUnsupported or orgFilterSyncMode != "auto":
+                            raise
+                        # Standalone server: poll instead, which relies on app clocks stamping updatedAt
+                        print(f"⚠ Organization prefilter falling back to polling: {str(e)}")
+                        self.useChangeStream = False
+                if self.rebuildDue():
+                    await self.build()
+                else:
+                    await self.sync()
+                self.syncFailing = False
+            except Exception as e:
+                if not self.syncFailing:
+                    print(f"✗ Organization prefilter sync failed: {str(e)}")
+                self.syncFailing = True
+            await asyncio.sleep(orgFilterSyncSeconds)
+    
+    def getStats(self) -> dict:
+        """Return filter size and how many lookups it answered"""
+        return {
+            "enabled": self.enabled,
+            "trusted": self.trusted(),
+            "changeStream": self.useChangeStream,
+            "streaming": self.streamCurrent(),
+            "keys": self.filter.count if self.filter else 0,
+            "capacity": self.filter.capacity if self.filter else 0,
+            "sizeBytes": len(self.filter.bits) if self.filter else 0,
+            "hashCount": self.filter.hashCount if self.filter else 0,
+            "skipped": self.skipped,
+            "passed": self.passed,
+            "builds": self.builds,
+            "syncAgeSeconds": round(time.monotonic() - self.lastSync, 3) if self.filter else 0.0
+        }
+
+# Global filter instance
+orgFilter = OrgFilter(orgFilterEnabled, orgFilterSyncMode)
+metricsRegistry.registerStats("orgFilter", orgFilter.getStats)
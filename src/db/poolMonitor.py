@@ -0,0 +1,85 @@
+import threading
+from pymongo import monitoring
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks connection pool usage from pymongo pool events"""
+    
+    def __init__(self):
+        # Events arrive on pymongo's threads
+        self.lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """Zero every counter"""
+        with self.lock:
+            self.open = 0
+            self.checkedOut = 0
+            self.waiting = 0
+            self.checkouts = 0
+            self.checkoutFailures = 0
+            self.totalCheckoutTime = 0.0
+            self.maxCheckoutTime = 0.0
+            self.poolClears = 0
+    
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        with self.lock:
+            self.poolClears += 1
+    
+    def pool_closed(self, event):
+        pass
+    
+    def connection_created(self, event):
+        with self.lock:
+            self.open += 1
+    
+    def connection_ready(self, event):
+        pass
+    
+    def connection_closed(self, event):
+        with self.lock:
+            self.open = max(0, self.open - 1)
+    
+    def connection_check_out_started(self, event):
+        with self.lock:
+            self.waiting += 1
+    
+    def connection_check_out_failed(self, event):
+        with self.lock:
+            self.waiting = max(0, self.waiting - 1)
+            self.checkoutFailures += 1
+    
+    def connection_checked_out(self, event):
+        duration = getattr(event, "duration", None) or 0.0
+        with self.lock:
+            self.waiting = max(0, self.waiting - 1)
+            self.checkedOut += 1
+            self.checkouts += 1
+            self.totalCheckoutTime += duration
+            self.maxCheckoutTime = max(self.maxCheckoutTime, duration)
+    
+    def connection_checked_in(self, event):
+        with self.lock:
+            self.checkedOut = max(0, self.checkedOut - 1)
+    
+    def getStats(self) -> dict:
+        """Return pool occupancy and checkout latency"""
+        with self.lock:
+            return {
+                "openConnections": self.open,
+                "checkedOut": self.checkedOut,
+                "waitQueueLength": self.waiting,
+                "checkouts": self.checkouts,
+                "checkoutFailures": self.checkoutFailures,
+                "avgCheckoutMs": (self.totalCheckoutTime / self.checkouts * 1000) if self.checkouts else 0.0,
+                "maxCheckoutMs": self.maxCheckoutTime * 1000,
+                "poolClears": self.poolClears
+            }
+
+# Global monitor instance
+poolMonitor = PoolMonitor()
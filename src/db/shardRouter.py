@@ -0,0 +1,110 @@
+import os
+import time
+import bisect
+import hashlib
+from motor.motor_asyncio import AsyncIOMotorClient
+from dotenv import load_dotenv
+from src.db import connection
+from src.db.indexes import ensureIndexes, tenantIndexSpecs
+
+load_dotenv()
+
+# Tenant shards as "name=mongoUrl" pairs; an empty url means the master database
+tenantShards = os.getenv("TENANT_SHARDS", "")
+shardPlacement = os.getenv("SHARD_PLACEMENT", "hash")
+shardVirtualNodes = int(os.getenv("SHARD_VIRTUAL_NODES", "64"))
+shardLoadRefreshSeconds = float(os.getenv("SHARD_LOAD_REFRESH_SECONDS", "30"))
+
+# Shard holding tenants created before sharding existed
+defaultShard = "default"
+
+def parseShards(spec: str) -> dict:
+    """Parse TENANT_SHARDS into name -> url"""
+    shards = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, _, url = entry.partition("=")
+        shards[name.strip()] = url.strip()
+    return shards
+
+class ShardRouter:
+    """Routes tenant collections to one of several MongoDB databases"""
+    
+    def __init__(self, shardUrls: dict, placement: str, virtualNodes: int):
+        self.shardUrls = shardUrls or {defaultShard: ""}
+        self.placement = placement
+        self.clients = {}
+        self.databases = {}
+        self.tenantCounts = {}
+        self.countsLoadedAt = 0.0
+        self.ring = []
+        self.ringShards = []
+        for name in sorted(self.shardUrls):
+            for replica in range(virtualNodes):
+                self.ring.append(self.hashKey(f"{name}#{replica}"))
+                self.ringShards.append(name)
+        order = sorted(range(len(self.ring)), key=self.ring.__getitem__)
+        self.ring = [self.ring[index] for index in order]
+        self.ringShards = [self.ringShards[index] for index in order]
+    
+    @staticmethod
+    def hashKey(value: str) -> int:
+        """Stable 64-bit position on the hash ring"""
+        return int.from_bytes(hashlib.sha1(value.encode('utf-8')).digest()[:8], "big")
+    
+    def shardNames(self) -> list:
+        """Shards new tenants can be placed on"""
+        return sorted(self.shardUrls)
+    
+    async def connect(self):
+        """Open a client per external shard; call once per worker, shards already connected are kept"""
+        for name, url in self.shardUrls.items():
+            if not url or name in self.clients:
+                continue
+            client = AsyncIOMotorClient(url, **connection.clientOptions())
+            await client.admin.command('ping')
+            self.clients[name] = client
+            self.databases[name] = client.get_default_database(default=connection.databaseName)
+            await ensureIndexes(self.databases[name], tenantIndexSpecs)
+            print(f"✓ Connected to tenant shard: {name}")
+    
+    def close(self):
+        """Close shard clients"""
+        for client in self.clients.values():
+            client.close()
+        self.clients = {}
+        self.databases = {}
+    
+    def getDb(self, shard: str = None):
+        """Database holding a tenant's collection"""
+        shard = shard or defaultShard
+        if shard in self.databases:
+            return self.databases[shard]
+        if shard == defaultShard or self.shardUrls.get(shard) == "":
+            return connection.getDb()
+        if shard in self.shardUrls:
+            raise Exception(f"Shard {shard} is not connected")
+        raise Exception(f"Unknown shard: {shard}")
+    
+    def hashShard(self, organizationName: str) -> str:
+        """Consistent-hash placement"""
+        position = bisect.bisect(self.ring, self.hashKey(organizationName)) % len(self.ring)
+        return self.ringShards[position]
+    
+    async def placeTenant(self, organizationName: str, countsLoader) -> str:
+        """Pick the shard for a new tenant by consistent hash or least load"""
+        if self.placement != "least-load":
+            return self.hashShard(organizationName)
+        
+        # Tenant counts are refreshed periodically and bumped locally in between
+        if time.monotonic() - self.countsLoadedAt > shardLoadRefreshSeconds:
+            self.tenantCounts = await countsLoader()
+            self.countsLoadedAt = time.monotonic()
+        shard = min(self.shardNames(), key=lambda name: (self.tenantCounts.get(name, 0), name))
+        self.tenantCounts[shard] = self.tenantCounts.get(shard, 0) + 1
+        return shard
+
+# Global router instance
+shardRouter = ShardRouter(parseShards(tenantShards), shardPlacement, shardVirtualNodes)
@@ -0,0 +1,127 @@
+import os
+from bson import ObjectId
+from dotenv import load_dotenv
+from src.db.indexes import sharedCollectionName
+
+load_dotenv()
+
+# Storage for new tenants: a collection each, or one shared collection
+tenantStorageMode = os.getenv("TENANT_STORAGE_MODE", "collection")
+
+class CollectionStorage:
+    """One collection per tenant, named by OrgService.generateCollectionName"""
+    
+    mode = "collection"
+    
+    def collectionName(self, org: dict) -> str:
+        """Collection holding the tenant's documents"""
+        return org["dynamicCollectionName"]
+    
+    def scopeQuery(self, org: dict, query: dict = None) -> dict:
+        """Restrict a query to the tenant"""
+        return query or {}
+    
+    def scopeProjection(self, projection: dict = None):
+        """Projection that hides storage fields"""
+        return projection
+    
+    def tagDocuments(self, org: dict, documents: list) -> list:
+        """Prepare tenant documents for insertion"""
+        return documents
+    
+    def exportStages(self) -> list:
+        """Aggregation stages turning stored documents back into client documents"""
+        return []
+    
+    def documentId(self, storedId):
+        """Client-facing _id of a stored document"""
+        return storedId
+
+class SharedStorage:
+    """All tenants in one collection, told apart by a tenantId field"""
+    
+    # Stored _id values are {tenantId, id} so each tenant has its own _id space:
+    # tenants cannot collide with, or probe for, each other's documents
+    
+    mode = "shared"
+    
+    def collectionName(self, org: dict) -> str:
+        """Collection holding the tenant's documents"""
+        return sharedCollectionName
+    
+    @staticmethod
+    def scopedId(tenantId, documentId) -> dict:
+        """Stored _id of a tenant document"""
+        return {"tenantId": tenantId, "id": documentId}
+    
+    @classmethod
+    def scopeIdFilter(cls, tenantId, query):
+        """Rewrite client conditions on _id to the stored {tenantId, id} form"""
+        if isinstance(query, list):
+            return [cls.scopeIdFilter(tenantId, item) for item in query]
+        if not isinstance(query, dict):
+            return query
+        scoped = {}
+        for field, condition in query.items():
+            if field in ("$and", "$or", "$nor"):
+                scoped[field] = cls.scopeIdFilter(tenantId, condition)
+            elif field == "_id" and not (isinstance(condition, dict) and any(key.startswith("$") for key in condition)):
+                # Plain equality still hits the _id index
+                scoped["_id"] = cls.scopedId(tenantId, condition)
+            elif field == "_id":
+                scoped["_id.id"] = condition
+            else:
+                scoped[field] = condition
+        return scoped
+    
+    def scopeQuery(self, org: dict, query: dict = None) -> dict:
+        """Restrict a query to the tenant; a client-supplied tenantId is overridden"""
+        return {**self.scopeIdFilter(org["_id"], query or {}), "tenantId": org["_id"]}
+    
+    def scopeProjection(self, projection: dict = None):
+        """Projection that hides storage fields"""
+        if not projection:
+            return {"tenantId": 0}
+        inclusive = any(value for field, value in projection.items() if field != "_id")
+        if inclusive:
+            return {field: value for field, value in projection.items() if field != "tenantId"}
+        return {**projection, "tenantId": 0}
+    
+    def tagDocuments(self, org: dict, documents: list) -> list:
+        """Prepare tenant documents for insertion"""
+        tag = self.tagger(org["_id"])
+        return [tag(document) for document in documents]
+    
+    def exportStages(self) -> list:
+        """Aggregation stages turning stored documents back into client documents"""
+        return [{"$addFields": {"_id": "$_id.id"}}]
+    
+    def documentId(self, storedId):
+        """Client-facing _id of a stored document"""
+        return storedId["id"] if isinstance(storedId, dict) else storedId
+    
+    @classmethod
+    def tagger(cls, tenantId):
+        """Copy transform into shared storage"""
+        def tag(document: dict) -> dict:
+            document["_id"] = cls.scopedId(tenantId, document["_id"] if "_id" in document else ObjectId())
+            document["tenantId"] = tenantId
+            return document
+        return tag
+    
+    @staticmethod
+    def untag(document: dict) -> dict:
+        """Copy transform out of shared storage"""
+        document.pop("tenantId", None)
+        if isinstance(document.get("_id"), dict):
+            document["_id"] = document["_id"]["id"]
+        return document
+
+storageBackends = {
+    CollectionStorage.mode: CollectionStorage(),
+    SharedStorage.mode: SharedStorage()
+}
+
+def storageFor(org: dict):
+    """Backend holding an organization's documents; records without one use collections"""
+    return storageBackends[org.get("storage") or CollectionStorage.mode]
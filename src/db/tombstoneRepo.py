@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from src.db.connection import getDb
+
+class TombstoneRepo:
+    """Repository for tenant collections waiting to be dropped"""
+    
+    def __init__(self):
+        self.collectionName = "tombstones"
+    
+    async def createTombstone(self, tombstoneData: dict):
+        """Persist a pending drop"""
+        db = getDb()
+        collection = db[self.collectionName]
+        tombstoneData.update({
+            "state": "pending",
+            "workerId": None,
+            "leaseUntil": None,
+            "createdAt": datetime.utcnow(),
+            "droppedAt": None
+        })
+        await collection.insert_one(tombstoneData)
+        return tombstoneData
+    
+    async def claimDue(self, workerId: str, leaseSeconds: float):
+        """Take the oldest drop past its grace period, or one whose worker died"""
+        db = getDb()
+        collection = db[self.collectionName]
+        now = datetime.utcnow()
+        return await collection.find_one_and_update(
+            {
+                "purgeAfter": {"$lte": now},
+                "$or": [
+                    {"state": "pending"},
+                    {"state": "dropping", "leaseUntil": {"$lt": now}}
+                ]
+            },
+            {"$set": {
+                "state": "dropping",
+                "workerId": workerId,
+                "leaseUntil": now + timedelta(seconds=leaseSeconds)
+            }},
+            sort=[("purgeAfter", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+    
+    async def findPending(self, limit: int = 100):
+        """Drops not yet carried out, soonest first"""
+        db = getDb()
+        collection = db[self.collectionName]
+        cursor = collection.find(
+            {"state": {"$in": ["pending", "dropping"]}},
+            sort=[("purgeAfter", 1)],
+            limit=limit
+        )
+        return await cursor.to_list(length=limit)
+    
+    async def findPendingFor(self, organizationName: str, reason: str):
+        """Pending drop of an organization's collection"""
+        db = getDb()
+        collection = db[self.collectionName]
+        return await collection.find_one({
+            "organizationName": organizationName,
+            "reason": reason,
+            "state": "pending"
+        })
+    
+    async def updateState(self, tombstoneId, state: str, expectedState: str = None):
+        """Move a tombstone to a new state, returning whether it matched"""
+        db = getDb()
+        collection = db[self.collectionName]
+        query = {"_id": tombstoneId}
+        if expectedState is not None:
+            query["state"] = expectedState
+        changes = {"state": state, "workerId": None, "leaseUntil": None}
+        if state == "dropped":
+            changes["droppedAt"] = datetime.utcnow()
+        result = await collection.update_one(query, {"$set": changes})
+        return result.modified_count > 0
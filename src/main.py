@@ -1,13 +1,95 @@
-from fastapi import FastAPI
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pymongo.errors import ConnectionFailure
+from src.db import connection
 from src.db.connection import connectDb, closeDb
+from src.db.circuitBreaker import dbBreaker
+from src.db.shardRouter import shardRouter
+from src.db.orgFilter import orgFilter
+from src.db.orgCache import orgCache
+from src.utils.errors import ServiceUnavailableError
+from src.utils.jsonResponse import BsonJSONResponse
+from src.utils.hashService import hashExecutor, configureRounds
+from src.services.migrationService import migrationService
+from src.services.ingestService import ingestService
+from src.services.reaperService import reaperService
+from src.utils.metricsService import MetricsMiddleware, metricsRegistry
+from src.utils.profiler import ProfileMiddleware, loopMonitor
+from src.api.adminAuth import adminApiKey, verifyAdminKey
 from src.api import orgRoutes, adminRoutes
 
+# Startup retry backoff cap
+reconnectMaxSeconds = float(os.getenv("DB_RECONNECT_MAX_SECONDS", "30"))
+
+async def startServices(app: FastAPI):
+    """Connect and start background services; safe to call again after a failure"""
+    await connectDb()
+    await orgCache.start()
+    await orgFilter.start()
+    await shardRouter.connect()
+    await migrationService.start()
+    await reaperService.start()
+    app.state.ready = True
+    print("✓ Application started successfully")
+
+async def retryStartup(app: FastAPI):
+    """Keep retrying startup in the background with exponential backoff"""
+    delay = 1.0
+    while not app.state.ready:
+        await asyncio.sleep(delay)
+        try:
+            await startServices(app)
+        except Exception as e:
+            delay = min(delay * 2, reconnectMaxSeconds)
+            print(f"⚠ Startup still failing, retrying in {delay:.0f}s: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect on startup and drain background work on shutdown, once per worker"""
+    await asyncio.to_thread(configureRounds)
+    app.state.ready = False
+    retryTask = None
+    await loopMonitor.start()
+    try:
+        await startServices(app)
+    except Exception as e:
+        print(f"⚠ Warning: Startup failed: {str(e)}")
+        print("⚠ Application will start and keep retrying; /ready fails until then")
+        retryTask = asyncio.create_task(retryStartup(app))
+    snapshotTask = asyncio.create_task(metricsRegistry.runSnapshotWriter())
+    
+    yield
+    
+    for task in (snapshotTask, retryTask):
+        if task is None:
+            continue
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    await ingestService.drain()
+    await reaperService.stop()
+    await migrationService.stop()
+    await orgFilter.stop()
+    await orgCache.stop()
+    shardRouter.close()
+    await closeDb()
+    await loopMonitor.stop()
+    hashExecutor.shutdown()
+    print("✓ Application shutdown complete")
+
 # Create FastAPI app
 app = FastAPI(
     title="Organization Management Service",
     description="Backend service for managing organizations with dynamic collections",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=BsonJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -19,24 +101,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Startup event
-@app.on_event("startup")
-async def startup():
-    """Initialize database connection on startup"""
-    try:
-        await connectDb()
-        print("✓ Application started successfully")
-    except Exception as e:
-        print(f"⚠ Warning: Could not connect to MongoDB: {str(e)}")
-        print("⚠ Application will start but database operations will fail")
-        print("⚠ Please configure MONGO_URL in .env file")
-
-# Shutdown event
-@app.on_event("shutdown")
-async def shutdown():
-    """Close database connection on shutdown"""
-    await closeDb()
-    print("✓ Application shutdown complete")
+# Time every request for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Per-request profiles, on X-Profile with the admin key or at PROFILE_REQUEST_SAMPLE_RATE
+app.add_middleware(ProfileMiddleware, adminKey=adminApiKey)
+
+# Shed load with 503 when a dependency is saturated
+@app.exception_handler(ServiceUnavailableError)
+async def serviceUnavailableHandler(request: Request, exc: ServiceUnavailableError):
+    """Return 503 with Retry-After for overloaded dependencies"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retryAfter)}
+    )
+
+# Requests that hit an unreachable server feed the breaker
+@app.exception_handler(ConnectionFailure)
+async def connectionFailureHandler(request: Request, exc: ConnectionFailure):
+    """Return 503 when MongoDB could not be reached"""
+    dbBreaker.recordFailure(exc)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database unavailable, please retry shortly"},
+        headers={"Retry-After": str(max(1, int(dbBreaker.resetSeconds)))}
+    )
 
 # Root route
 @app.get("/")
@@ -49,8 +139,29 @@ async def root():
         "version": "1.0.0"
     }
 
+# Readiness route
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 once started with indexes built and the database breaker is closed"""
+    breaker = dbBreaker.getStats()
+    started = app.state.ready and connection.indexesReady
+    if started and breaker["state"] == "closed":
+        return {"status": "ready", "database": breaker["state"]}
+    return JSONResponse(
+        status_code=503,
+        content={"status": "starting" if not started else "unavailable", "database": breaker},
+        headers={"Retry-After": str(max(1, int(dbBreaker.resetSeconds)))}
+    )
+
+# Metrics route; gauges and collection labels name tenants, so it needs the admin key
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(verifyAdminKey)])
+async def metrics():
+    """Prometheus text exposition of latency histograms and runtime stats"""
+    return PlainTextResponse(metricsRegistry.render(), media_type="text/plain; version=0.0.4")
+
 # Include routers
 app.include_router(orgRoutes.router)
 app.include_router(adminRoutes.router)
 
 # Run with: uvicorn src.main:app --reload
+# Production (multi-worker): python -m src.server
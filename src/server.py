@@ -0,0 +1,80 @@
+import os
+import math
+import tempfile
+import uvicorn
+from dotenv import load_dotenv
+from src.utils.hashService import configureRounds
+
+load_dotenv()
+
+# Production server settings
+host = os.getenv("HOST", "0.0.0.0")
+port = int(os.getenv("PORT", "8000"))
+gracefulShutdownSeconds = int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", "30"))
+
+def readFile(path: str) -> str:
+    """File contents, or None if it can't be read"""
+    try:
+        with open(path) as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+def cgroupCpuLimit(root: str = "/sys/fs/cgroup") -> float:
+    """CPUs allowed by the container's cgroup quota, or None without one"""
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    limit = readFile(os.path.join(root, "cpu.max"))
+    if limit:
+        quota, _, period = limit.partition(" ")
+        if quota != "max" and period:
+            return int(quota) / int(period)
+        return None
+    # cgroup v1: a quota of -1 means unlimited
+    quota = readFile(os.path.join(root, "cpu", "cpu.cfs_quota_us"))
+    period = readFile(os.path.join(root, "cpu", "cpu.cfs_period_us"))
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+def availableCpus() -> int:
+    """CPUs this process may actually use: its affinity mask, capped by any cgroup quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        # Not available on macOS or Windows
+        cpus = os.cpu_count() or 1
+    limit = cgroupCpuLimit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+def workerCount() -> int:
+    """Worker processes: WEB_CONCURRENCY, or one per available CPU"""
+    configured = os.getenv("WEB_CONCURRENCY")
+    if configured:
+        return max(1, int(configured))
+    return availableCpus()
+
+def main():
+    """Run uvicorn with one process per worker, each with its own Motor client"""
+    workers = workerCount()
+    if workers > 1 and not os.getenv("METRICS_DIR"):
+        # Workers inherit this and publish metric snapshots here
+        os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix="orgMetrics")
+    if workers > 1 and not os.getenv("BCRYPT_ROUNDS"):
+        # Calibrate once so every worker hashes, and rehashes, at the same cost
+        os.environ["BCRYPT_ROUNDS"] = str(configureRounds())
+    
+    print(f"✓ Starting {workers} worker(s) on {host}:{port}")
+    uvicorn.run(
+        "src.main:app",
+        host=host,
+        port=port,
+        workers=workers,
+        # Stop accepting, finish in-flight requests, then run lifespan shutdown
+        timeout_graceful_shutdown=gracefulShutdownSeconds,
+        proxy_headers=True
+    )
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,19 @@
+import os
+import asyncio
+from dotenv import load_dotenv
 from src.db.masterRepo import MasterRepo
 from src.utils.hashService import HashService
-from src.utils.tokenService import TokenService
+from src.utils.tokenService import TokenService, tokenVerifier
+from src.utils.metricsService import timed
+
+load_dotenv()
+
+# Upgrade stored hashes below the current bcrypt cost after a successful login
+rehashOnLogin = os.getenv("BCRYPT_REHASH_ON_LOGIN", "true").lower() == "true"
+
+# Background rehash tasks, and organizations with one in flight
+rehashTasks = set()
+rehashing = set()
 
 class AdminService:
     """Business logic for admin authentication"""
@@ -10,6 +23,7 @@ class AdminService:
         self.hashService = HashService()
         self.tokenService = TokenService()
     
+    @timed("AdminService.loginAdmin")
     async def loginAdmin(self, email: str, password: str):
         """Authenticate admin and return JWT token"""
         # Find organization by email
@@ -18,10 +32,14 @@ class AdminService:
             raise Exception("Invalid email or password")
         
         # Verify password
-        isValid = self.hashService.verifyPassword(password, org["password"])
+        isValid = await self.hashService.verifyPasswordAsync(password, org["password"])
         if not isValid:
             raise Exception("Invalid email or password")
         
+        # Only ever upwards: a slower or misconfigured host must not weaken stored hashes
+        if rehashOnLogin and HashService.hashRounds(org["password"]) < HashService.currentRounds():
+            self.scheduleRehash(org, password)
+        
         # Generate JWT token
         adminId = str(org["_id"])
         organizationName = org["organizationName"]
@@ -35,10 +53,37 @@ class AdminService:
             "organizationName": organizationName
         }
     
+    def scheduleRehash(self, org: dict, password: str):
+        """Rehash at the current cost without delaying the login response"""
+        organizationName = org["organizationName"]
+        if organizationName in rehashing:
+            return
+        rehashing.add(organizationName)
+        task = asyncio.ensure_future(self.rehashPassword(organizationName, password, org["password"]))
+        rehashTasks.add(task)
+        task.add_done_callback(rehashTasks.discard)
+    
+    async def rehashPassword(self, organizationName: str, password: str, oldHash: str):
+        """Replace the stored hash unless the password changed meanwhile"""
+        try:
+            newHash = await self.hashService.hashPasswordAsync(password)
+            updated = await self.masterRepo.updateOrg(
+                organizationName,
+                {"password": newHash},
+                expected={"password": oldHash}
+            )
+            if updated:
+                print(f"✓ Rehashed password for {organizationName} at cost {HashService.hashRounds(newHash)}")
+        except Exception as e:
+            print(f"⚠ Rehash for {organizationName} failed: {str(e)}")
+        finally:
+            rehashing.discard(organizationName)
+    
+    @timed("AdminService.verifyAdmin")
     async def verifyAdmin(self, token: str):
         """Verify admin token"""
         try:
-            payload = self.tokenService.verifyToken(token)
+            payload = tokenVerifier.verify(token)
             return {
                 "success": True,
                 "adminId": payload["adminId"],
@@ -0,0 +1,110 @@
+import os
+from dotenv import load_dotenv
+from src.db.masterRepo import MasterRepo
+from src.db.dynamicRepo import DynamicRepo, duplicateKey
+from src.db.migrationRepo import MigrationRepo
+from src.db.tenantStorage import storageFor
+from src.db.indexes import sharedCollectionName
+from src.utils.writeCoalescer import WriteCoalescer
+from src.utils.metricsService import timed, metricsRegistry
+
+load_dotenv()
+
+# Write coalescing settings
+ingestFlushSize = int(os.getenv("INGEST_FLUSH_SIZE", "500"))
+ingestFlushIntervalMs = float(os.getenv("INGEST_FLUSH_INTERVAL_MS", "5"))
+ingestMaxPending = int(os.getenv("INGEST_MAX_PENDING", "20000"))
+ingestMaxDocuments = int(os.getenv("INGEST_MAX_DOCUMENTS", "10000"))
+
+class IngestService:
+    """Writes tenant documents through a per-collection write coalescer"""
+    
+    def __init__(self):
+        self.masterRepo = MasterRepo()
+        self.dynamicRepo = DynamicRepo()
+        self.migrationRepo = MigrationRepo()
+        self.coalescer = WriteCoalescer(
+            self.flushDocuments,
+            ingestFlushSize,
+            ingestFlushIntervalMs / 1000,
+            ingestMaxPending
+        )
+    
+    @timed("IngestService.insertDocuments")
+    async def insertDocuments(self, organizationName: str, documents: list):
+        """Insert documents into the organization's collection once their batch is flushed"""
+        if not documents:
+            raise Exception("No documents to insert")
+        if len(documents) > ingestMaxDocuments:
+            raise Exception(f"Too many documents, at most {ingestMaxDocuments} per request")
+        if any(not isinstance(document, dict) for document in documents):
+            raise Exception("Every document must be a JSON object")
+        
+        org = await self.masterRepo.findByName(organizationName)
+        if not org:
+            raise Exception("Organization not found")
+        
+        # Shared tenants on one shard all coalesce into the same batches
+        storage = storageFor(org)
+        key = (org.get("shard"), storage.collectionName(org))
+        ids, errors = await self.coalescer.submit(key, storage.tagDocuments(org, documents))
+        
+        return {
+            "success": True,
+            "inserted": len(documents) - len(errors),
+            "failed": len(errors),
+            "insertedIds": [None if storedId is None else storage.documentId(storedId) for storedId in ids],
+            "errors": [
+                {"index": index, "error": self.writeErrorMessage(error)}
+                for index, error in sorted(errors.items())
+            ]
+        }
+    
+    @staticmethod
+    def writeErrorMessage(error: dict) -> str:
+        """Map a bulk write error to a user-facing message"""
+        if error.get("code") == duplicateKey:
+            return "Document with this _id already exists"
+        return error.get("errmsg", "Insert failed")
+    
+    async def flushDocuments(self, key, documents: list):
+        """Write one coalesced batch, refusing while the collection is migrating"""
+        shard, collectionName = key
+        # One check per batch rather than per request; a migration would
+        # otherwise drop documents written behind its copy cursor
+        if collectionName != sharedCollectionName:
+            if await self.migrationRepo.findActiveFor([], [collectionName]):
+                raise Exception("A migration is in progress for this organization")
+            return await self.dynamicRepo.insertDocuments(collectionName, documents, shard)
+        
+        # Shared batches mix tenants; only documents of migrating tenants are refused
+        migrating = await self.migrationRepo.findActiveTenants(list({document["tenantId"] for document in documents}))
+        if not migrating:
+            return await self.dynamicRepo.insertDocuments(collectionName, documents, shard)
+        
+        accepted = [index for index, document in enumerate(documents) if document["tenantId"] not in migrating]
+        insertedIds, insertErrors = [], {}
+        if accepted:
+            insertedIds, insertErrors = await self.dynamicRepo.insertDocuments(
+                collectionName,
+                [documents[index] for index in accepted],
+                shard
+            )
+        ids = [None] * len(documents)
+        errors = {
+            index: {"errmsg": "A migration is in progress for this organization"}
+            for index, document in enumerate(documents) if document["tenantId"] in migrating
+        }
+        for position, index in enumerate(accepted):
+            ids[index] = insertedIds[position]
+            if position in insertErrors:
+                errors[index] = insertErrors[position]
+        return ids, errors
+    
+    async def drain(self):
+        """Flush buffered writes before shutdown"""
+        await self.coalescer.drain()
+
+# Global ingest instance, shared so concurrent requests coalesce
+ingestService = IngestService()
+metricsRegistry.registerStats("ingest", ingestService.coalescer.getStats)
@@ -0,0 +1,249 @@
+import os
+import socket
+import asyncio
+from datetime import datetime
+from dotenv import load_dotenv
+from src.db.masterRepo import MasterRepo
+from src.db.dynamicRepo import DynamicRepo
+from src.db.migrationRepo import MigrationRepo
+from src.db.shardRouter import defaultShard
+from src.db.tenantStorage import SharedStorage
+from src.services.reaperService import reaperService
+from src.utils.tokenService import tokenVerifier
+
+load_dotenv()
+
+# Seconds a worker owns a job without reporting progress
+migrationLeaseSeconds = float(os.getenv("MIGRATION_LEASE_SECONDS", "60"))
+# How often idle workers look for unowned jobs and jobs whose worker died
+migrationPollSeconds = float(os.getenv("MIGRATION_POLL_SECONDS", "5"))
+
+class MigrationService:
+    """Background worker that runs tenant rename, rebalance and storage migrations"""
+    
+    def __init__(self):
+        self.masterRepo = MasterRepo()
+        self.dynamicRepo = DynamicRepo()
+        self.migrationRepo = MigrationRepo()
+        self.workerId = f"{socket.gethostname()}:{os.getpid()}"
+        self.queue = None
+        self.workerTask = None
+    
+    async def start(self):
+        """Start the worker; it resumes unfinished jobs by polling for them"""
+        if self.workerTask is not None:
+            return
+        self.queue = asyncio.Queue()
+        self.workerTask = asyncio.create_task(self.runWorker())
+    
+    async def stop(self):
+        """Stop the worker, leaving unfinished jobs to resume later"""
+        if self.workerTask:
+            self.workerTask.cancel()
+            try:
+                await self.workerTask
+            except asyncio.CancelledError:
+                pass
+            self.workerTask = None
+    
+    async def enqueue(self, jobData: dict) -> str:
+        """Persist a job and hand it to the worker"""
+        jobId = await self.migrationRepo.createJob(jobData)
+        if self.queue is not None:
+            self.queue.put_nowait(jobData["_id"])
+        return jobId
+    
+    async def runWorker(self):
+        """Process jobs one at a time: those enqueued here, then any left without a live owner"""
+        while True:
+            try:
+                jobId = await asyncio.wait_for(self.queue.get(), migrationPollSeconds)
+            except asyncio.TimeoutError:
+                jobId = None
+            if jobId is not None:
+                try:
+                    await self.runJob(jobId)
+                except Exception as e:
+                    print(f"✗ Migration {jobId} crashed: {str(e)}")
+                finally:
+                    self.queue.task_done()
+            try:
+                # A job this worker lost the claim for comes back here once its owner's lease expires
+                await self.runDueJobs()
+            except Exception as e:
+                print(f"✗ Migration poll failed: {str(e)}")
+    
+    async def runDueJobs(self) -> int:
+        """Claim and run unowned or abandoned jobs until none are left"""
+        ran = 0
+        while True:
+            job = await self.migrationRepo.claimDue(self.workerId, migrationLeaseSeconds)
+            if not job:
+                return ran
+            print(f"⚠ Resuming migration {job['_id']} in state {job['state']}")
+            await self.runClaimed(job)
+            ran += 1
+    
+    async def runJob(self, jobId):
+        """Claim and run a single migration job unless another live worker holds it"""
+        job = await self.migrationRepo.findById(str(jobId))
+        if not job or job["state"] not in MigrationRepo.activeStates:
+            return
+        if not await self.migrationRepo.claimJob(jobId, self.workerId, migrationLeaseSeconds):
+            return
+        await self.runClaimed(job)
+    
+    async def runClaimed(self, job: dict):
+        """Copy, swap and clean up a job this worker holds the lease for"""
+        jobId = job["_id"]
+        try:
+            if job["state"] in ("queued", "copying"):
+                job["startedAt"] = job.get("startedAt") or datetime.utcnow()
+                await self.migrationRepo.updateJob(
+                    jobId,
+                    {"state": "copying", "startedAt": job["startedAt"]},
+                    migrationLeaseSeconds
+                )
+                await self.copyCollection(job)
+            
+            await self.migrationRepo.updateJob(jobId, {"state": "swapping"}, migrationLeaseSeconds)
+            await self.swapOrganization(job)
+            
+            await self.migrationRepo.updateJob(jobId, {
+                "state": "completed",
+                "finishedAt": datetime.utcnow(),
+                "workerId": None,
+                "leaseUntil": None
+            })
+            print(f"✓ Migration {jobId} completed: {job['sourceCollection']} -> {job['targetCollection']}")
+        except Exception as e:
+            if not job.get("swapped"):
+                await self.rollback(job)
+            await self.migrationRepo.updateJob(jobId, {
+                "state": "failed",
+                "error": str(e),
+                "finishedAt": datetime.utcnow(),
+                "workerId": None,
+                "leaseUntil": None
+            })
+            print(f"✗ Migration {jobId} failed: {str(e)}")
+    
+    async def copyCollection(self, job: dict):
+        """Copy tenant data, checkpointing the last copied _id"""
+        jobId = job["_id"]
+        source = job["sourceCollection"]
+        target = job["targetCollection"]
+        sourceShard = job.get("sourceShard")
+        targetShard = job.get("targetShard")
+        sourceShared = job.get("sourceStorage") == SharedStorage.mode
+        targetShared = job.get("targetStorage") == SharedStorage.mode
+        
+        # A fresh job within one shard can usually be moved with a metadata-only rename
+        if job.get("lastCopiedId") is None and sourceShard == targetShard and not (sourceShared or targetShared):
+            moved = await self.dynamicRepo.renameCollection(source, target, sourceShard)
+            if moved is not None:
+                await self.migrationRepo.updateJob(jobId, {"documentsCopied": moved}, migrationLeaseSeconds)
+                return
+        
+        alreadyCopied = job.get("documentsCopied", 0)
+        
+        async def saveCheckpoint(lastId, copied: int):
+            await self.migrationRepo.updateJob(
+                jobId,
+                {"lastCopiedId": lastId, "documentsCopied": alreadyCopied + copied},
+                migrationLeaseSeconds
+            )
+        
+        await self.dynamicRepo.streamCopy(
+            source,
+            target,
+            startAfter=job.get("lastCopiedId"),
+            onCheckpoint=saveCheckpoint,
+            sourceShard=sourceShard,
+            targetShard=targetShard,
+            sourceQuery={"tenantId": job["tenantId"]} if sourceShared else None,
+            transform=self.copyTransform(job)
+        )
+    
+    @staticmethod
+    def copyTransform(job: dict):
+        """Tag or untag documents moving between collection and shared storage"""
+        sourceShared = job.get("sourceStorage") == SharedStorage.mode
+        targetShared = job.get("targetStorage") == SharedStorage.mode
+        if targetShared and not sourceShared:
+            return SharedStorage.tagger(job["tenantId"])
+        if sourceShared and not targetShared:
+            return SharedStorage.untag
+        return None
+    
+    async def swapOrganization(self, job: dict):
+        """Point the master record at the new collection and tombstone the old one"""
+        oldName = job["organizationName"]
+        # Matches nothing if a previous run already swapped, so safe to repeat
+        await self.masterRepo.updateOrg(oldName, dict(job["updateData"]))
+        job["swapped"] = True
+        # The old copy is dropped later by the reaper; a rename already moved the data
+        reason = job.get("kind", "rename")
+        if job.get("sourceStorage") == SharedStorage.mode:
+            await reaperService.tombstoneTenant(
+                job["tenantId"],
+                job["sourceCollection"],
+                job.get("sourceShard"),
+                oldName,
+                reason
+            )
+        elif await self.dynamicRepo.collectionExists(job["sourceCollection"], job.get("sourceShard")):
+            await reaperService.tombstone(job["sourceCollection"], job.get("sourceShard"), oldName, reason)
+        if job["newOrganizationName"] != oldName:
+            tokenVerifier.evictOrganization(oldName)
+    
+    async def rollback(self, job: dict):
+        """Leave the tenant on its original collection after a failure"""
+        try:
+            sourceShard = job.get("sourceShard")
+            if job.get("targetStorage") == SharedStorage.mode:
+                # The tenant had no documents in the target shared collection before the copy
+                await self.dynamicRepo.deleteTenantDocuments(job["targetCollection"], job["tenantId"], job.get("targetShard"))
+            elif await self.dynamicRepo.collectionExists(job["sourceCollection"], sourceShard):
+                # Stream copy: the source is intact, discard the partial target
+                await self.dynamicRepo.dropCollection(job["targetCollection"], job.get("targetShard"))
+            else:
+                # Rename: move the data back
+                await self.dynamicRepo.moveCollection(job["targetCollection"], job["sourceCollection"], sourceShard)
+        except Exception as e:
+            print(f"⚠ Rollback of migration {job['_id']} failed: {str(e)}")
+    
+    async def getMigration(self, jobId: str):
+        """Return job state, progress and throughput"""
+        job = await self.migrationRepo.findById(jobId)
+        if not job:
+            raise Exception("Migration not found")
+        
+        endedAt = job.get("finishedAt") or datetime.utcnow()
+        elapsed = (endedAt - job["startedAt"]).total_seconds() if job.get("startedAt") else 0
+        
+        return {
+            "success": True,
+            "migration": {
+                "migrationId": str(job["_id"]),
+                "state": job["state"],
+                "organizationName": job["organizationName"],
+                "newOrganizationName": job["newOrganizationName"],
+                "sourceCollection": job["sourceCollection"],
+                "targetCollection": job["targetCollection"],
+                "kind": job.get("kind", "rename"),
+                "sourceStorage": job.get("sourceStorage") or "collection",
+                "targetStorage": job.get("targetStorage") or "collection",
+                "sourceShard": job.get("sourceShard") or defaultShard,
+                "targetShard": job.get("targetShard") or defaultShard,
+                "documentsCopied": job.get("documentsCopied", 0),
+                "docsPerSecond": round(job.get("documentsCopied", 0) / elapsed, 1) if elapsed > 0 else 0.0,
+                "error": job.get("error"),
+                "createdAt": job.get("createdAt"),
+                "startedAt": job.get("startedAt"),
+                "finishedAt": job.get("finishedAt")
+            }
+        }
+
+# Global worker instance
+migrationService = MigrationService()
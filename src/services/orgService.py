@@ -1,7 +1,41 @@
+import os
 import re
+import json
+import base64
+import asyncio
+import bson
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from src.db.masterRepo import MasterRepo
 from src.db.dynamicRepo import DynamicRepo
-from src.utils.hashService import HashService
+from src.db.migrationRepo import MigrationRepo
+from src.db.shardRouter import shardRouter, defaultShard
+from src.db.tenantStorage import storageFor, storageBackends, tenantStorageMode, SharedStorage
+from src.utils.hashService import HashService, hashExecutor
+from src.utils.tokenService import tokenVerifier
+from src.services.migrationService import migrationService
+from src.services.reaperService import reaperService
+from src.utils.jsonResponse import dumpsBson
+from src.utils.streamEncoder import bufferChunks, gzipChunks
+from src.utils.metricsService import timed
+
+# Largest batch accepted by bulk provisioning
+bulkCreateMax = int(os.getenv("BULK_CREATE_MAX", "500"))
+
+# Names differing only in case or spacing map to the same collection
+similarNameMessage = "Organization name too similar to an existing one"
+
+# Keyset pagination over organizations
+listSortFields = {"id": "_id", "name": "organizationName"}
+listMaxLimit = int(os.getenv("LIST_MAX_LIMIT", "1000"))
+
+# Tenant collection export
+exportBatchSize = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+exportChunkBytes = int(os.getenv("EXPORT_CHUNK_BYTES", "65536"))
+exportGzipLevel = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+exportFormats = ("ndjson", "bson")
+# Server-side JavaScript is not available to tenants
+exportBlockedOperators = {"$where", "$function", "$accumulator"}
 
 class OrgService:
     """Business logic for organization operations"""
@@ -9,6 +43,7 @@ class OrgService:
     def __init__(self):
         self.masterRepo = MasterRepo()
         self.dynamicRepo = DynamicRepo()
+        self.migrationRepo = MigrationRepo()
         self.hashService = HashService()
     
     def generateCollectionName(self, organizationName: str) -> str:
@@ -28,97 +63,387 @@ class OrgService:
         # Prefix with 'org'
         return f"org{collectionName.capitalize()}"
     
-    async def createOrganization(self, organizationName: str, email: str, password: str):
+    @staticmethod
+    def duplicateKeyMessage(error: dict) -> str:
+        """Map a unique index violation to a user-facing message"""
+        if "email" in error.get("keyPattern", {}) or "emailUnique" in error.get("errmsg", ""):
+            return "Email already registered"
+        if "dynamicCollectionName" in error.get("keyPattern", {}) or "dynamicCollectionNameUnique" in error.get("errmsg", ""):
+            return similarNameMessage
+        return "Organization name already exists"
+    
+    @timed("OrgService.createOrganization")
+    async def createOrganization(self, organizationName: str, email: str, password: str, storage: str = None):
         """Create new organization with admin user"""
-        # Check if organization already exists
-        existing = await self.masterRepo.findByName(organizationName)
-        if existing:
-            raise Exception("Organization name already exists")
-        
-        # Check if email is already used
-        existingEmail = await self.masterRepo.findByEmail(email)
-        if existingEmail:
-            raise Exception("Email already registered")
+        storage = storage or tenantStorageMode
+        if storage not in storageBackends:
+            raise Exception("storage must be 'collection' or 'shared'")
         
         # Generate collection name
         collectionName = self.generateCollectionName(organizationName)
         
         # Hash password
-        hashedPassword = self.hashService.hashPassword(password)
+        hashedPassword = await self.hashService.hashPasswordAsync(password)
+        
+        # Pick the shard that will hold the tenant collection
+        shard = await shardRouter.placeTenant(organizationName, self.masterRepo.countByShard)
         
         # Create organization metadata
         orgData = {
             "organizationName": organizationName,
             "dynamicCollectionName": collectionName,
             "email": email,
-            "password": hashedPassword
+            "password": hashedPassword,
+            "shard": shard,
+            "storage": storage
         }
         
-        # Save to master database
-        orgId = await self.masterRepo.createOrg(orgData)
+        # Save to master database, unique indexes reject duplicates
+        try:
+            orgId = await self.masterRepo.createOrg(orgData)
+        except DuplicateKeyError as e:
+            raise Exception(self.duplicateKeyMessage(e.details or {}))
         
-        # Create dynamic collection
-        await self.dynamicRepo.createCollection(collectionName)
+        # Create dynamic collection; shared tenants live in the existing shared collection
+        if storage != SharedStorage.mode:
+            await self.dynamicRepo.createCollection(collectionName, shard)
         
         return {
             "success": True,
             "message": "Organization created successfully",
             "organizationId": orgId,
             "organizationName": organizationName,
-            "collectionName": collectionName
+            "collectionName": collectionName,
+            "shard": shard,
+            "storage": storage
+        }
+    
+    @timed("OrgService.bulkCreateOrganizations")
+    async def bulkCreateOrganizations(self, items: list):
+        """Create many organizations, reporting a result per item"""
+        if len(items) > bulkCreateMax:
+            raise Exception(f"Batch too large, at most {bulkCreateMax} organizations per request")
+        
+        results = [None] * len(items)
+        candidates = []
+        seenCollections = set()
+        seenEmails = set()
+        
+        # Validate names and reject duplicates within the batch
+        for index, item in enumerate(items):
+            if item.get("error"):
+                results[index] = self.bulkFailure(index, item, item["error"])
+                continue
+            try:
+                collectionName = self.generateCollectionName(item["organizationName"])
+            except ValueError as e:
+                results[index] = self.bulkFailure(index, item, str(e))
+                continue
+            if collectionName in seenCollections:
+                results[index] = self.bulkFailure(index, item, "Organization name repeated in batch")
+                continue
+            if item["email"] in seenEmails:
+                results[index] = self.bulkFailure(index, item, "Email repeated in batch")
+                continue
+            seenCollections.add(collectionName)
+            seenEmails.add(item["email"])
+            candidates.append((index, item, collectionName))
+        
+        # One query for every name, email and collection name already taken
+        if candidates:
+            existing = await self.masterRepo.findExisting(
+                [item["organizationName"] for _, item, _ in candidates],
+                [item["email"] for _, item, _ in candidates],
+                [collectionName for _, _, collectionName in candidates]
+            )
+            takenNames = {org.get("organizationName") for org in existing}
+            takenEmails = {org.get("email") for org in existing}
+            takenCollections = {org.get("dynamicCollectionName") for org in existing}
+            available = []
+            for index, item, collectionName in candidates:
+                if item["organizationName"] in takenNames:
+                    results[index] = self.bulkFailure(index, item, "Organization name already exists")
+                elif collectionName in takenCollections:
+                    results[index] = self.bulkFailure(index, item, similarNameMessage)
+                elif item["email"] in takenEmails:
+                    results[index] = self.bulkFailure(index, item, "Email already registered")
+                else:
+                    available.append((index, item, collectionName))
+            candidates = available
+        
+        # Hash in parallel without overrunning the hashing queue
+        hashSlots = asyncio.Semaphore(hashExecutor.maxWorkers)
+        
+        async def hashWithSlot(password: str):
+            async with hashSlots:
+                return await self.hashService.hashPasswordAsync(password)
+        
+        hashes = await asyncio.gather(
+            *[hashWithSlot(item["password"]) for _, item, _ in candidates],
+            return_exceptions=True
+        )
+        
+        toInsert = []
+        for (index, item, collectionName), hashed in zip(candidates, hashes):
+            if isinstance(hashed, Exception):
+                results[index] = self.bulkFailure(index, item, str(hashed))
+                continue
+            toInsert.append((index, item, collectionName, {
+                "organizationName": item["organizationName"],
+                "dynamicCollectionName": collectionName,
+                "email": item["email"],
+                "password": hashed,
+                "shard": await shardRouter.placeTenant(item["organizationName"], self.masterRepo.countByShard),
+                "storage": tenantStorageMode
+            }))
+        
+        # Single unordered insert; unique indexes still catch races
+        if toInsert:
+            ids, errors = await self.masterRepo.createOrgs([orgData for _, _, _, orgData in toInsert])
+            created = []
+            for position, (index, item, collectionName, orgData) in enumerate(toInsert):
+                if position in errors:
+                    error = errors[position]
+                    if error.get("code") == 11000:
+                        message = self.duplicateKeyMessage(error)
+                    else:
+                        message = error.get("errmsg", "Insert failed")
+                    results[index] = self.bulkFailure(index, item, message)
+                    continue
+                results[index] = {
+                    "index": index,
+                    "success": True,
+                    "organizationId": ids[position],
+                    "organizationName": item["organizationName"],
+                    "collectionName": collectionName,
+                    "shard": orgData["shard"]
+                }
+                created.append((collectionName, orgData["shard"]))
+            
+            if tenantStorageMode != SharedStorage.mode:
+                await asyncio.gather(*[self.dynamicRepo.createCollection(name, shard) for name, shard in created])
+        
+        createdCount = sum(1 for result in results if result["success"])
+        return {
+            "success": True,
+            "created": createdCount,
+            "failed": len(results) - createdCount,
+            "results": results
+        }
+    
+    @staticmethod
+    def bulkFailure(index: int, item: dict, error: str) -> dict:
+        """Per-item failure entry for bulk operations"""
+        return {
+            "index": index,
+            "success": False,
+            "organizationName": item.get("organizationName"),
+            "error": error
         }
     
+    @timed("OrgService.getOrganization")
     async def getOrganization(self, organizationName: str):
         """Get organization details"""
-        org = await self.masterRepo.findByName(organizationName)
+        org = await self.masterRepo.findPublicByName(organizationName)
         if not org:
             raise Exception("Organization not found")
         
-        # Remove sensitive data
-        org.pop("password", None)
-        org["_id"] = str(org["_id"])
-        
         return {
             "success": True,
             "organization": org
         }
     
+    @staticmethod
+    def encodeCursor(sortField: str, value) -> str:
+        """Opaque cursor for the last item of a page"""
+        raw = json.dumps({"s": sortField, "v": str(value)}).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('utf-8')
+    
+    @staticmethod
+    def decodeCursor(sortField: str, cursor: str):
+        """Keyset value from a cursor produced by encodeCursor"""
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')))
+            if data["s"] != sortField:
+                raise ValueError("sort mismatch")
+            return ObjectId(data["v"]) if sortField == "_id" else data["v"]
+        except Exception:
+            raise Exception("Invalid cursor")
+    
+    def resolveListArgs(self, sort: str, after: str):
+        """Validate list sort order and cursor"""
+        sortField = listSortFields.get(sort)
+        if sortField is None:
+            raise Exception("sort must be 'id' or 'name'")
+        afterValue = self.decodeCursor(sortField, after) if after else None
+        return sortField, afterValue
+    
+    @timed("OrgService.listOrganizations")
+    async def listOrganizations(self, sort: str = "id", after: str = None, limit: int = 100):
+        """One keyset page of organizations"""
+        sortField, afterValue = self.resolveListArgs(sort, after)
+        limit = max(1, min(limit, listMaxLimit))
+        
+        cursor = self.masterRepo.listOrgs(sortField, afterValue, limit, batchSize=limit)
+        organizations = await cursor.to_list(length=limit)
+        
+        nextCursor = None
+        if len(organizations) == limit:
+            nextCursor = self.encodeCursor(sortField, organizations[-1][sortField])
+        
+        return {
+            "success": True,
+            "organizations": organizations,
+            "nextCursor": nextCursor
+        }
+    
+    async def streamOrganizations(self, sort: str = "id", after: str = None, limit: int = 0):
+        """NDJSON lines written as the cursor yields them"""
+        sortField, afterValue = self.resolveListArgs(sort, after)
+        cursor = self.masterRepo.listOrgs(sortField, afterValue, max(0, limit), raw=True)
+        
+        async def lines():
+            async for org in cursor:
+                yield dumpsBson(org) + b"\n"
+        
+        return lines()
+    
+    @classmethod
+    def checkExportQuery(cls, value):
+        """Reject server-side JavaScript anywhere in a filter or projection"""
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key in exportBlockedOperators:
+                    raise Exception(f"Operator {key} is not allowed")
+                cls.checkExportQuery(item)
+        elif isinstance(value, list):
+            for item in value:
+                cls.checkExportQuery(item)
+    
+    @timed("OrgService.exportDocuments")
+    async def exportDocuments(self, organizationName: str, format: str = "ndjson",
+                              query: dict = None, projection: dict = None, gzip: bool = False, raw: bool = True):
+        """Byte stream of the organization's collection as NDJSON or concatenated BSON"""
+        if format not in exportFormats:
+            raise Exception("format must be 'ndjson' or 'bson'")
+        self.checkExportQuery(query)
+        self.checkExportQuery(projection)
+        
+        org = await self.masterRepo.findByName(organizationName)
+        if not org:
+            raise Exception("Organization not found")
+        
+        storage = storageFor(org)
+        cursor = self.dynamicRepo.exportCursor(
+            storage.collectionName(org),
+            storage.scopeQuery(org, query),
+            storage.scopeProjection(projection),
+            exportBatchSize,
+            org.get("shard"),
+            storage.exportStages(),
+            raw
+        )
+        
+        # Documents stay undecoded; BSON output is the raw bytes off the wire
+        async def pieces():
+            async for document in cursor:
+                if format == "ndjson":
+                    yield dumpsBson(document) + b"\n"
+                else:
+                    yield document.raw if raw else bson.encode(document)
+        
+        # The response pulls one chunk at a time, so a slow reader also slows the cursor
+        stream = bufferChunks(pieces(), exportChunkBytes)
+        if gzip:
+            stream = gzipChunks(stream, exportGzipLevel)
+        return stream
+    
+    @timed("OrgService.updateOrganization")
     async def updateOrganization(self, oldName: str, newName: str, email: str, password: str):
         """Update organization name and details"""
         # Find existing organization
-        org = await self.masterRepo.findByName(oldName)
+        org = await self.masterRepo.findByName(oldName, fresh=True)
         if not org:
             raise Exception("Organization not found")
         
-        # If name is changing, check new name availability
-        if oldName != newName:
-            existing = await self.masterRepo.findByName(newName)
-            if existing:
-                raise Exception("New organization name already exists")
-        
         # Generate new collection name
         newCollectionName = self.generateCollectionName(newName)
         oldCollectionName = org["dynamicCollectionName"]
+        shard = org.get("shard") or defaultShard
         
-        # Hash new password
-        hashedPassword = self.hashService.hashPassword(password)
+        # Check availability of a new name or email; deleted organizations hold theirs until reaped
+        newNames = [newName] if oldName != newName else []
+        newEmails = [email] if email != org.get("email") else []
+        newCollections = [newCollectionName] if newCollectionName != oldCollectionName else []
+        if newNames or newEmails or newCollections:
+            existing = await self.masterRepo.findExisting(newNames, newEmails, newCollections)
+            if newNames and any(match.get("organizationName") == newName for match in existing):
+                raise Exception("New organization name already exists")
+            if newCollections and any(match.get("dynamicCollectionName") == newCollectionName for match in existing):
+                raise Exception(similarNameMessage)
+            if existing:
+                raise Exception("Email already registered")
         
-        # If collection name changes, migrate data
-        if oldCollectionName != newCollectionName:
-            # Copy data to new collection
-            await self.dynamicRepo.copyData(oldCollectionName, newCollectionName)
-            # Drop old collection
-            await self.dynamicRepo.dropCollection(oldCollectionName)
+        # Hash new password
+        hashedPassword = await self.hashService.hashPasswordAsync(password)
         
-        # Update master database
+        # Update master database; credentials never go into a migration job document
         updateData = {
             "organizationName": newName,
-            "dynamicCollectionName": newCollectionName,
+            "dynamicCollectionName": newCollectionName
+        }
+        credentials = {
             "email": email,
             "password": hashedPassword
         }
         
-        await self.masterRepo.updateOrg(oldName, updateData)
+        # If collection name changes, migrate data in the background; shared tenants are keyed by id
+        storage = storageFor(org)
+        if oldCollectionName != newCollectionName and storage.mode != SharedStorage.mode:
+            active = await self.migrationRepo.findActiveFor(
+                [oldName, newName],
+                [oldCollectionName, newCollectionName]
+            )
+            if active:
+                raise Exception("A migration is already in progress for this organization")
+            
+            # Credentials change now, under the old name; the job only moves the name and collection
+            try:
+                await self.masterRepo.updateOrg(oldName, credentials)
+            except DuplicateKeyError as e:
+                raise Exception(self.duplicateKeyMessage(e.details or {}))
+            
+            migrationId = await migrationService.enqueue({
+                "organizationName": oldName,
+                "newOrganizationName": newName,
+                "sourceCollection": oldCollectionName,
+                "targetCollection": newCollectionName,
+                "sourceShard": shard,
+                "targetShard": shard,
+                "sourceStorage": storage.mode,
+                "targetStorage": storage.mode,
+                "tenantId": org["_id"],
+                "kind": "rename",
+                "updateData": updateData
+            })
+            
+            return {
+                "success": True,
+                "message": "Organization update queued",
+                "organizationName": newName,
+                "collectionName": newCollectionName,
+                "migrationId": migrationId,
+                "status": "queued"
+            }
+        
+        try:
+            await self.masterRepo.updateOrg(oldName, {**updateData, **credentials})
+        except DuplicateKeyError as e:
+            raise Exception(self.duplicateKeyMessage(e.details or {}))
+        
+        # Cached tokens must not keep authorising the old name
+        if oldName != newName:
+            tokenVerifier.evictOrganization(oldName)
         
         return {
             "success": True,
@@ -127,22 +452,176 @@ class OrgService:
             "collectionName": newCollectionName
         }
     
+    @timed("OrgService.rebalanceOrganization")
+    async def rebalanceOrganization(self, organizationName: str, targetShard: str):
+        """Move a tenant's documents to another shard through the migration worker"""
+        org = await self.masterRepo.findByName(organizationName, fresh=True)
+        if not org:
+            raise Exception("Organization not found")
+        if targetShard not in shardRouter.shardNames():
+            raise Exception(f"Unknown shard: {targetShard}")
+        if (org.get("shard") or defaultShard) == targetShard:
+            raise Exception(f"Organization is already on shard {targetShard}")
+        
+        return await self.enqueueRelocation(
+            org,
+            targetShard,
+            storageFor(org).mode,
+            "rebalance",
+            "Organization rebalance queued"
+        )
+    
+    @timed("OrgService.convertStorage")
+    async def convertStorage(self, organizationName: str, targetStorage: str):
+        """Move a tenant between its own collection and the shared collection"""
+        org = await self.masterRepo.findByName(organizationName, fresh=True)
+        if not org:
+            raise Exception("Organization not found")
+        if targetStorage not in storageBackends:
+            raise Exception("storage must be 'collection' or 'shared'")
+        if storageFor(org).mode == targetStorage:
+            raise Exception(f"Organization already uses {targetStorage} storage")
+        
+        return await self.enqueueRelocation(
+            org,
+            org.get("shard") or defaultShard,
+            targetStorage,
+            "convert",
+            "Organization storage conversion queued"
+        )
+    
+    async def enqueueRelocation(self, org: dict, targetShard: str, targetStorage: str, kind: str, message: str):
+        """Queue a copy of a tenant's documents to another shard or storage mode"""
+        organizationName = org["organizationName"]
+        active = await self.migrationRepo.findActiveFor([organizationName], [org["dynamicCollectionName"]])
+        if active:
+            raise Exception("A migration is already in progress for this organization")
+        
+        source = storageFor(org)
+        target = storageBackends[targetStorage]
+        sourceShard = org.get("shard") or defaultShard
+        
+        # The swap only repoints the shard and storage fields
+        migrationId = await migrationService.enqueue({
+            "organizationName": organizationName,
+            "newOrganizationName": organizationName,
+            "sourceCollection": source.collectionName(org),
+            "targetCollection": target.collectionName(org),
+            "sourceShard": sourceShard,
+            "targetShard": targetShard,
+            "sourceStorage": source.mode,
+            "targetStorage": target.mode,
+            "tenantId": org["_id"],
+            "kind": kind,
+            "updateData": {"shard": targetShard, "storage": target.mode}
+        })
+        
+        return {
+            "success": True,
+            "message": message,
+            "organizationName": organizationName,
+            "sourceShard": sourceShard,
+            "targetShard": targetShard,
+            "sourceStorage": source.mode,
+            "targetStorage": target.mode,
+            "migrationId": migrationId,
+            "status": "queued"
+        }
+    
+    @timed("OrgService.getShards")
+    async def getShards(self):
+        """Configured shards and how many tenants each holds"""
+        counts = await self.masterRepo.countByShard()
+        return {
+            "success": True,
+            "placement": shardRouter.placement,
+            "shards": [
+                {"name": name, "tenants": counts.get(name, 0)}
+                for name in shardRouter.shardNames()
+            ]
+        }
+    
+    @timed("OrgService.getMigration")
+    async def getMigration(self, migrationId: str):
+        """Get rename migration progress"""
+        return await migrationService.getMigration(migrationId)
+    
+    @timed("OrgService.deleteOrganization")
     async def deleteOrganization(self, organizationName: str):
         """Delete organization and its data"""
         # Find organization
-        org = await self.masterRepo.findByName(organizationName)
+        org = await self.masterRepo.findByName(organizationName, fresh=True)
         if not org:
             raise Exception("Organization not found")
         
         collectionName = org["dynamicCollectionName"]
         
-        # Drop dynamic collection
-        await self.dynamicRepo.dropCollection(collectionName)
+        active = await self.migrationRepo.findActiveFor([organizationName], [collectionName])
+        if active:
+            raise Exception("A migration is in progress for this organization")
         
-        # Delete from master database
-        await self.masterRepo.deleteOrg(organizationName)
+        # Hide the organization now; the reaper drops its data after the grace period
+        purgeAfter = reaperService.purgeTime()
+        await self.masterRepo.markDeleted(organizationName, purgeAfter)
+        tokenVerifier.evictOrganization(organizationName)
         
+        storage = storageFor(org)
+        try:
+            if storage.mode == SharedStorage.mode:
+                tombstone = await reaperService.tombstoneTenant(
+                    org["_id"],
+                    storage.collectionName(org),
+                    org.get("shard"),
+                    organizationName,
+                    "delete",
+                    purgeAfter
+                )
+            else:
+                tombstone = await reaperService.tombstone(
+                    collectionName,
+                    org.get("shard"),
+                    organizationName,
+                    "delete",
+                    purgeAfter
+                )
+        except Exception:
+            # Without a tombstone the record would stay hidden and never be reaped
+            await self.masterRepo.restoreOrg(organizationName)
+            raise
+        if tombstone is None:
+            # The organization had no collection, nothing is left to restore
+            await self.masterRepo.deleteOrg(organizationName)
+            return {
+                "success": True,
+                "message": "Organization deleted successfully"
+            }
+        
+        return {
+            "success": True,
+            "message": "Organization deleted successfully",
+            "restorableUntil": purgeAfter
+        }
+    
+    @timed("OrgService.restoreOrganization")
+    async def restoreOrganization(self, organizationName: str):
+        """Undo a delete that the reaper has not carried out yet"""
+        tombstone = await reaperService.tombstoneRepo.findPendingFor(organizationName, "delete")
+        if not tombstone:
+            raise Exception("No pending delete for this organization")
+        
+        await reaperService.restore(tombstone)
+        await self.masterRepo.restoreOrg(organizationName)
+        
+        return {
+            "success": True,
+            "message": "Organization restored successfully",
+            "organizationName": organizationName
+        }
+    
+    @timed("OrgService.getPendingDrops")
+    async def getPendingDrops(self, limit: int = 100):
+        """Collections waiting to be dropped"""
         return {
             "success": True,
-            "message": "Organization deleted successfully"
+            "pendingDrops": await reaperService.getPending(max(1, min(limit, listMaxLimit)))
         }
@@ -0,0 +1,163 @@
+import os
+import socket
+import asyncio
+from datetime import datetime, timedelta
+from bson import ObjectId
+from dotenv import load_dotenv
+from src.db.masterRepo import MasterRepo
+from src.db.dynamicRepo import DynamicRepo
+from src.db.tombstoneRepo import TombstoneRepo
+from src.db.shardRouter import defaultShard
+
+load_dotenv()
+
+# Deferred drop settings
+tombstoneGraceSeconds = float(os.getenv("TOMBSTONE_GRACE_SECONDS", "86400"))
+reaperIntervalSeconds = float(os.getenv("REAPER_INTERVAL_SECONDS", "30"))
+reaperDropsPerMinute = float(os.getenv("REAPER_DROPS_PER_MINUTE", "6"))
+reaperLeaseSeconds = float(os.getenv("REAPER_LEASE_SECONDS", "300"))
+
+class ReaperService:
+    """Defers tenant collection drops and carries them out at a bounded rate"""
+    
+    def __init__(self):
+        self.masterRepo = MasterRepo()
+        self.dynamicRepo = DynamicRepo()
+        self.tombstoneRepo = TombstoneRepo()
+        self.workerId = f"{socket.gethostname()}:{os.getpid()}"
+        self.reaperTask = None
+    
+    async def start(self):
+        """Start the background reaper"""
+        self.reaperTask = asyncio.create_task(self.runReaper())
+    
+    async def stop(self):
+        """Stop the reaper; a drop it had claimed is retried once its lease expires"""
+        if self.reaperTask:
+            self.reaperTask.cancel()
+            try:
+                await self.reaperTask
+            except asyncio.CancelledError:
+                pass
+            self.reaperTask = None
+    
+    @staticmethod
+    def purgeTime() -> datetime:
+        """When a collection tombstoned now may be dropped"""
+        return datetime.utcnow() + timedelta(seconds=tombstoneGraceSeconds)
+    
+    async def tombstone(self, collectionName: str, shard: str, organizationName: str, reason: str,
+                        purgeAfter: datetime = None):
+        """Rename a collection out of the way and schedule its drop; None if there was no collection"""
+        tombstoneId = ObjectId()
+        # Short, so the rename can't exceed the namespace length limit
+        trashCollection = f"trash_{tombstoneId}"
+        
+        # Renaming is metadata-only, so the request never waits on a large drop. COPY_MODE does not
+        # apply: data is never dropped before its grace period, and a failed rename raises with the
+        # collection left where it was. The tombstone is recorded only once the rename succeeded
+        if not await self.dynamicRepo.renameOnServer(collectionName, trashCollection, shard):
+            return None
+        try:
+            return await self.tombstoneRepo.createTombstone({
+                "_id": tombstoneId,
+                "organizationName": organizationName,
+                "reason": reason,
+                "collectionName": collectionName,
+                "trashCollection": trashCollection,
+                "shard": shard,
+                "purgeAfter": purgeAfter or self.purgeTime()
+            })
+        except Exception:
+            # Nothing would ever drop or restore the trash collection
+            await self.dynamicRepo.renameOnServer(trashCollection, collectionName, shard)
+            raise
+    
+    async def tombstoneTenant(self, tenantId, collectionName: str, shard: str, organizationName: str,
+                              reason: str, purgeAfter: datetime = None):
+        """Schedule removal of a tenant's documents from a shared collection"""
+        return await self.tombstoneRepo.createTombstone({
+            "organizationName": organizationName,
+            "reason": reason,
+            "collectionName": collectionName,
+            "trashCollection": None,
+            "tenantId": tenantId,
+            "shard": shard,
+            "purgeAfter": purgeAfter or self.purgeTime()
+        })
+    
+    async def restore(self, tombstone: dict):
+        """Move a tombstoned collection back under its original name"""
+        if not await self.tombstoneRepo.updateState(tombstone["_id"], "restoring", expectedState="pending"):
+            raise Exception("Collection is already being dropped")
+        if tombstone.get("trashCollection") is None:
+            # Shared storage: the documents never moved
+            await self.tombstoneRepo.updateState(tombstone["_id"], "restored")
+            return
+        try:
+            moved = await self.dynamicRepo.renameOnServer(
+                tombstone["trashCollection"],
+                tombstone["collectionName"],
+                tombstone.get("shard")
+            )
+        except Exception as e:
+            print(f"⚠ Restore of {tombstone['collectionName']} failed: {str(e)}")
+            moved = False
+        if not moved:
+            await self.tombstoneRepo.updateState(tombstone["_id"], "pending")
+            raise Exception("Collection could not be restored")
+        await self.tombstoneRepo.updateState(tombstone["_id"], "restored")
+    
+    async def runReaper(self):
+        """Drop due collections, spaced out to limit load on the cluster"""
+        dropSpacing = 60 / reaperDropsPerMinute
+        while True:
+            try:
+                reaped = await self.reapOne()
+            except Exception as e:
+                print(f"✗ Reaper failed: {str(e)}")
+                reaped = False
+            await asyncio.sleep(dropSpacing if reaped else reaperIntervalSeconds)
+    
+    async def reapOne(self) -> bool:
+        """Drop one collection whose grace period has passed"""
+        tombstone = await self.tombstoneRepo.claimDue(self.workerId, reaperLeaseSeconds)
+        if not tombstone:
+            return False
+        
+        if tombstone.get("tenantId") is not None:
+            await self.dynamicRepo.deleteTenantDocuments(
+                tombstone["collectionName"],
+                tombstone["tenantId"],
+                tombstone.get("shard")
+            )
+        else:
+            await self.dynamicRepo.dropCollection(tombstone["trashCollection"], tombstone.get("shard"))
+        if tombstone["reason"] == "delete":
+            # The record has held the name and email until now
+            await self.masterRepo.deleteOrg(tombstone["organizationName"], expected={"deletedAt": {"$ne": None}})
+        await self.tombstoneRepo.updateState(tombstone["_id"], "dropped")
+        print(f"✓ Reaped {tombstone['collectionName']} ({tombstone['reason']} of {tombstone['organizationName']})")
+        return True
+    
+    async def getPending(self, limit: int = 100):
+        """Drops waiting for the reaper"""
+        now = datetime.utcnow()
+        tombstones = await self.tombstoneRepo.findPending(limit)
+        return [
+            {
+                "tombstoneId": str(tombstone["_id"]),
+                "organizationName": tombstone["organizationName"],
+                "reason": tombstone["reason"],
+                "collectionName": tombstone["collectionName"],
+                "shard": tombstone.get("shard") or defaultShard,
+                "state": tombstone["state"],
+                "createdAt": tombstone["createdAt"],
+                "purgeAfter": tombstone["purgeAfter"],
+                "secondsRemaining": max(0.0, round((tombstone["purgeAfter"] - now).total_seconds(), 1))
+            }
+            for tombstone in tombstones
+        ]
+
+# Global reaper instance
+reaperService = ReaperService()
@@ -0,0 +1,38 @@
+import math
+import hashlib
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings: no false negatives, tunable false positives"""
+    
+    def __init__(self, capacity: int, falsePositiveRate: float):
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(falsePositiveRate) / (math.log(2) ** 2)))
+        self.hashCount = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def positions(self, key: str):
+        """Bit positions for key by double hashing one 128-bit digest"""
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + index * second) % self.size for index in range(self.hashCount)]
+    
+    def add(self, key: str):
+        """Insert a key; keys that already test present are not counted again"""
+        added = False
+        for position in self.positions(key):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+    
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+    
+    def isFull(self) -> bool:
+        """Whether more keys were added than the filter was sized for"""
+        return self.count > self.capacity
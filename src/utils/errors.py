@@ -0,0 +1,11 @@
+from pymongo.errors import ConnectionFailure
+
+class ServiceUnavailableError(Exception):
+    """Raised when a dependency is saturated or down and the request should be retried later"""
+    
+    def __init__(self, message: str, retryAfter: int = 1):
+        super().__init__(message)
+        self.retryAfter = retryAfter
+
+# Errors that should reach the client as 503 rather than a 400
+unavailableErrors = (ServiceUnavailableError, ConnectionFailure)
@@ -1,13 +1,148 @@
+import os
+import time
+import asyncio
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dotenv import load_dotenv
+from src.utils.errors import ServiceUnavailableError
+from src.utils.metricsService import timed, metricsRegistry
+
+load_dotenv()
+
+# Hashing pool settings
+hashPoolKind = os.getenv("HASH_POOL_KIND", "thread")
+hashPoolSize = int(os.getenv("HASH_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+hashQueueLimit = int(os.getenv("HASH_QUEUE_LIMIT", "64"))
+
+# bcrypt cost: explicit BCRYPT_ROUNDS, or calibrated against BCRYPT_TARGET_MS at startup
+bcryptRounds = os.getenv("BCRYPT_ROUNDS")
+bcryptTargetMs = float(os.getenv("BCRYPT_TARGET_MS", "250"))
+bcryptMinRounds = int(os.getenv("BCRYPT_MIN_ROUNDS", "12"))
+bcryptMaxRounds = int(os.getenv("BCRYPT_MAX_ROUNDS", "16"))
+defaultRounds = 12
+
+class HashExecutor:
+    """Bounded pool that runs bcrypt work off the event loop"""
+    
+    def __init__(self, poolKind: str, maxWorkers: int, queueLimit: int):
+        self.poolKind = poolKind
+        self.maxWorkers = maxWorkers
+        self.queueLimit = queueLimit
+        self.pool = None
+        self.semaphore = asyncio.Semaphore(maxWorkers)
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.totalWait = 0.0
+        self.maxWait = 0.0
+    
+    def getPool(self):
+        """Create the worker pool on first use"""
+        if self.pool is None:
+            if self.poolKind == "process":
+                self.pool = ProcessPoolExecutor(max_workers=self.maxWorkers)
+            else:
+                self.pool = ThreadPoolExecutor(max_workers=self.maxWorkers, thread_name_prefix="hash")
+        return self.pool
+    
+    async def run(self, func, *args):
+        """Run func in the pool, shedding load when the queue is full"""
+        if self.waiting >= self.queueLimit:
+            self.rejected += 1
+            raise ServiceUnavailableError("Password hashing is overloaded, please retry shortly")
+        
+        self.waiting += 1
+        queuedAt = time.perf_counter()
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        
+        waited = time.perf_counter() - queuedAt
+        self.totalWait += waited
+        self.maxWait = max(self.maxWait, waited)
+        
+        self.active += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.getPool(), func, *args)
+        finally:
+            self.active -= 1
+            self.completed += 1
+            self.semaphore.release()
+    
+    def getStats(self) -> dict:
+        """Return pool utilisation and queue wait figures"""
+        started = self.completed + self.active
+        return {
+            "poolKind": self.poolKind,
+            "maxWorkers": self.maxWorkers,
+            "queueLimit": self.queueLimit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "utilisation": self.active / self.maxWorkers,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avgQueueWaitMs": (self.totalWait / started * 1000) if started else 0.0,
+            "maxQueueWaitMs": self.maxWait * 1000
+        }
+    
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+            self.pool = None
+
+# Global executor instance
+hashExecutor = HashExecutor(hashPoolKind, hashPoolSize, hashQueueLimit)
+metricsRegistry.registerStats("hashPool", hashExecutor.getStats)
+
+def calibrateRounds(targetMs: float, minRounds: int, maxRounds: int) -> int:
+    """Highest bcrypt cost whose hash time fits targetMs on this machine"""
+    password = b"calibration-password"
+    salt = bcrypt.gensalt(minRounds)
+    samples = []
+    for _ in range(3):
+        startedAt = time.perf_counter()
+        bcrypt.hashpw(password, salt)
+        samples.append(time.perf_counter() - startedAt)
+    baseMs = min(samples) * 1000
+    
+    # Each extra round doubles the work
+    rounds = minRounds
+    while rounds < maxRounds and baseMs * 2 ** (rounds + 1 - minRounds) <= targetMs:
+        rounds += 1
+    return rounds
+
+def configureRounds() -> int:
+    """Fix the cost for new hashes, calibrating once if BCRYPT_ROUNDS is unset"""
+    if HashService.rounds is None:
+        HashService.rounds = calibrateRounds(bcryptTargetMs, bcryptMinRounds, bcryptMaxRounds)
+        print(f"✓ Calibrated bcrypt cost {HashService.rounds} for a {bcryptTargetMs:g} ms target")
+    return HashService.rounds
 
 class HashService:
     """Service for password hashing and verification"""
     
+    # Cost for new hashes; None until configureRounds() runs
+    rounds = int(bcryptRounds) if bcryptRounds else None
+    
+    @classmethod
+    def currentRounds(cls) -> int:
+        """Cost new hashes are created with"""
+        return cls.rounds or defaultRounds
+    
     @staticmethod
-    def hashPassword(password: str) -> str:
+    def hashRounds(hashedPassword: str) -> int:
+        """Cost a stored hash was created with ($2b$<cost>$...)"""
+        return int(hashedPassword.split("$")[2])
+    
+    @staticmethod
+    def hashPassword(password: str, rounds: int = 12) -> str:
         """Hash a plain text password"""
         passwordBytes = password.encode('utf-8')
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds)
         hashedPassword = bcrypt.hashpw(passwordBytes, salt)
         return hashedPassword.decode('utf-8')
     
@@ -17,3 +152,13 @@ class HashService:
         passwordBytes = plainPassword.encode('utf-8')
         hashedBytes = hashedPassword.encode('utf-8')
         return bcrypt.checkpw(passwordBytes, hashedBytes)
+    
+    @timed("HashService.hashPasswordAsync")
+    async def hashPasswordAsync(self, password: str) -> str:
+        """Hash a password on the hashing pool"""
+        return await hashExecutor.run(HashService.hashPassword, password, HashService.currentRounds())
+    
+    @timed("HashService.verifyPasswordAsync")
+    async def verifyPasswordAsync(self, plainPassword: str, hashedPassword: str) -> bool:
+        """Verify a password on the hashing pool"""
+        return await hashExecutor.run(HashService.verifyPassword, plainPassword, hashedPassword)
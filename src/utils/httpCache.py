@@ -0,0 +1,34 @@
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Cache-Control for polled read endpoints
+orgGetCacheControl = os.getenv("ORG_GET_CACHE_CONTROL", "public, max-age=5, stale-while-revalidate=30")
+
+def makeEtag(documentId, updatedAt: datetime) -> str:
+    """Strong validator from a document id and its last update time"""
+    stamp = int(updatedAt.replace(tzinfo=timezone.utc).timestamp() * 1_000_000)
+    return f'"{documentId}-{stamp:x}"'
+
+def httpDate(value: datetime) -> str:
+    """Format a naive UTC datetime as an HTTP date"""
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+def isNotModified(ifNoneMatch: str, ifModifiedSince: str, etag: str, lastModified: datetime) -> bool:
+    """Evaluate conditional request headers, If-None-Match taking precedence"""
+    if ifNoneMatch:
+        candidates = [tag.strip() for tag in ifNoneMatch.split(",")]
+        # Weak comparison, as RFC 9110 requires for If-None-Match
+        return "*" in candidates or etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+    if ifModifiedSince:
+        try:
+            since = parsedate_to_datetime(ifModifiedSince)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return lastModified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
@@ -0,0 +1,29 @@
+from decimal import Decimal
+import orjson
+from bson import ObjectId, Decimal128, json_util
+from bson.raw_bson import RawBSONDocument
+from fastapi.responses import JSONResponse
+
+def bsonDefault(value):
+    """orjson fallback for BSON types; datetimes are handled natively"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, RawBSONDocument):
+        # Inflates lazily; nested documents come back through here
+        return dict(value.items())
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, Decimal):
+        return str(value)
+    # Binary, Regex, Timestamp and friends as relaxed Extended JSON; raises TypeError otherwise
+    return json_util.default(value, json_util.RELAXED_JSON_OPTIONS)
+
+def dumpsBson(content) -> bytes:
+    """Serialize BSON-backed content to JSON bytes"""
+    return orjson.dumps(content, default=bsonDefault, option=orjson.OPT_NON_STR_KEYS)
+
+class BsonJSONResponse(JSONResponse):
+    """JSON response rendered with orjson and native BSON encoders"""
+    
+    def render(self, content) -> bytes:
+        return dumpsBson(content)
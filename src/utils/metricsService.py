@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import asyncio
+import functools
+from bisect import bisect_left
+from contextvars import ContextVar
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Shared directory where workers publish metric snapshots (multi-worker mode)
+metricsDir = os.getenv("METRICS_DIR", "")
+metricsSnapshotInterval = float(os.getenv("METRICS_SNAPSHOT_INTERVAL", "5"))
+
+# Upper bounds in seconds, shared by every histogram
+defaultBuckets = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# ASGI scope of the request being served, used to label stage timings
+currentScope = ContextVar("currentScope", default=None)
+
+# Per-request list of (stage, seconds), set only while a request is being profiled
+stageLog = ContextVar("stageLog", default=None)
+
+def escapeLabel(value) -> str:
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+class Histogram:
+    """Fixed-bucket latency histogram keyed by label values"""
+    
+    def __init__(self, name: str, helpText: str, labelNames: tuple, buckets: tuple = defaultBuckets):
+        self.name = name
+        self.helpText = helpText
+        self.labelNames = labelNames
+        self.buckets = buckets
+        # labelValues -> [bucketCounts, sum, count]
+        self.series = {}
+    
+    def observe(self, labelValues: tuple, seconds: float):
+        """Record one observation"""
+        entry = self.series.get(labelValues)
+        if entry is None:
+            entry = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            self.series[labelValues] = entry
+        entry[0][bisect_left(self.buckets, seconds)] += 1
+        entry[1] += seconds
+        entry[2] += 1
+    
+    def snapshot(self) -> list:
+        """Series as JSON-friendly rows for cross-process aggregation"""
+        # Copy first, some histograms are fed from pymongo threads
+        return [[list(labelValues), list(bucketCounts), total, count]
+                for labelValues, (bucketCounts, total, count) in list(self.series.items())]
+    
+    def render(self, rows: list = None) -> list:
+        """Render in Prometheus text format, from live series or merged rows"""
+        rows = self.snapshot() if rows is None else rows
+        lines = [f"# HELP {self.name} {self.helpText}", f"# TYPE {self.name} histogram"]
+        for labelValues, bucketCounts, total, count in sorted(rows):
+            labels = ",".join(f'{name}="{escapeLabel(value)}"' for name, value in zip(self.labelNames, labelValues))
+            prefix = labels + "," if labels else ""
+            cumulative = 0
+            for bound, bucketCount in zip(self.buckets, bucketCounts):
+                cumulative += bucketCount
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Process-wide request, stage and runtime stats registry"""
+    
+    def __init__(self):
+        self.requestHistogram = Histogram(
+            "http_request_duration_seconds",
+            "HTTP request latency by route",
+            ("method", "route", "status")
+        )
+        self.stageHistogram = Histogram(
+            "stage_duration_seconds",
+            "Time spent in service, repository and utility calls",
+            ("route", "stage")
+        )
+        self.histograms = [self.requestHistogram, self.stageHistogram]
+        # group name -> callable returning a dict of stats
+        self.statsSources = {}
+    
+    def observeRequest(self, method: str, route: str, status: int, seconds: float):
+        """Record a finished HTTP request"""
+        self.requestHistogram.observe((method, route, str(status)), seconds)
+    
+    def observeStage(self, stage: str, seconds: float):
+        """Record a stage, labelled with the current route"""
+        self.stageHistogram.observe((routeName(currentScope.get()), stage), seconds)
+        log = stageLog.get()
+        if log is not None:
+            log.append((stage, seconds))
+    
+    def addHistogram(self, histogram: Histogram):
+        """Include another histogram in /metrics"""
+        self.histograms.append(histogram)
+    
+    def registerStats(self, group: str, source):
+        """Expose a getStats() style callable on /metrics and /admin/stats"""
+        self.statsSources[group] = source
+    
+    def collectStats(self) -> dict:
+        """Call every registered stats source"""
+        return {group: source() for group, source in self.statsSources.items()}
+    
+    def snapshot(self) -> dict:
+        """Histograms and stats of this process"""
+        return {
+            "pid": os.getpid(),
+            "writtenAt": time.time(),
+            "histograms": {histogram.name: histogram.snapshot() for histogram in self.histograms},
+            "stats": self.collectStats()
+        }
+    
+    def writeSnapshot(self, directory: str):
+        """Publish this worker's snapshot for the other workers to merge"""
+        path = os.path.join(directory, f"worker-{os.getpid()}.json")
+        temporary = path + ".tmp"
+        with open(temporary, "w") as snapshotFile:
+            json.dump(self.snapshot(), snapshotFile)
+        os.replace(temporary, path)
+    
+    def removeSnapshot(self, directory: str):
+        """Withdraw this worker's snapshot on shutdown"""
+        try:
+            os.remove(os.path.join(directory, f"worker-{os.getpid()}.json"))
+        except FileNotFoundError:
+            pass
+    
+    def readSnapshots(self, directory: str) -> list:
+        """This worker's live snapshot plus fresh snapshots of the others"""
+        snapshots = [self.snapshot()]
+        cutoff = time.time() - metricsSnapshotInterval * 3
+        for fileName in os.listdir(directory):
+            if not fileName.endswith(".json") or fileName == f"worker-{os.getpid()}.json":
+                continue
+            try:
+                with open(os.path.join(directory, fileName)) as snapshotFile:
+                    snapshot = json.load(snapshotFile)
+            except (OSError, ValueError):
+                continue
+            if snapshot.get("writtenAt", 0) >= cutoff:
+                snapshots.append(snapshot)
+        return snapshots
+    
+    def render(self) -> str:
+        """Render every metric in Prometheus text format, merged across workers"""
+        snapshots = self.readSnapshots(metricsDir) if metricsDir else [self.snapshot()]
+        
+        lines = []
+        for histogram in self.histograms:
+            merged = {}
+            for snapshot in snapshots:
+                for labelValues, bucketCounts, total, count in snapshot["histograms"].get(histogram.name, []):
+                    key = tuple(labelValues)
+                    if key not in merged:
+                        merged[key] = [list(labelValues), [0] * len(bucketCounts), 0.0, 0]
+                    row = merged[key]
+                    row[1] = [a + b for a, b in zip(row[1], bucketCounts)]
+                    row[2] += total
+                    row[3] += count
+            lines.extend(histogram.render(list(merged.values())))
+        
+        lines.append("# HELP app_stat Runtime stats from /admin/stats")
+        lines.append("# TYPE app_stat gauge")
+        for snapshot in snapshots:
+            for group, stats in snapshot["stats"].items():
+                for field, value in stats.items():
+                    if isinstance(value, bool):
+                        value = int(value)
+                    if isinstance(value, (int, float)):
+                        lines.append(
+                            f'app_stat{{worker="{snapshot["pid"]}",group="{escapeLabel(group)}",'
+                            f'field="{escapeLabel(field)}"}} {value}'
+                        )
+        return "\n".join(lines) + "\n"
+    
+    async def runSnapshotWriter(self):
+        """Periodically publish snapshots when running with several workers"""
+        if not metricsDir:
+            return
+        try:
+            while True:
+                self.writeSnapshot(metricsDir)
+                await asyncio.sleep(metricsSnapshotInterval)
+        finally:
+            self.removeSnapshot(metricsDir)
+
+def routeName(scope) -> str:
+    """Route template for a request scope, never the raw path"""
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+def timed(stage: str):
+    """Decorator that records a function's latency as a stage"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def asyncWrapper(*args, **kwargs):
+                startedAt = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    metricsRegistry.observeStage(stage, time.perf_counter() - startedAt)
+            return asyncWrapper
+        
+        @functools.wraps(func)
+        def syncWrapper(*args, **kwargs):
+            startedAt = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metricsRegistry.observeStage(stage, time.perf_counter() - startedAt)
+        return syncWrapper
+    return decorator
+
+class MetricsMiddleware:
+    """ASGI middleware that times every HTTP request"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status = 500
+        
+        async def sendWithStatus(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        token = currentScope.set(scope)
+        startedAt = time.perf_counter()
+        try:
+            await self.app(scope, receive, sendWithStatus)
+        finally:
+            metricsRegistry.observeRequest(
+                scope["method"],
+                routeName(scope),
+                status,
+                time.perf_counter() - startedAt
+            )
+            currentScope.reset(token)
+
+# Global registry instance
+metricsRegistry = MetricsRegistry()
@@ -0,0 +1,343 @@
+import os
+import sys
+import hmac
+import time
+import random
+import asyncio
+import threading
+from collections import Counter, deque
+from datetime import datetime
+from dotenv import load_dotenv
+from src.utils.metricsService import Histogram, metricsRegistry, routeName, stageLog
+
+load_dotenv()
+
+# Profiling settings
+profileIntervalMs = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+profileMaxSeconds = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+profileRequestSampleRate = float(os.getenv("PROFILE_REQUEST_SAMPLE_RATE", "0"))
+profileLogSize = int(os.getenv("PROFILE_LOG_SIZE", "50"))
+profileMaxStacks = int(os.getenv("PROFILE_MAX_STACKS", "50"))
+
+# Event loop lag settings
+loopMonitorEnabled = os.getenv("LOOP_MONITOR_ENABLED", "false").lower() == "true"
+loopMonitorIntervalMs = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "50"))
+loopBlockThresholdMs = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+
+def frameLabel(frame, labels: dict) -> str:
+    """Flamegraph label for a frame: function (file:line)"""
+    code = frame.f_code
+    label = labels.get(code)
+    if label is None:
+        path = "/".join(code.co_filename.replace("\\", "/").split("/")[-2:])
+        label = f"{getattr(code, 'co_qualname', code.co_name)} ({path}:{code.co_firstlineno})"
+        labels[code] = label
+    return label
+
+def collapse(counts: Counter, limit: int = None) -> str:
+    """Render stack counts in the collapsed format read by flamegraph.pl and speedscope"""
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common(limit))
+
+class RequestCapture:
+    """Samples of one request: stacks taken while its task was on the event loop"""
+    
+    def __init__(self, frame):
+        # The request's outermost coroutine frame; it is on the loop thread's stack only while the request runs
+        self.frame = frame
+        self.counts = Counter()
+        self.samples = 0
+
+class StackSampler:
+    """Background thread sampling Python stacks, started only while someone is listening"""
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.thread = None
+        self.users = 0
+        self.loopThreadId = None
+        self.captures = set()
+        # Stack counts of the running time-boxed profile, across all threads
+        self.profileCounts = None
+        self.labels = {}
+        self.requestLog = deque(maxlen=profileLogSize)
+        self.profiles = 0
+        self.capturedRequests = 0
+    
+    def acquire(self):
+        """Register a listener, starting the sampling thread if needed"""
+        with self.lock:
+            self.users += 1
+            self.loopThreadId = threading.get_ident()
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+                self.thread.start()
+    
+    def release(self):
+        """Drop a listener; the thread exits when none are left"""
+        with self.lock:
+            self.users -= 1
+    
+    def run(self):
+        """Sampling loop"""
+        ownId = threading.get_ident()
+        while True:
+            with self.lock:
+                if self.users <= 0:
+                    self.thread = None
+                    return
+                self.sample(ownId)
+            time.sleep(self.interval)
+    
+    def stackOf(self, frame, stop=None) -> list:
+        """Frame labels from outermost to innermost, cut just below stop if given"""
+        labels = []
+        while frame is not None and frame is not stop:
+            labels.append(frameLabel(frame, self.labels))
+            frame = frame.f_back
+        if stop is not None and frame is None:
+            return None
+        labels.reverse()
+        return labels
+    
+    def sample(self, ownId: int):
+        """Take one sample for the running profile and every request capture; caller holds the lock"""
+        frames = sys._current_frames()
+        if self.profileCounts is not None:
+            threadNames = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == ownId:
+                    continue
+                stack = [threadNames.get(ident, str(ident))] + self.stackOf(frame)
+                self.profileCounts[";".join(stack)] += 1
+        
+        loopFrame = frames.get(self.loopThreadId)
+        for capture in self.captures:
+            stack = self.stackOf(loopFrame, capture.frame)
+            if stack is None:
+                # The request is awaiting I/O or another task is running
+                continue
+            capture.samples += 1
+            capture.counts[";".join(stack) or "(request)"] += 1
+    
+    async def profile(self, seconds: float) -> tuple:
+        """Sample every thread for a while and return collapsed stacks and the sample count"""
+        seconds = min(max(seconds, 0.1), profileMaxSeconds)
+        with self.lock:
+            if self.profileCounts is not None:
+                raise Exception("A profile is already running in this worker")
+            self.profileCounts = Counter()
+        self.acquire()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.release()
+            with self.lock:
+                counts = self.profileCounts
+                self.profileCounts = None
+        self.profiles += 1
+        return collapse(counts), sum(counts.values())
+    
+    def startCapture(self, frame) -> RequestCapture:
+        """Begin attributing loop samples to the request running frame"""
+        capture = RequestCapture(frame)
+        self.acquire()
+        with self.lock:
+            self.captures.add(capture)
+        return capture
+    
+    def stopCapture(self, capture: RequestCapture, record: dict):
+        """Stop sampling a request and keep its profile"""
+        with self.lock:
+            self.captures.discard(capture)
+        self.release()
+        record["samples"] = capture.samples
+        record["sampledMs"] = round(capture.samples * self.interval * 1000, 1)
+        record["collapsed"] = collapse(capture.counts, profileMaxStacks)
+        self.requestLog.append(record)
+        self.capturedRequests += 1
+    
+    def getRequests(self, limit: int) -> list:
+        """Most recent request profiles first"""
+        return list(self.requestLog)[::-1][:max(0, limit)]
+    
+    def getStats(self) -> dict:
+        """Return profiler usage"""
+        return {
+            "sampling": self.thread is not None,
+            "intervalMs": self.interval * 1000,
+            "requestSampleRate": profileRequestSampleRate,
+            "profiles": self.profiles,
+            "capturedRequests": self.capturedRequests
+        }
+
+class ProfileMiddleware:
+    """ASGI middleware capturing per-request profiles on demand or at a sample rate"""
+    
+    def __init__(self, app, adminKey: str = ""):
+        self.app = app
+        # X-Profile is honoured only alongside a valid X-Admin-Key
+        self.adminKey = adminKey.encode()
+        self.sampleRate = profileRequestSampleRate
+    
+    def wanted(self, scope) -> bool:
+        """Whether to profile this request"""
+        if self.sampleRate > 0 and random.random() < self.sampleRate:
+            return True
+        if not self.adminKey:
+            return False
+        headers = dict(scope["headers"])
+        if headers.get(b"x-profile") not in (b"1", b"true"):
+            return False
+        return hmac.compare_digest(headers.get(b"x-admin-key", b""), self.adminKey)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (self.sampleRate <= 0 and not self.adminKey) or not self.wanted(scope):
+            await self.app(scope, receive, send)
+            return
+        
+        profileId = f"{os.getpid()}-{time.time_ns()}"
+        status = 500
+        
+        async def sendWithProfileId(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profileId.encode())]
+            await send(message)
+        
+        stages = []
+        token = stageLog.set(stages)
+        capture = stackSampler.startCapture(sys._getframe())
+        startedAt = time.perf_counter()
+        try:
+            await self.app(scope, receive, sendWithProfileId)
+        finally:
+            wallMs = (time.perf_counter() - startedAt) * 1000
+            stageLog.reset(token)
+            totals = {}
+            for stage, seconds in stages:
+                total = totals.setdefault(stage, {"count": 0, "ms": 0.0})
+                total["count"] += 1
+                total["ms"] = round(total["ms"] + seconds * 1000, 3)
+            stackSampler.stopCapture(capture, {
+                "profileId": profileId,
+                "at": datetime.utcnow(),
+                "method": scope["method"],
+                "route": routeName(scope),
+                "status": status,
+                "wallMs": round(wallMs, 3),
+                "stages": totals
+            })
+
+class LoopMonitor:
+    """Measures event loop lag and records what the loop was running when it blocked"""
+    
+    # A heartbeat task measures how late each sleep wakes up; a watchdog thread grabs the
+    # loop thread's stack once a heartbeat is overdue, which is the blocking callback
+    
+    def __init__(self, enabled: bool, interval: float, threshold: float):
+        self.enabled = enabled
+        self.interval = interval
+        self.threshold = threshold
+        self.histogram = Histogram("event_loop_lag_seconds", "How late the event loop ran a timer", ())
+        self.blockLog = deque(maxlen=profileLogSize)
+        self.heartbeatTask = None
+        self.watchdog = None
+        self.stopEvent = threading.Event()
+        self.loopThreadId = None
+        self.beat = 0
+        self.beatAt = 0.0
+        self.blockedStack = None
+        self.labels = {}
+        self.blocks = 0
+        self.maxLag = 0.0
+        self.lastLag = 0.0
+    
+    async def start(self):
+        """Start the heartbeat and the watchdog thread"""
+        if not self.enabled or self.heartbeatTask is not None:
+            return
+        metricsRegistry.addHistogram(self.histogram)
+        self.loopThreadId = threading.get_ident()
+        self.beatAt = time.perf_counter()
+        self.stopEvent.clear()
+        self.heartbeatTask = asyncio.create_task(self.runHeartbeat())
+        self.watchdog = threading.Thread(target=self.runWatchdog, name="loop-watchdog", daemon=True)
+        self.watchdog.start()
+    
+    async def stop(self):
+        """Stop monitoring"""
+        if self.heartbeatTask is None:
+            return
+        self.heartbeatTask.cancel()
+        try:
+            await self.heartbeatTask
+        except asyncio.CancelledError:
+            pass
+        self.heartbeatTask = None
+        self.stopEvent.set()
+        self.watchdog.join()
+        self.watchdog = None
+    
+    async def runHeartbeat(self):
+        """Sleep for the interval and record how late the wakeup was"""
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - self.beatAt - self.interval)
+            stack = self.blockedStack
+            self.beat += 1
+            self.beatAt = now
+            self.blockedStack = None
+            self.lastLag = lag
+            self.maxLag = max(self.maxLag, lag)
+            self.histogram.observe((), lag)
+            if lag >= self.threshold:
+                self.recordBlock(lag, stack)
+    
+    def recordBlock(self, lag: float, stack: str):
+        """Log a blocked loop with the stack the watchdog caught"""
+        self.blocks += 1
+        self.blockLog.append({
+            "at": datetime.utcnow(),
+            "lagMs": round(lag * 1000, 1),
+            "stack": stack
+        })
+        print(f"⚠ Event loop blocked for {lag * 1000:.0f} ms" + (f" in {stack.rsplit(';', 1)[-1]}" if stack else ""))
+    
+    def runWatchdog(self):
+        """Capture the loop thread's stack when a heartbeat is overdue"""
+        period = self.threshold / 2
+        while not self.stopEvent.wait(period):
+            beat = self.beat
+            if self.blockedStack is not None or time.perf_counter() - self.beatAt < self.interval + self.threshold:
+                continue
+            frame = sys._current_frames().get(self.loopThreadId)
+            labels = []
+            while frame is not None:
+                labels.append(frameLabel(frame, self.labels))
+                frame = frame.f_back
+            if beat == self.beat:
+                # Still the same overdue heartbeat
+                self.blockedStack = ";".join(reversed(labels))
+    
+    def getBlocks(self, limit: int) -> list:
+        """Most recent blocking events first"""
+        return list(self.blockLog)[::-1][:max(0, limit)]
+    
+    def getStats(self) -> dict:
+        """Return lag figures"""
+        return {
+            "enabled": self.enabled,
+            "thresholdMs": self.threshold * 1000,
+            "lastLagMs": round(self.lastLag * 1000, 3),
+            "maxLagMs": round(self.maxLag * 1000, 3),
+            "blocks": self.blocks
+        }
+
+# Global instances
+stackSampler = StackSampler(profileIntervalMs / 1000)
+loopMonitor = LoopMonitor(loopMonitorEnabled, loopMonitorIntervalMs / 1000, loopBlockThresholdMs / 1000)
+metricsRegistry.registerStats("profiler", stackSampler.getStats)
+metricsRegistry.registerStats("eventLoop", loopMonitor.getStats)
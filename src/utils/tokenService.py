@@ -1,10 +1,18 @@
 import os
+import time
+import hashlib
 import jwt
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from src.utils.metricsService import timed, metricsRegistry
 
 load_dotenv()
 
+# Verified token cache settings
+tokenCacheSize = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+tokenCacheTtl = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+
 class TokenService:
     """Service for JWT token generation and validation"""
     
@@ -13,6 +21,7 @@ class TokenService:
         self.algorithm = os.getenv("JWT_ALGORITHM", "HS256")
         self.expireHours = int(os.getenv("JWT_EXPIRE_HOURS", "24"))
     
+    @timed("TokenService.createToken")
     def createToken(self, adminId: str, organizationName: str) -> str:
         """Generate JWT token for authenticated admin"""
         payload = {
@@ -44,3 +53,81 @@ class TokenService:
             raise Exception("Invalid authorization header format")
         
         return parts[1]
+
+class TokenVerifier:
+    """Process-wide token verifier with a bounded LRU cache of decoded payloads"""
+    
+    def __init__(self, maxSize: int, ttl: float):
+        self.tokenService = TokenService()
+        self.maxSize = maxSize
+        self.ttl = ttl
+        # digest -> (payload, expiresAt)
+        self.entries = OrderedDict()
+        # organizationName -> set of digests
+        self.orgIndex = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    @timed("TokenVerifier.verify")
+    def verify(self, token: str) -> dict:
+        """Return the decoded payload, decoding only on a cache miss"""
+        digest = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        now = time.time()
+        
+        entry = self.entries.get(digest)
+        if entry is not None:
+            payload, expiresAt = entry
+            if now < expiresAt:
+                self.entries.move_to_end(digest)
+                self.hits += 1
+                return payload
+            self.remove(digest)
+        
+        self.misses += 1
+        payload = self.tokenService.verifyToken(token)
+        if self.maxSize > 0:
+            # Never outlive the token itself
+            expiresAt = min(payload.get("exp", now), now + self.ttl)
+            self.store(digest, payload, expiresAt)
+        return payload
+    
+    def store(self, digest: str, payload: dict, expiresAt: float):
+        """Insert an entry, evicting the least recently used one when full"""
+        self.entries[digest] = (payload, expiresAt)
+        self.orgIndex.setdefault(payload.get("organizationName"), set()).add(digest)
+        while len(self.entries) > self.maxSize:
+            oldest = next(iter(self.entries))
+            self.remove(oldest)
+            self.evictions += 1
+    
+    def remove(self, digest: str):
+        """Drop a single cache entry"""
+        entry = self.entries.pop(digest, None)
+        if entry is None:
+            return
+        organizationName = entry[0].get("organizationName")
+        digests = self.orgIndex.get(organizationName)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self.orgIndex[organizationName]
+    
+    def evictOrganization(self, organizationName: str):
+        """Forget every cached token issued for an organization"""
+        for digest in list(self.orgIndex.get(organizationName, ())):
+            self.remove(digest)
+    
+    def getStats(self) -> dict:
+        """Return cache size and hit counters"""
+        return {
+            "size": len(self.entries),
+            "maxSize": self.maxSize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+# Global verifier instance
+tokenVerifier = TokenVerifier(tokenCacheSize, tokenCacheTtl)
+metricsRegistry.registerStats("tokenCache", tokenVerifier.getStats)
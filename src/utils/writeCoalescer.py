@@ -0,0 +1,98 @@
+import asyncio
+from src.utils.errors import ServiceUnavailableError
+
+class WriteCoalescer:
+    """Merges concurrent writes to the same target into micro-batches"""
+    
+    def __init__(self, flushHandler, flushSize: int, flushInterval: float, maxPending: int):
+        # flushHandler(key, documents) -> (ids, errorsByIndex)
+        self.flushHandler = flushHandler
+        self.flushSize = flushSize
+        self.flushInterval = flushInterval
+        self.maxPending = maxPending
+        self.buffers = {}
+        self.flushTasks = set()
+        self.pending = 0
+        self.requests = 0
+        self.documents = 0
+        self.flushes = 0
+        self.sizeFlushes = 0
+        self.rejected = 0
+    
+    async def submit(self, key, documents: list):
+        """Queue documents for key and wait until their batch is written"""
+        if self.pending + len(documents) > self.maxPending:
+            self.rejected += 1
+            raise ServiceUnavailableError("Document ingest is overloaded, please retry shortly")
+        
+        loop = asyncio.get_running_loop()
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            buffer = {"documents": [], "waiters": []}
+            buffer["timer"] = loop.call_later(self.flushInterval, self.flush, key)
+            self.buffers[key] = buffer
+        
+        future = loop.create_future()
+        buffer["waiters"].append((future, len(buffer["documents"]), len(documents)))
+        buffer["documents"].extend(documents)
+        self.pending += len(documents)
+        self.requests += 1
+        
+        if len(buffer["documents"]) >= self.flushSize:
+            self.sizeFlushes += 1
+            self.flush(key)
+        return await future
+    
+    def flush(self, key):
+        """Start writing the buffer for key"""
+        buffer = self.buffers.pop(key, None)
+        if buffer is None:
+            return
+        buffer["timer"].cancel()
+        task = asyncio.ensure_future(self.runFlush(key, buffer))
+        self.flushTasks.add(task)
+        task.add_done_callback(self.flushTasks.discard)
+    
+    async def runFlush(self, key, buffer: dict):
+        """Write one batch and hand each waiter its slice of the result"""
+        documents = buffer["documents"]
+        try:
+            ids, errors = await self.flushHandler(key, documents)
+        except Exception as e:
+            for future, _, _ in buffer["waiters"]:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.pending -= len(documents)
+            self.flushes += 1
+        
+        self.documents += len(documents)
+        for future, start, count in buffer["waiters"]:
+            if future.done():
+                continue
+            future.set_result((
+                ids[start:start + count],
+                {index - start: error for index, error in errors.items() if start <= index < start + count}
+            ))
+    
+    async def drain(self):
+        """Write everything still buffered; call on shutdown"""
+        for key in list(self.buffers):
+            self.flush(key)
+        if self.flushTasks:
+            await asyncio.gather(*self.flushTasks, return_exceptions=True)
+    
+    def getStats(self) -> dict:
+        """Return batching figures"""
+        return {
+            "flushSize": self.flushSize,
+            "flushIntervalMs": self.flushInterval * 1000,
+            "pendingDocuments": self.pending,
+            "requests": self.requests,
+            "documents": self.documents,
+            "flushes": self.flushes,
+            "sizeFlushes": self.sizeFlushes,
+            "avgBatchSize": (self.documents / self.flushes) if self.flushes else 0.0,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,54 @@
+"""Shared fixtures: the app wired to an in-memory MongoDB
+
+Run from the repository root (needs tests/requirements.txt):
+
+    python -m pytest
+"""
+import os
+
+# mongomock has no change streams
+os.environ["ORG_PREFILTER_SYNC"] = "poll"
+os.environ.setdefault("JWT_SECRET", "test-secret-key-of-at-least-32-bytes")
+
+import httpx
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from src.api import adminAuth
+from src.db import connection
+from src.db.orgCache import orgCache
+from src.db.orgFilter import orgFilter
+from src.utils.hashService import HashService
+from src.main import app
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(autouse=True)
+def fastHashing():
+    """Cheap bcrypt cost so tests don't spend their time hashing"""
+    rounds = HashService.rounds
+    HashService.rounds = 4
+    yield
+    HashService.rounds = rounds
+
+@pytest.fixture
+async def db():
+    """Fresh in-memory master database with indexes, mirroring connectDb"""
+    connection.client = AsyncMongoMockClient()
+    connection.database = connection.client[connection.databaseName]
+    await connection.buildIndexes()
+    orgCache.clear()
+    yield connection.database
+    await orgFilter.stop()
+    await orgCache.stop()
+    connection.client = None
+    connection.database = None
+    connection.indexesReady = False
+
+@pytest.fixture
+async def client(monkeypatch):
+    """HTTP client for the app, with ADMIN_API_KEY set to "secret"; no lifespan runs"""
+    monkeypatch.setattr(adminAuth, "adminApiKey", "secret")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
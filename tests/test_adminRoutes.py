@@ -0,0 +1,9 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+@pytest.mark.parametrize("path", ["/admin/stats", "/admin/slow-ops", "/metrics"])
+async def test_operator_endpoints_need_the_admin_key(client, path):
+    assert (await client.get(path)).status_code == 401
+    assert (await client.get(path, headers={"X-Admin-Key": "wrong"})).status_code == 401
+    assert (await client.get(path, headers={"X-Admin-Key": "secret"})).status_code == 200
@@ -0,0 +1,33 @@
+import pytest
+from src.utils.hashService import HashService
+from src.services import adminService as adminModule
+from src.services.adminService import AdminService
+
+pytestmark = pytest.mark.anyio
+
+async def storeAdmin(db, rounds: int):
+    await db.organizations.insert_one({
+        "organizationName": "Acme",
+        "dynamicCollectionName": "orgAcme",
+        "email": "admin@acme.com",
+        "password": HashService.hashPassword("password", rounds),
+        "deletedAt": None
+    })
+
+async def loginAndWait():
+    await AdminService().loginAdmin("admin@acme.com", "password")
+    for task in list(adminModule.rehashTasks):
+        await task
+
+async def test_login_upgrades_a_cheaper_hash(db):
+    await storeAdmin(db, 4)
+    HashService.rounds = 5
+    await loginAndWait()
+    stored = await db.organizations.find_one({"organizationName": "Acme"})
+    assert HashService.hashRounds(stored["password"]) == 5
+
+async def test_login_never_downgrades_a_stronger_hash(db):
+    await storeAdmin(db, 6)
+    await loginAndWait()
+    stored = await db.organizations.find_one({"organizationName": "Acme"})
+    assert HashService.hashRounds(stored["password"]) == 6
@@ -0,0 +1,22 @@
+from src.utils.bloomFilter import BloomFilter
+
+def test_added_keys_are_always_found():
+    bloom = BloomFilter(1000, 0.01)
+    keys = [f"name:org{index}" for index in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    assert not bloom.isFull()
+
+def test_false_positive_rate_stays_near_the_target():
+    bloom = BloomFilter(1000, 0.01)
+    for index in range(1000):
+        bloom.add(f"name:org{index}")
+    falsePositives = sum(f"email:other{index}" in bloom for index in range(10000))
+    assert falsePositives < 300
+
+def test_filter_reports_full_past_its_capacity():
+    bloom = BloomFilter(10, 0.01)
+    for index in range(11):
+        bloom.add(f"key{index}")
+    assert bloom.isFull()
@@ -0,0 +1,64 @@
+import time
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from src.db import connection
+from src.db.circuitBreaker import CircuitBreaker
+from src.utils.errors import ServiceUnavailableError
+
+pytestmark = pytest.mark.anyio
+
+def openBreaker(resetSeconds: float = 10) -> CircuitBreaker:
+    breaker = CircuitBreaker(failureThreshold=2, resetSeconds=resetSeconds)
+    breaker.trip("connection refused")
+    return breaker
+
+def test_open_breaker_rejects_until_the_reset_period_ends():
+    breaker = openBreaker()
+    with pytest.raises(ServiceUnavailableError):
+        breaker.check()
+    assert breaker.rejected == 1
+
+def test_half_open_breaker_lets_one_trial_call_through():
+    breaker = openBreaker()
+    breaker.openedAt -= breaker.resetSeconds
+    
+    breaker.check()
+    assert breaker.state == "half-open"
+    with pytest.raises(ServiceUnavailableError):
+        breaker.check()
+    
+    breaker.recordSuccess()
+    assert breaker.state == "closed"
+    breaker.check()
+
+def test_failed_trial_reopens_and_a_lost_trial_is_replaced():
+    breaker = openBreaker()
+    breaker.openedAt -= breaker.resetSeconds
+    breaker.check()
+    breaker.recordFailure("timed out")
+    assert breaker.state == "open"
+    
+    breaker.openedAt -= breaker.resetSeconds
+    breaker.check()
+    # The trial never reported back
+    breaker.trialStartedAt = time.monotonic() - breaker.resetSeconds
+    breaker.check()
+    assert breaker.state == "half-open"
+
+async def test_lazy_client_builds_indexes_on_first_use(monkeypatch):
+    def createClient():
+        connection.client = AsyncMongoMockClient()
+        connection.database = connection.client[connection.databaseName]
+    
+    monkeypatch.setattr(connection, "createClient", createClient)
+    monkeypatch.setattr(connection, "nextIndexAttempt", 0.0)
+    try:
+        database = connection.getDb()
+        assert not connection.indexesReady
+        await connection.indexTask
+        assert connection.indexesReady
+        assert "dynamicCollectionNameUnique" in await database.organizations.index_information()
+    finally:
+        connection.client = None
+        connection.database = None
+        connection.indexesReady = False
@@ -0,0 +1,12 @@
+import pytest
+from bson.int64 import Int64
+from src.db.commandMonitor import CommandMonitor
+
+@pytest.mark.parametrize("commandName, command, expected", [
+    ("find", {"find": "orgAcme", "filter": {}}, "orgAcme"),
+    ("getMore", {"getMore": Int64(7215841935), "collection": "orgAcme"}, "orgAcme"),
+    ("renameCollection", {"renameCollection": "masterDb.orgAcme", "to": "masterDb.orgAcmeNew"}, "orgAcme"),
+    ("listCollections", {"listCollections": 1}, "-")
+])
+def test_commands_are_labelled_with_their_collection(commandName, command, expected):
+    assert CommandMonitor.collectionFor(commandName, command) == expected
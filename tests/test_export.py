@@ -0,0 +1,54 @@
+import gzip
+import json
+import bson
+import pytest
+from src.services.orgService import OrgService
+from src.services.ingestService import ingestService
+
+pytestmark = pytest.mark.anyio
+
+async def createOrg(name: str, storage: str, documents: list):
+    await OrgService().createOrganization(name, f"{name.lower()}@example.com", "password", storage)
+    await ingestService.insertDocuments(name, documents)
+
+async def export(organizationName: str, **options) -> bytes:
+    # mongomock can't return RawBSONDocument, so read decoded documents
+    stream = await OrgService().exportDocuments(organizationName, raw=False, **options)
+    return b"".join([chunk async for chunk in stream])
+
+def lines(body: bytes) -> list:
+    return [json.loads(line) for line in body.decode().splitlines()]
+
+async def test_shared_exports_only_hold_the_tenants_documents(db):
+    await createOrg("Alpha", "shared", [{"_id": 1, "owner": "alpha"}, {"_id": 2, "owner": "alpha"}])
+    await createOrg("Beta", "shared", [{"_id": 1, "owner": "beta"}])
+    
+    assert lines(await export("Alpha")) == [{"_id": 1, "owner": "alpha"}, {"_id": 2, "owner": "alpha"}]
+    assert lines(await export("Beta", query={"_id": 1})) == [{"_id": 1, "owner": "beta"}]
+    assert lines(await export("Beta", query={"owner": "alpha"})) == []
+
+@pytest.mark.parametrize("query, projection", [
+    ({"$where": "this.owner == 'beta'"}, None),
+    ({"$or": [{"owner": "a"}, {"$expr": {"$function": {"body": "return true", "args": [], "lang": "js"}}}]}, None),
+    (None, {"score": {"$accumulator": {}}})
+])
+async def test_server_side_javascript_is_rejected(db, query, projection):
+    await createOrg("Alpha", "collection", [{"_id": 1}])
+    with pytest.raises(Exception, match="is not allowed"):
+        await export("Alpha", query=query, projection=projection)
+
+async def test_bson_export_decodes_back_to_the_documents(db):
+    documents = [{"_id": 1, "sku": "A1", "tags": ["x"]}, {"_id": 2, "sku": "B2", "tags": []}]
+    await createOrg("Acme", "collection", [dict(document) for document in documents])
+    
+    assert bson.decode_all(await export("Acme", format="bson")) == documents
+    assert bson.decode_all(await export("Acme", format="bson", projection={"sku": 1})) == [
+        {"_id": 1, "sku": "A1"}, {"_id": 2, "sku": "B2"}
+    ]
+
+async def test_gzip_export_decompresses_to_ndjson(db):
+    await createOrg("Acme", "collection", [{"_id": index, "sku": f"A{index}"} for index in range(50)])
+    
+    body = await export("Acme", gzip=True)
+    assert body[:2] == b"\x1f\x8b"
+    assert lines(gzip.decompress(body)) == [{"_id": index, "sku": f"A{index}"} for index in range(50)]
@@ -0,0 +1,29 @@
+import asyncio
+import threading
+import pytest
+from src.utils import hashService
+from src.utils.hashService import HashExecutor
+
+pytestmark = pytest.mark.anyio
+
+async def test_full_hash_queue_answers_503_with_retry_after(db, client, fastHashing, monkeypatch):
+    executor = HashExecutor("thread", 1, 1)
+    monkeypatch.setattr(hashService, "hashExecutor", executor)
+    release = threading.Event()
+    busy = asyncio.create_task(executor.run(release.wait, 5))
+    queued = asyncio.create_task(executor.run(len, "queued"))
+    while executor.waiting < 1:
+        await asyncio.sleep(0.01)
+    
+    try:
+        response = await client.post("/org/create", json={
+            "organizationName": "Acme", "email": "admin@acme.com", "password": "password"
+        })
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+        assert executor.getStats()["rejected"] == 1
+        assert await db.organizations.count_documents({}) == 0
+    finally:
+        release.set()
+        await asyncio.gather(busy, queued)
+        executor.shutdown()
@@ -0,0 +1,53 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from src.db.indexes import ensureIndexes, reportDuplicates
+from src.services.orgService import OrgService
+
+pytestmark = pytest.mark.anyio
+
+async def test_names_sharing_a_collection_are_rejected(db):
+    service = OrgService()
+    await service.createOrganization("Acme Inc", "admin@acme.com", "password")
+    await service.createOrganization("Globex", "admin@globex.com", "password")
+    
+    with pytest.raises(Exception, match="too similar"):
+        await service.createOrganization("acme inc", "other@acme.com", "password")
+    with pytest.raises(Exception, match="too similar"):
+        await service.updateOrganization("Globex", "ACME inc", "admin@globex.com", "password")
+    
+    result = await service.bulkCreateOrganizations([
+        {"organizationName": "Acme-Inc", "email": "third@acme.com", "password": "password"},
+        {"organizationName": "Initech", "email": "admin@initech.com", "password": "password"},
+        {"organizationName": "initech", "email": "other@initech.com", "password": "password"}
+    ])
+    assert [item.get("error") for item in result["results"]] == [
+        "Organization name too similar to an existing one", None, "Organization name repeated in batch"
+    ]
+    assert await db.organizations.count_documents({}) == 3
+
+async def test_startup_fails_when_a_unique_index_cannot_be_built():
+    database = AsyncMongoMockClient()["duplicates"]
+    await database.organizations.insert_many([
+        {"organizationName": "Acme", "email": "admin@acme.com", "dynamicCollectionName": "orgAcme"},
+        {"organizationName": "Globex", "email": "admin@acme.com", "dynamicCollectionName": "orgGlobex"}
+    ])
+    
+    with pytest.raises(Exception, match="organizations.emailUnique"):
+        await ensureIndexes(database)
+
+async def test_duplicates_blocking_unique_indexes_are_reported(capsys):
+    database = AsyncMongoMockClient()["duplicates"]
+    await database.organizations.insert_many([
+        {"organizationName": "Acme Inc", "email": "admin@acme.com", "dynamicCollectionName": "orgAcmeinc"},
+        {"organizationName": "acme inc", "email": "other@acme.com", "dynamicCollectionName": "orgAcmeinc"},
+        {"organizationName": "Globex", "email": "admin@globex.com", "dynamicCollectionName": "orgGlobex"}
+    ])
+    
+    with pytest.raises(Exception, match="organizations.dynamicCollectionNameUnique"):
+        await ensureIndexes(database)
+    assert "(Acme Inc), " in capsys.readouterr().out
+    
+    assert await reportDuplicates(database) == 1
+    report = capsys.readouterr().out
+    assert "dynamicCollectionNameUnique {'dynamicCollectionName': 'orgAcmeinc'}" in report
+    assert "(acme inc)" in report and "Globex" not in report
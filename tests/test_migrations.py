@@ -0,0 +1,66 @@
+import pytest
+from datetime import datetime, timedelta
+from bson import ObjectId
+from src.db.migrationRepo import MigrationRepo
+from src.utils.hashService import HashService
+from src.services.orgService import OrgService
+from src.services.migrationService import migrationService
+
+pytestmark = pytest.mark.anyio
+
+async def test_rename_job_does_not_store_the_password_hash(db):
+    service = OrgService()
+    await service.createOrganization("Acme", "admin@acme.com", "old-password")
+    await db.orgAcme.insert_one({"sku": 1})
+    
+    result = await service.updateOrganization("Acme", "Acme Labs", "owner@acme.com", "new-password")
+    assert result["status"] == "queued"
+    
+    # Credentials are already applied under the old name, before the job runs
+    org = await db.organizations.find_one({"organizationName": "Acme"})
+    assert org["email"] == "owner@acme.com"
+    assert HashService.verifyPassword("new-password", org["password"])
+    
+    job = await db.migrations.find_one({"_id": ObjectId(result["migrationId"])})
+    assert set(job["updateData"]) == {"organizationName", "dynamicCollectionName"}
+    assert org["password"] not in repr(job)
+    
+    await migrationService.runJob(ObjectId(result["migrationId"]))
+    assert (await MigrationRepo().findById(result["migrationId"]))["state"] == "completed"
+    renamed = await db.organizations.find_one({"organizationName": "Acme Labs"})
+    assert renamed["dynamicCollectionName"] == service.generateCollectionName("Acme Labs")
+    assert renamed["password"] == org["password"]
+
+async def test_update_rejects_a_taken_email_before_queuing(db):
+    service = OrgService()
+    await service.createOrganization("Acme", "admin@acme.com", "password")
+    await service.createOrganization("Globex", "admin@globex.com", "password")
+    
+    with pytest.raises(Exception, match="Email already registered"):
+        await service.updateOrganization("Acme", "Acme Labs", "admin@globex.com", "password")
+    with pytest.raises(Exception, match="New organization name already exists"):
+        await service.updateOrganization("Acme", "Globex", "admin@acme.com", "password")
+    
+    assert await db.migrations.count_documents({}) == 0
+    assert (await db.organizations.find_one({"organizationName": "Acme"}))["email"] == "admin@acme.com"
+
+async def test_job_abandoned_by_a_dead_worker_is_taken_over(db):
+    service = OrgService()
+    await service.createOrganization("Acme", "admin@acme.com", "password")
+    await db.orgAcme.insert_one({"sku": 1})
+    result = await service.updateOrganization("Acme", "Acme Labs", "admin@acme.com", "password")
+    jobId = ObjectId(result["migrationId"])
+    
+    # Another worker claimed it, then died; its lease is still live
+    await db.migrations.update_one({"_id": jobId}, {"$set": {
+        "state": "copying",
+        "workerId": "host:1",
+        "leaseUntil": datetime.utcnow() + timedelta(seconds=30)
+    }})
+    assert await migrationService.runDueJobs() == 0
+    
+    await db.migrations.update_one({"_id": jobId}, {"$set": {"leaseUntil": datetime.utcnow() - timedelta(seconds=1)}})
+    assert await migrationService.runDueJobs() == 1
+    job = await MigrationRepo().findById(result["migrationId"])
+    assert job["state"] == "completed" and job["workerId"] is None
+    assert await db.organizations.count_documents({"organizationName": "Acme Labs"}) == 1
@@ -0,0 +1,75 @@
+import pytest
+from src.db.masterRepo import MasterRepo
+from src.db.orgCache import orgCache, generationsCollection
+from src.services.orgService import OrgService
+from src.services.adminService import AdminService
+
+pytestmark = pytest.mark.anyio
+
+async def writtenByAnotherWorker(db, name: str, update: dict):
+    """Change a record and publish it the way MasterRepo does in another worker"""
+    await db.organizations.update_one({"organizationName": name}, {"$set": update})
+    await orgCache.publish([name])
+
+async def test_cached_documents_never_hold_the_password_hash(db):
+    await OrgService().createOrganization("Acme", "admin@acme.com", "password")
+    await orgCache.sync()
+    
+    repo = MasterRepo()
+    hits = orgCache.hits
+    assert "password" not in await repo.findByName("Acme")
+    assert "password" not in await repo.findByName("Acme")
+    assert orgCache.hits == hits + 1
+    assert all("password" not in document for document, _ in orgCache.entries.values())
+    
+    # Login reads the hash from MongoDB
+    result = await AdminService().loginAdmin("admin@acme.com", "password")
+    assert result["organizationName"] == "Acme"
+
+async def test_writes_from_another_worker_drop_just_that_name(db):
+    service = OrgService()
+    await service.createOrganization("Acme", "admin@acme.com", "password")
+    await service.createOrganization("Globex", "admin@globex.com", "password")
+    await orgCache.sync()
+    repo = MasterRepo()
+    await repo.findByName("Acme")
+    await repo.findByName("Globex")
+    
+    await writtenByAnotherWorker(db, "Acme", {"shard": "elsewhere"})
+    # Mutating paths read past the cache straight away
+    assert (await repo.findByName("Acme", fresh=True))["shard"] == "elsewhere"
+    
+    await orgCache.sync()
+    assert set(orgCache.entries) == {"Globex"}
+    assert (await repo.findByName("Acme"))["shard"] == "elsewhere"
+
+async def test_missing_invalidation_entries_clear_everything(db):
+    await OrgService().createOrganization("Acme", "admin@acme.com", "password")
+    await orgCache.sync()
+    await MasterRepo().findByName("Acme")
+    
+    # Counter moved but the entry is not there (yet, or pruned)
+    await db[generationsCollection].update_one({"_id": "organizations"}, {"$inc": {"generation": 1}}, upsert=True)
+    clears = orgCache.remoteClears
+    await orgCache.sync()
+    assert orgCache.remoteClears == clears + 1 and not orgCache.entries
+
+async def test_cache_is_not_served_until_the_counter_is_read(db):
+    await OrgService().createOrganization("Acme", "admin@acme.com", "password")
+    repo = MasterRepo()
+    hits = orgCache.hits
+    await repo.findByName("Acme")
+    await repo.findByName("Acme")
+    assert orgCache.hits == hits
+
+async def test_public_lookups_fill_the_cache(db):
+    service = OrgService()
+    await service.createOrganization("Acme", "admin@acme.com", "password")
+    await orgCache.sync()
+    hits = orgCache.hits
+    
+    for _ in range(5):
+        result = await service.getOrganization("Acme")
+        assert set(result["organization"]) == {"_id", "organizationName", "dynamicCollectionName", "email", "createdAt", "updatedAt"}
+    assert orgCache.hits == hits + 4
+    assert orgCache.getStats()["size"] == 1
@@ -0,0 +1,65 @@
+import pytest
+from datetime import datetime
+from src.db.masterRepo import MasterRepo
+from src.db.orgFilter import orgFilter
+from src.services.orgService import OrgService
+
+pytestmark = pytest.mark.anyio
+
+async def createdByAnotherWorker(db, name: str, email: str):
+    """Write straight to MongoDB, as a worker that doesn't share this process's filter would"""
+    now = datetime.utcnow()
+    await db.organizations.insert_one({
+        "organizationName": name,
+        "dynamicCollectionName": f"org{name}",
+        "email": email,
+        "password": "hash",
+        "deletedAt": None,
+        "createdAt": now,
+        "updatedAt": now
+    })
+
+async def test_lookups_find_records_the_filter_has_not_seen(db):
+    await orgFilter.build()
+    await createdByAnotherWorker(db, "Elsewhere", "elsewhere@example.com")
+    
+    # The filter is trusted and has not synced yet; polling is not a live feed, so lookups read MongoDB
+    assert orgFilter.trusted() and not orgFilter.mightExist("email", "elsewhere@example.com")
+    repo = MasterRepo()
+    assert (await repo.findByEmail("elsewhere@example.com"))["organizationName"] == "Elsewhere"
+    assert (await repo.findByName("Elsewhere"))["email"] == "elsewhere@example.com"
+    assert (await repo.findPublicByName("Elsewhere"))["organizationName"] == "Elsewhere"
+
+async def test_unique_indexes_back_up_a_missed_availability_check(db):
+    await orgFilter.build()
+    await createdByAnotherWorker(db, "Elsewhere", "elsewhere@example.com")
+    
+    result = await OrgService().bulkCreateOrganizations([
+        {"organizationName": "Elsewhere", "email": "new@example.com", "password": "password"}
+    ])
+    assert result["results"][0]["error"] == "Organization name already exists"
+
+async def test_sync_picks_up_other_workers_writes(db):
+    await orgFilter.build()
+    await createdByAnotherWorker(db, "Elsewhere", "elsewhere@example.com")
+    
+    await orgFilter.sync()
+    assert orgFilter.mightExist("name", "Elsewhere")
+    assert not orgFilter.mightExist("name", "Nowhere")
+    assert await MasterRepo().findExisting(["Nowhere"], ["nowhere@example.com"]) == []
+
+async def test_lookups_skip_mongodb_for_unknown_keys_while_the_change_stream_is_live(db, monkeypatch):
+    await OrgService().createOrganization("Acme", "admin@acme.com", "password")
+    await orgFilter.build()
+    monkeypatch.setattr(orgFilter, "streaming", True)
+    repo = MasterRepo()
+    
+    skipped = orgFilter.skipped
+    assert await repo.findByEmail("nobody@example.com") is None
+    assert await repo.findPublicByName("Nobody") is None
+    assert await repo.findExisting(["Nobody"], ["nobody@example.com"], ["orgNobody"]) == []
+    assert orgFilter.skipped == skipped + 5
+    
+    assert (await repo.findByEmail("admin@acme.com"))["organizationName"] == "Acme"
+    assert (await repo.findPublicByName("Acme"))["email"] == "admin@acme.com"
+    assert (await repo.findExisting([], [], ["orgAcme"]))[0]["organizationName"] == "Acme"
@@ -0,0 +1,65 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+admin = {"X-Admin-Key": "secret"}
+
+def organization(name: str) -> dict:
+    return {"organizationName": name, "email": f"admin@{name.lower()}.com", "password": "password"}
+
+async def test_bulk_create_reports_each_item(db, client):
+    assert (await client.post("/org/create", json=organization("Acme"))).status_code == 200
+    
+    batch = {"organizations": [
+        organization("Globex"),
+        organization("Acme"),
+        organization("Globex"),
+        {"organizationName": "Initech", "email": "not-an-email", "password": "password"}
+    ]}
+    assert (await client.post("/org/bulk-create", json=batch)).status_code == 401
+    
+    response = await client.post("/org/bulk-create", json=batch, headers=admin)
+    body = response.json()
+    assert response.status_code == 200
+    assert (body["created"], body["failed"]) == (1, 3)
+    assert [item["success"] for item in body["results"]] == [True, False, False, False]
+    assert body["results"][1]["error"] == "Organization name already exists"
+    assert body["results"][2]["error"] == "Organization name repeated in batch"
+    assert await db.organizations.count_documents({}) == 2
+
+async def test_get_answers_conditional_requests_with_304(db, client):
+    await client.post("/org/create", json=organization("Acme"))
+    
+    first = await client.get("/org/get", params={"organizationName": "Acme"})
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and "password" not in first.json()["organization"]
+    
+    again = await client.get("/org/get", params={"organizationName": "Acme"}, headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.headers["ETag"] == etag
+    weak = await client.get("/org/get", params={"organizationName": "Acme"}, headers={"If-None-Match": f"W/{etag}"})
+    assert weak.status_code == 304
+    since = await client.get("/org/get", params={"organizationName": "Acme"},
+                             headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert since.status_code == 304
+    
+    await db.organizations.update_one({"organizationName": "Acme"}, {"$set": {"email": "new@acme.com"}, "$currentDate": {"updatedAt": True}})
+    changed = await client.get("/org/get", params={"organizationName": "Acme"}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+@pytest.mark.parametrize("sort", ["id", "name"])
+async def test_list_pages_through_every_organization_once(db, client, sort):
+    names = ["Delta", "Alpha", "Echo", "Charlie", "Bravo"]
+    await client.post("/org/bulk-create", json={"organizations": [organization(name) for name in names]}, headers=admin)
+    
+    seen = []
+    params = {"sort": sort, "limit": 2}
+    while True:
+        page = (await client.get("/org/list", params=params, headers=admin)).json()
+        seen += [org["organizationName"] for org in page["organizations"]]
+        if page["nextCursor"] is None:
+            break
+        params["after"] = page["nextCursor"]
+    
+    assert seen == (names if sort == "id" else sorted(names))
+    mismatched = await client.get("/org/list", params={"sort": "name" if sort == "id" else "id", "after": params["after"]}, headers=admin)
+    assert mismatched.status_code == 400
@@ -0,0 +1,70 @@
+import pytest
+from pymongo.errors import OperationFailure
+from src.db import dynamicRepo as dynamicRepoModule
+from src.db.dynamicRepo import DynamicRepo
+from src.db.tombstoneRepo import TombstoneRepo
+from src.services.orgService import OrgService
+from src.services.reaperService import reaperService
+
+pytestmark = pytest.mark.anyio
+
+async def test_delete_and_restore_round_trip(db):
+    service = OrgService()
+    await service.createOrganization("Acme", "admin@acme.com", "password")
+    await db.orgAcme.insert_one({"sku": 1})
+    
+    result = await service.deleteOrganization("Acme")
+    assert "restorableUntil" in result
+    assert "orgAcme" not in await db.list_collection_names()
+    
+    await service.restoreOrganization("Acme")
+    assert await db.orgAcme.count_documents({}) == 1
+    assert await db.tombstones.count_documents({"state": "pending"}) == 0
+
+async def test_missing_collection_leaves_no_tombstone(db):
+    assert await reaperService.tombstone("orgNothing", None, "Nothing", "delete") is None
+    assert await db.tombstones.count_documents({}) == 0
+
+async def test_failed_tombstone_write_moves_the_collection_back(db, monkeypatch):
+    service = OrgService()
+    await service.createOrganization("Acme", "admin@acme.com", "password")
+    await db.orgAcme.insert_one({"sku": 1})
+    
+    async def failingCreate(self, tombstoneData):
+        raise Exception("write failed")
+    
+    monkeypatch.setattr(TombstoneRepo, "createTombstone", failingCreate)
+    with pytest.raises(Exception, match="write failed"):
+        await service.deleteOrganization("Acme")
+    
+    # Neither hidden nor moved
+    assert await db.orgAcme.count_documents({}) == 1
+    assert (await service.getOrganization("Acme"))["success"]
+
+async def test_stream_copy_mode_still_tombstones_instead_of_dropping(db, monkeypatch):
+    monkeypatch.setattr(dynamicRepoModule, "copyMode", "stream")
+    service = OrgService()
+    await service.createOrganization("Acme", "admin@acme.com", "password")
+    await db.orgAcme.insert_one({"sku": 1})
+    
+    result = await service.deleteOrganization("Acme")
+    assert "restorableUntil" in result
+    tombstone = await db.tombstones.find_one({"organizationName": "Acme"})
+    assert await db[tombstone["trashCollection"]].count_documents({}) == 1
+    assert await db.organizations.count_documents({"organizationName": "Acme"}) == 1
+
+async def test_failed_rename_fails_the_delete_and_keeps_everything(db, monkeypatch):
+    service = OrgService()
+    await service.createOrganization("Acme", "admin@acme.com", "password")
+    await db.orgAcme.insert_one({"sku": 1})
+    
+    async def failingRename(self, sourceCollection, targetCollection, shard=None):
+        raise OperationFailure("namespace name too long", 73)
+    
+    monkeypatch.setattr(DynamicRepo, "renameOnServer", failingRename)
+    with pytest.raises(OperationFailure):
+        await service.deleteOrganization("Acme")
+    
+    assert await db.orgAcme.count_documents({}) == 1
+    assert await db.tombstones.count_documents({}) == 0
+    assert (await service.getOrganization("Acme"))["success"]
@@ -0,0 +1,23 @@
+from src import server
+
+def test_cgroup_v2_quota(tmp_path):
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert server.cgroupCpuLimit(str(tmp_path)) == 1.5
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert server.cgroupCpuLimit(str(tmp_path)) is None
+
+def test_cgroup_v1_quota(tmp_path):
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000")
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1")
+    assert server.cgroupCpuLimit(str(tmp_path)) is None
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("200000")
+    assert server.cgroupCpuLimit(str(tmp_path)) == 2
+
+def test_worker_count_rounds_a_quota_up_and_keeps_the_override(monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setattr(server.os, "sched_getaffinity", lambda pid: {0, 1, 2, 3}, raising=False)
+    monkeypatch.setattr(server, "cgroupCpuLimit", lambda: 1.5)
+    assert server.workerCount() == 2
+    monkeypatch.setenv("WEB_CONCURRENCY", "6")
+    assert server.workerCount() == 6
@@ -0,0 +1,65 @@
+import pytest
+from bson import ObjectId
+from src.db.dynamicRepo import DynamicRepo
+from src.db.indexes import sharedCollectionName
+from src.db.tenantStorage import SharedStorage
+from src.db.migrationRepo import MigrationRepo
+from src.services.orgService import OrgService
+from src.services.ingestService import ingestService
+from src.services.migrationService import migrationService
+
+pytestmark = pytest.mark.anyio
+
+async def createOrg(name: str, storage: str):
+    await OrgService().createOrganization(name, f"{name.lower()}@example.com", "password", storage)
+
+async def test_tenants_in_shared_storage_have_separate_id_spaces(db):
+    await createOrg("Alpha", "shared")
+    await createOrg("Beta", "shared")
+    
+    first = await ingestService.insertDocuments("Alpha", [{"_id": 1, "owner": "alpha"}])
+    second = await ingestService.insertDocuments("Beta", [{"_id": 1, "owner": "beta"}])
+    
+    assert first["insertedIds"] == [1] and second["insertedIds"] == [1]
+    assert await db[sharedCollectionName].count_documents({}) == 2
+    
+    again = await ingestService.insertDocuments("Alpha", [{"_id": 1, "owner": "alpha"}])
+    assert again["failed"] == 1
+
+async def test_convert_into_shared_storage_keeps_colliding_ids(db):
+    await createOrg("Alpha", "shared")
+    await createOrg("Beta", "collection")
+    await ingestService.insertDocuments("Alpha", [{"_id": 1, "owner": "alpha"}])
+    await ingestService.insertDocuments("Beta", [{"_id": 1, "owner": "beta"}, {"_id": 2, "owner": "beta"}])
+    
+    result = await OrgService().convertStorage("Beta", "shared")
+    await migrationService.runJob(ObjectId(result["migrationId"]))
+    
+    job = await MigrationRepo().findById(result["migrationId"])
+    assert job["state"] == "completed"
+    beta = await db.organizations.find_one({"organizationName": "Beta"})
+    owners = [document["owner"] async for document in db[sharedCollectionName].find({"tenantId": beta["_id"]})]
+    assert owners == ["beta", "beta"]
+    assert await db[sharedCollectionName].count_documents({"owner": "alpha"}) == 1
+    
+    # And back out again, with the client _id values restored
+    result = await OrgService().convertStorage("Beta", "collection")
+    await migrationService.runJob(ObjectId(result["migrationId"]))
+    assert [document["_id"] async for document in db[beta["dynamicCollectionName"]].find({}, sort=[("_id", 1)])] == [1, 2]
+
+async def test_resumed_copy_rejects_a_different_document_under_the_same_id(db):
+    target = db["copyTarget"]
+    await target.insert_one({"_id": 1, "value": "existing"})
+    
+    assert await DynamicRepo().insertBatch(target, [{"_id": 1, "value": "existing"}, {"_id": 2, "value": "new"}]) == 1
+    with pytest.raises(Exception, match="different content"):
+        await DynamicRepo().insertBatch(target, [{"_id": 1, "value": "changed"}])
+
+def test_client_id_filters_are_scoped_to_the_tenant():
+    query = SharedStorage().scopeQuery({"_id": "t1"}, {"_id": 5, "$or": [{"_id": {"$gt": 1}}, {"kind": "a"}]})
+    
+    assert query == {
+        "_id": {"tenantId": "t1", "id": 5},
+        "$or": [{"_id.id": {"$gt": 1}}, {"kind": "a"}],
+        "tenantId": "t1"
+    }
@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from src.db.indexes import sharedCollectionName
+from src.services.orgService import OrgService
+from src.services.ingestService import ingestService
+from src.utils.errors import ServiceUnavailableError
+from src.utils.writeCoalescer import WriteCoalescer
+
+pytestmark = pytest.mark.anyio
+
+class Recorder:
+    """Flush handler that records batches and fails documents marked bad"""
+    
+    def __init__(self):
+        self.batches = []
+    
+    async def __call__(self, key, documents: list):
+        self.batches.append((key, [document["n"] for document in documents]))
+        ids = [None if document.get("bad") else document["n"] for document in documents]
+        errors = {index: {"errmsg": "bad"} for index, document in enumerate(documents) if document.get("bad")}
+        return ids, errors
+
+async def test_each_waiter_gets_its_slice_of_ids_and_errors():
+    recorder = Recorder()
+    coalescer = WriteCoalescer(recorder, 100, 0.01, 100)
+    
+    results = await asyncio.gather(
+        coalescer.submit("orgAcme", [{"n": 1}, {"n": 2}]),
+        coalescer.submit("orgAcme", [{"n": 3}, {"n": 4, "bad": True}, {"n": 5}]),
+        coalescer.submit("orgGlobex", [{"n": 6, "bad": True}])
+    )
+    
+    assert recorder.batches == [("orgAcme", [1, 2, 3, 4, 5]), ("orgGlobex", [6])]
+    assert results == [([1, 2], {}), ([3, None, 5], {1: {"errmsg": "bad"}}), ([None], {0: {"errmsg": "bad"}})]
+    assert coalescer.getStats()["pendingDocuments"] == 0
+
+async def test_batches_flush_at_size_or_after_the_interval():
+    recorder = Recorder()
+    bySize = WriteCoalescer(recorder, 3, 60, 100)
+    await asyncio.wait_for(asyncio.gather(
+        bySize.submit("orgAcme", [{"n": 1}, {"n": 2}]),
+        bySize.submit("orgAcme", [{"n": 3}])
+    ), 1)
+    assert bySize.getStats()["sizeFlushes"] == 1
+    
+    byTimer = WriteCoalescer(recorder, 100, 0.01, 100)
+    assert await asyncio.wait_for(byTimer.submit("orgAcme", [{"n": 4}]), 1) == ([4], {})
+    assert (byTimer.getStats()["flushes"], byTimer.getStats()["sizeFlushes"]) == (1, 0)
+
+async def test_submissions_past_max_pending_are_refused_with_503():
+    recorder = Recorder()
+    coalescer = WriteCoalescer(recorder, 100, 60, 2)
+    waiting = asyncio.create_task(coalescer.submit("orgAcme", [{"n": 1}, {"n": 2}]))
+    await asyncio.sleep(0)
+    
+    with pytest.raises(ServiceUnavailableError) as refused:
+        await coalescer.submit("orgAcme", [{"n": 3}])
+    assert refused.value.retryAfter >= 1
+    assert coalescer.getStats()["rejected"] == 1
+    
+    await coalescer.drain()
+    assert await waiting == ([1, 2], {})
+
+async def test_drain_writes_everything_still_buffered():
+    recorder = Recorder()
+    coalescer = WriteCoalescer(recorder, 100, 60, 100)
+    waiters = [asyncio.create_task(coalescer.submit(key, [{"n": n}])) for n, key in enumerate(["orgAcme", "orgGlobex"])]
+    await asyncio.sleep(0)
+    assert recorder.batches == []
+    
+    await coalescer.drain()
+    assert sorted(recorder.batches) == [("orgAcme", [0]), ("orgGlobex", [1])]
+    assert [waiter.done() for waiter in waiters] == [True, True]
+
+async def test_shared_batches_refuse_only_migrating_tenants(db, monkeypatch):
+    service = OrgService()
+    await service.createOrganization("Alpha", "alpha@example.com", "password", "shared")
+    await service.createOrganization("Beta", "beta@example.com", "password", "shared")
+    alpha = await db.organizations.find_one({"organizationName": "Alpha"})
+    await db.migrations.insert_one({"state": "copying", "tenantId": alpha["_id"]})
+    # Both requests land in one batch, flushed once the third document arrives
+    monkeypatch.setattr(ingestService, "coalescer", WriteCoalescer(ingestService.flushDocuments, 3, 60, 100))
+    
+    alphaResult, betaResult = await asyncio.wait_for(asyncio.gather(
+        ingestService.insertDocuments("Alpha", [{"_id": 1}]),
+        ingestService.insertDocuments("Beta", [{"_id": 1}, {"_id": 2}])
+    ), 5)
+    
+    assert ingestService.coalescer.getStats()["flushes"] == 1
+    assert alphaResult["errors"] == [{"index": 0, "error": "A migration is in progress for this organization"}]
+    assert (betaResult["inserted"], betaResult["insertedIds"]) == (2, [1, 2])
+    assert await db[sharedCollectionName].count_documents({"tenantId": alpha["_id"]}) == 0